@@ -0,0 +1,198 @@
+"""NumPy batch engine: many auto-switch battles stepped together.
+
+Every battle's state lives in arrays (HP per team slot, active slot,
+winner, turn count) and each step resolves one turn for all unfinished
+battles at once: speed order, damage rolls, faints and the auto_switch
+choice (first alive slot). Per-pair damage before the random roll is
+precomputed from calculate_damage's formula over a pool of Pokemon, so
+a step is only gathers, one uniform draw and a floor.
+
+Rules match TurnBattleEngine: the faster Pokemon attacks first (ties
+are a coin flip), a Pokemon knocked out before acting does not attack,
+and a fainted side switches in before the next turn. Individual battles
+draw from NumPy's RNG, so results match the object engine statistically
+rather than roll for roll.
+
+Requires the optional `numpy` dependency.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Sequence
+
+from src.battle.models import BattleConfig, BattlePokemonStats
+from src.battle.type_chart import DUAL_CHART, NO_TYPE
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError(
+            "The batch engine requires numpy (pip install 'pokemon-scraper[numpy]')"
+        ) from None
+    return numpy
+
+
+def damage_table(pool: Sequence[BattlePokemonStats], config: BattleConfig) -> Any:
+    """base[a, d]: damage of pool[a] hitting pool[d] before the random roll.
+
+    Uses the same operation order as calculate_damage, so
+    floor(base * roll) is the exact damage for a given roll.
+    """
+    np = _numpy()
+    chart = np.array(DUAL_CHART)
+
+    def column(attr: str) -> Any:
+        return np.array([getattr(stats, attr) for stats in pool], dtype=np.float64)
+
+    physical = column("base_attack") >= column("base_sp_attack")
+    atk_val = np.where(physical, column("battle_attack"), column("battle_sp_attack"))
+    def_val = np.where(
+        physical[:, None],
+        column("battle_defense")[None, :],
+        column("battle_sp_defense")[None, :],
+    )
+
+    type1 = np.array([stats.type1_idx for stats in pool])
+    type2 = np.array([stats.type2_idx for stats in pool])
+    combo = np.array([stats.combo_idx for stats in pool])
+    eff1 = chart[type1[:, None], combo[None, :]]
+    eff2 = chart[type2[:, None], combo[None, :]]
+    type_mult = np.where((type2 != NO_TYPE)[:, None], np.maximum(eff1, eff2), eff1)
+
+    raw = np.floor(
+        (2 * config.level / 5 + 2) * config.move_power * atk_val[:, None] / (def_val * 50) + 2
+    )
+    return raw * type_mult * config.stab_bonus
+
+
+@dataclass(frozen=True)
+class BatchResult:
+    """Per-battle outcomes; arrays are indexed by battle."""
+
+    winners: Any   # 1 or 2
+    turns: Any
+    damage: Any    # shape (B, 2): total damage rolled by team 1 / team 2
+
+    @property
+    def battles(self) -> int:
+        return len(self.winners)
+
+
+def run_batch(
+    pool: Sequence[BattlePokemonStats],
+    teams1: Any,
+    teams2: Any,
+    *,
+    config: BattleConfig | None = None,
+    seed: int | Sequence[int] | None = None,
+    max_turns: int = 10_000,
+) -> BatchResult:
+    """Fight teams1[b] against teams2[b] for every b.
+
+    Teams are (B, T) integer arrays of indices into `pool`, in lineup
+    order; -1 marks an empty slot, so teams of different sizes can share
+    a batch. Every team needs at least one Pokemon.
+    """
+    np = _numpy()
+    config = config or BattleConfig()
+    rng = np.random.default_rng(seed)
+
+    teams1 = np.atleast_2d(np.asarray(teams1, dtype=np.int64))
+    teams2 = np.atleast_2d(np.asarray(teams2, dtype=np.int64))
+    if len(teams1) != len(teams2):
+        raise ValueError("teams1 and teams2 must have the same number of battles")
+    if (teams1[:, 0] < 0).any() or (teams2[:, 0] < 0).any():
+        raise ValueError("Every team needs a Pokemon in its first slot")
+
+    n_battles = len(teams1)
+    width = max(teams1.shape[1], teams2.shape[1])
+    members = np.full((n_battles, 2, width), -1, dtype=np.int64)
+    members[:, 0, :teams1.shape[1]] = teams1
+    members[:, 1, :teams2.shape[1]] = teams2
+
+    base = damage_table(pool, config)
+    speed = np.array([stats.battle_speed for stats in pool], dtype=np.int64)
+    max_hp = np.array([stats.battle_hp for stats in pool], dtype=np.int64)
+
+    # Empty slots start fainted so auto-switch never picks them.
+    hp = np.where(members >= 0, max_hp[members], 0)
+    members[members < 0] = 0
+    active = np.zeros((n_battles, 2), dtype=np.int64)
+    winners = np.zeros(n_battles, dtype=np.int8)
+    turns = np.zeros(n_battles, dtype=np.int64)
+    damage = np.zeros((n_battles, 2), dtype=np.int64)
+
+    def attack(battles, att_side, def_side):
+        """One attack per listed battle; returns the defenders that fainted."""
+        attacker = members[battles, att_side, active[battles, att_side]]
+        slot = active[battles, def_side]
+        defender = members[battles, def_side, slot]
+        roll = rng.uniform(config.random_min, config.random_max, len(battles))
+        dealt = np.maximum(1, np.floor(base[attacker, defender] * roll)).astype(np.int64)
+        damage[battles, att_side] += dealt
+        left = hp[battles, def_side, slot] - dealt
+        hp[battles, def_side, slot] = np.maximum(left, 0)
+        return left <= 0
+
+    def faint(battles, side):
+        """Auto-switch the fainted side, or end the battle if it has no one left."""
+        alive = hp[battles, side] > 0
+        has_next = alive.any(axis=1)
+        switching = battles[has_next]
+        active[switching, side[has_next]] = alive[has_next].argmax(axis=1)
+        beaten = ~has_next
+        # side is 0/1 for team 1/2; the winner is the other team.
+        winners[battles[beaten]] = 2 - side[beaten]
+
+    running = np.arange(n_battles)
+    for _ in range(max_turns):
+        if not len(running):
+            break
+        turns[running] += 1
+
+        speed1 = speed[members[running, 0, active[running, 0]]]
+        speed2 = speed[members[running, 1, active[running, 1]]]
+        first = np.where(
+            speed1 > speed2, 0,
+            np.where(speed2 > speed1, 1, rng.integers(0, 2, len(running))),
+        )
+        second = 1 - first
+
+        fainted = attack(running, first, second)
+        faint(running[fainted], second[fainted])
+
+        countering = ~fainted
+        battles = running[countering]
+        fainted = attack(battles, second[countering], first[countering])
+        faint(battles[fainted], first[countering][fainted])
+
+        running = running[winners[running] == 0]
+
+    if len(running):
+        raise RuntimeError(f"{len(running)} battles did not finish in {max_turns} turns")
+    return BatchResult(winners=winners, turns=turns, damage=damage)
+
+
+def run_matchup(
+    team1: Sequence[BattlePokemonStats],
+    team2: Sequence[BattlePokemonStats],
+    battles: int,
+    *,
+    config: BattleConfig | None = None,
+    seed: int | Sequence[int] | None = None,
+) -> BatchResult:
+    """Repeat one team1-vs-team2 matchup `battles` times."""
+    np = _numpy()
+    pool = list(team1) + list(team2)
+    lineup1 = np.arange(len(team1))
+    lineup2 = np.arange(len(team1), len(pool))
+    return run_batch(
+        pool,
+        np.broadcast_to(lineup1, (battles, len(team1))),
+        np.broadcast_to(lineup2, (battles, len(team2))),
+        config=config,
+        seed=seed,
+    )
@@ -11,6 +11,10 @@ class TurnBattleEngine:
     """Turn-based 1v1 battle engine.
 
     States: ready -> (waiting_switch) -> ready -> ... -> finished
+
+    All randomness (damage rolls, speed ties) comes from the engine's own
+    RNG seeded with `seed`, so the seed, both teams and `switch_log`
+    are enough to replay a battle (see src.battle.replay).
     """
 
     def __init__(
@@ -18,10 +22,15 @@ class TurnBattleEngine:
         team1: list[BattlePokemon],
         team2: list[BattlePokemon],
         config: BattleConfig | None = None,
+        seed: int | None = None,
     ) -> None:
         self.team1 = team1
         self.team2 = team2
         self.config = config or BattleConfig()
+        self.seed = random.getrandbits(64) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        # Team index chosen at each switch, in order.
+        self.switch_log: list[int] = []
         self.turn = 0
         self.state = "ready"
         self.finished = False
@@ -63,7 +72,7 @@ class TurnBattleEngine:
         elif speed2 > speed1:
             first, second = a2, a1
         else:
-            first, second = random.choice([(a1, a2), (a2, a1)])
+            first, second = self.rng.choice([(a1, a2), (a2, a1)])
 
         attack_event = self._do_attack(first, second)
         events.append(attack_event)
@@ -105,6 +114,7 @@ class TurnBattleEngine:
         else:
             self.active2 = chosen
 
+        self.switch_log.append(index)
         self._waiting_switch_team = None
         self.state = "ready"
         return chosen
@@ -127,7 +137,7 @@ class TurnBattleEngine:
         self, attacker: BattlePokemon, defender: BattlePokemon,
     ) -> TurnEvent:
         damage, effectiveness, attack_type = calculate_damage(
-            attacker, defender, self.config,
+            attacker, defender, self.config, self.rng,
         )
         defender.current_hp = max(0, defender.current_hp - damage)
         fainted = defender.current_hp <= 0
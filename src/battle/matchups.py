@@ -0,0 +1,406 @@
+"""All-pairs 1v1 matchup table, memory-mapped for O(1) lookups.
+
+For every ordered pair (attacker, defender) the file holds:
+
+    expected_damage  float32  mean damage per hit, calculate_damage's roll
+    hits_to_ko       uint16   ceil(defender HP / expected_damage)
+    speed_diff       int16    attacker battle speed - defender battle speed
+    win_prob         float32  chance the attacker wins a 1v1
+
+Pair (a, d) is element a * N + d of each column, in `id` order. The
+layout is the same as src/db/snapshot.py: header, column directory and
+8-byte aligned raw arrays, so readers only mmap the file.
+
+Win probabilities are analytic rather than simulated. The mean and
+variance of one hit are exact. The number of hits needed to KO is taken
+from them: the one-hit case is exact, and sums of two or more hits use a
+normal approximation clipped to the possible min/max hit counts. Then
+the engine's turn rule is applied: the faster side wins when both need
+the same number of hits, and a speed tie makes that a coin flip.
+
+The file also stores each Pokemon's battle inputs and the damage
+settings of BattleConfig. A rebuild only recomputes rows and columns of
+Pokemon whose inputs changed or that are new. Building needs the
+optional numpy dependency; reading does not.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import sqlite3
+import struct
+from array import array
+from pathlib import Path
+from typing import Any
+
+from src.battle.batch import damage_table
+from src.battle.models import BattleConfig
+from src.db.queries import fetch_battle_stats
+
+MAGIC = b"PKMATCH1"
+VERSION = 1
+
+_HEADER = struct.Struct("<8sHH")
+_DIR_ENTRY = struct.Struct("<24s2sIQQ")
+
+_CONFIG_FIELDS = ("level", "move_power", "stab_bonus", "random_min", "random_max")
+_INPUT_WIDTH = 8
+_PAIR_COLUMNS = {
+    "expected_damage": "f",
+    "hits_to_ko": "H",
+    "speed_diff": "h",
+    "win_prob": "f",
+}
+
+# Hit counts considered per pair around HP / mean damage; the
+# distribution is much narrower than this except for 1-2 damage hits.
+_WINDOW = 32
+_ROW_BLOCK = 16
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError(
+            "Building matchups requires numpy (pip install 'pokemon-scraper[numpy]')"
+        ) from None
+    return numpy
+
+
+def _config_key(config: BattleConfig) -> bytes:
+    values = {name: getattr(config, name) for name in _CONFIG_FIELDS}
+    return json.dumps(values, sort_keys=True).encode("utf-8")
+
+
+def _inputs(np, pool) -> Any:
+    return np.array(
+        [
+            (
+                s.base_hp, s.base_attack, s.base_defense, s.base_sp_attack,
+                s.base_sp_defense, s.base_speed, s.type1_idx, s.type2_idx,
+            )
+            for s in pool
+        ],
+        dtype=np.int16,
+    ).reshape(len(pool), _INPUT_WIDTH)
+
+
+def _normal_sf(np, z):
+    """1 - Phi(z), via the Abramowitz-Stegun erf approximation (|err| < 2e-7)."""
+    x = np.abs(z) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (
+        1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    upper = 0.5 * poly * np.exp(-x * x)
+    return np.where(z >= 0, upper, 1.0 - upper)
+
+
+class _HitModel:
+    """Per-hit damage distribution for a block of (attacker, defender) pairs."""
+
+    def __init__(self, np, base, hp, config: BattleConfig) -> None:
+        self.np = np
+        self.hp = hp
+        lo = base * config.random_min
+        hi = base * config.random_max
+        width = hi - lo
+        varying = width > 0
+        w = np.where(varying, width, 1.0)
+
+        def first(x):
+            m = np.floor(x)
+            return m * (x - m) + m * (m - 1) / 2
+
+        def second(x):
+            m = np.floor(x)
+            return m * m * (x - m) + (m - 1) * m * (2 * m - 1) / 6
+
+        # calculate_damage deals max(1, floor(base * roll)); rolls below 1
+        # would floor to 0 and count as 1 instead.
+        below_one = np.where(varying, np.clip((1 - lo) / w, 0, 1), (lo < 1) * 1.0)
+        mean = np.where(varying, (first(hi) - first(lo)) / w, np.floor(lo)) + below_one
+        square = np.where(varying, (second(hi) - second(lo)) / w, np.floor(lo) ** 2) + below_one
+
+        self.mean = mean
+        self.sd = np.sqrt(np.maximum(square - mean * mean, 0))
+        self.one_hit = np.where(varying, np.clip((hi - hp) / w, 0, 1), (hi >= hp) * 1.0)
+        self.n_min = np.ceil(hp / np.maximum(1, np.floor(hi)))
+        self.n_max = np.ceil(hp / np.maximum(1, np.floor(lo)))
+
+    def ko_cdf(self, k, axis_pad: bool = False):
+        """P(the defender is KO'd within k hits); k broadcasts over a trailing axis."""
+        np = self.np
+
+        def col(a):
+            return a[..., None] if axis_pad else a
+
+        spread = np.maximum(col(self.sd) * np.sqrt(np.maximum(k, 1)), 1e-9)
+        p = _normal_sf(np, (col(self.hp) - 0.5 - k * col(self.mean)) / spread)
+        p = np.where(k == 1, col(self.one_hit), p)
+        p = np.where(k < col(self.n_min), 0.0, p)
+        return np.where(k >= col(self.n_max), 1.0, p)
+
+
+def _compute_block(np, base, hp, speed, config, rows, cols) -> dict[str, Any]:
+    """All pair columns for attackers `rows` against defenders `cols`."""
+    out = {
+        name: np.empty((len(rows), len(cols)), dtype=fmt)
+        for name, fmt in _PAIR_COLUMNS.items()
+    }
+    for start in range(0, len(rows), _ROW_BLOCK):
+        r = rows[start:start + _ROW_BLOCK]
+        attack = _HitModel(np, base[np.ix_(r, cols)], hp[cols][None, :], config)
+        counter = _HitModel(np, base[np.ix_(cols, r)].T, hp[r][:, None], config)
+
+        centre = np.floor(attack.hp / attack.mean)
+        k0 = np.maximum(attack.n_min, centre - _WINDOW // 2)
+        # Past n_max the KO is certain, so most blocks need far fewer
+        # than _WINDOW hit counts.
+        width = int(min(_WINDOW, (attack.n_max - k0).max() + 1))
+        ks = k0[..., None] + np.arange(width)
+
+        cdf = np.maximum.accumulate(attack.ko_cdf(ks, axis_pad=True), axis=-1)
+        cdf[..., -1] = 1.0
+        pmf = np.diff(cdf, axis=-1, prepend=0.0)
+
+        their_cdf = counter.ko_cdf(ks, axis_pad=True)
+        their_prev = counter.ko_cdf(ks - 1, axis_pad=True)
+        their_exact = np.maximum(their_cdf - their_prev, 0.0)
+
+        diff = speed[r][:, None] - speed[cols][None, :]
+        tie_share = np.where(diff > 0, 1.0, np.where(diff < 0, 0.0, 0.5))[..., None]
+        win = (pmf * ((1.0 - their_cdf) + tie_share * their_exact)).sum(axis=-1)
+
+        block = slice(start, start + len(r))
+        out["expected_damage"][block] = attack.mean
+        out["hits_to_ko"][block] = np.minimum(np.ceil(attack.hp / attack.mean), 0xFFFF)
+        out["speed_diff"][block] = diff
+        out["win_prob"][block] = np.clip(win, 0.0, 1.0)
+    return out
+
+
+def build_matchups(
+    conn: sqlite3.Connection,
+    output_path: Path,
+    *,
+    config: BattleConfig | None = None,
+    force: bool = False,
+) -> dict[str, int]:
+    """Write the matchup table for every Pokemon in pokemon_full.
+
+    Pairs whose two Pokemon are unchanged since the previous file (same
+    stats, types and damage settings) are copied rather than recomputed.
+    Returns pokemon/computed/reused counts (computed and reused are pairs).
+    """
+    np = _numpy()
+    config = config or BattleConfig()
+    ids = [row[0] for row in conn.execute("SELECT id FROM pokemon_full ORDER BY id")]
+    pool = fetch_battle_stats(conn, ids)
+    n = len(pool)
+    inputs = _inputs(np, pool)
+    config_key = _config_key(config)
+
+    columns = {
+        name: np.zeros((n, n), dtype=fmt) for name, fmt in _PAIR_COLUMNS.items()
+    }
+    stale = np.ones(n, dtype=bool)
+
+    if output_path.exists() and not force:
+        with MatchupTable(output_path) as previous:
+            if bytes(previous.column("config")) == config_key:
+                # Copies: views into the mmap would keep it from closing.
+                old_ids = np.frombuffer(previous.column("id"), dtype=np.uint16).copy()
+                old_inputs = np.frombuffer(previous.column("inputs"), dtype=np.int16).copy()
+                old_inputs = old_inputs.reshape(len(old_ids), _INPUT_WIDTH)
+                old_pos = {int(pid): i for i, pid in enumerate(old_ids)}
+
+                keep_new, keep_old = [], []
+                for i, pid in enumerate(ids):
+                    j = old_pos.get(pid)
+                    if j is not None and (old_inputs[j] == inputs[i]).all():
+                        keep_new.append(i)
+                        keep_old.append(j)
+                stale[keep_new] = False
+
+                for name, fmt in _PAIR_COLUMNS.items():
+                    old = np.frombuffer(previous.column(name), dtype=fmt)
+                    old = old.reshape(len(old_ids), len(old_ids))
+                    columns[name][np.ix_(keep_new, keep_new)] = old[np.ix_(keep_old, keep_old)]
+                    del old
+
+    if n:
+        base = damage_table(pool, config)
+        hp = np.array([s.battle_hp for s in pool], dtype=np.float64)
+        speed = np.array([s.battle_speed for s in pool], dtype=np.int64)
+        all_idx = np.arange(n)
+        stale_idx = np.flatnonzero(stale)
+        fresh_idx = np.flatnonzero(~stale)
+
+        # Stale attackers need full rows; fresh ones only stale columns.
+        for rows, cols in ((stale_idx, all_idx), (fresh_idx, stale_idx)):
+            if len(rows) and len(cols):
+                block = _compute_block(np, base, hp, speed, config, rows, cols)
+                for name in _PAIR_COLUMNS:
+                    columns[name][np.ix_(rows, cols)] = block[name]
+
+    computed = n * n - int((~stale).sum()) ** 2
+    raw_columns = [
+        ("config", "B", len(config_key), config_key),
+        ("id", "H", n, array("H", ids).tobytes()),
+        ("inputs", "h", inputs.size, inputs.tobytes()),
+    ] + [
+        (name, fmt, n * n, columns[name].tobytes())
+        for name, fmt in _PAIR_COLUMNS.items()
+    ]
+    _write_columns(output_path, raw_columns)
+    return {"pokemon": n, "computed": computed, "reused": n * n - computed}
+
+
+def _write_columns(output_path: Path, columns: list[tuple[str, str, int, bytes]]) -> None:
+    data_start = _HEADER.size + _DIR_ENTRY.size * len(columns)
+    directory = bytearray()
+    body = bytearray()
+    for name, fmt, count, raw in columns:
+        body += b"\0" * (-(data_start + len(body)) % 8)
+        directory += _DIR_ENTRY.pack(
+            name.encode("ascii"), fmt.encode("ascii"), count, data_start + len(body), len(raw),
+        )
+        body += raw
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_suffix(output_path.suffix + ".tmp")
+    with tmp_path.open("wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(columns)))
+        f.write(directory)
+        f.write(body)
+    tmp_path.replace(output_path)
+
+
+class MatchupTable:
+    """Read-only view over a matchup file."""
+
+    def __init__(self, path: Path) -> None:
+        with path.open("rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        magic, version, n_columns = _HEADER.unpack_from(self._view, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"Not a matchup table (v{VERSION}): {path}")
+
+        self._exports: list[memoryview] = []
+        self._columns: dict[str, memoryview] = {}
+        for i in range(n_columns):
+            name, fmt, _count, offset, length = _DIR_ENTRY.unpack_from(
+                self._view, _HEADER.size + i * _DIR_ENTRY.size,
+            )
+            raw = self._view[offset:offset + length]
+            column = raw.cast(fmt.decode("ascii"))
+            self._exports += (column, raw)
+            self._columns[name.rstrip(b"\0").decode("ascii")] = column
+
+        self._ids = self._columns["id"]
+        self._index = {pid: i for i, pid in enumerate(self._ids)}
+
+    def close(self) -> None:
+        self._columns = {}
+        for view in getattr(self, "_exports", ()):
+            view.release()
+        self._exports = []
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "MatchupTable":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, pokemon_id: int) -> bool:
+        return pokemon_id in self._index
+
+    def column(self, name: str) -> memoryview:
+        return self._columns[name]
+
+    def _pair(self, a: int, d: int) -> dict[str, Any]:
+        offset = a * len(self._ids) + d
+        record = {name: self._columns[name][offset] for name in _PAIR_COLUMNS}
+        record["attacker_id"] = self._ids[a]
+        record["defender_id"] = self._ids[d]
+        return record
+
+    def lookup(self, attacker_id: int, defender_id: int) -> dict[str, Any] | None:
+        """Matchup of attacker_id hitting defender_id, or None if either is unknown."""
+        a = self._index.get(attacker_id)
+        d = self._index.get(defender_id)
+        if a is None or d is None:
+            return None
+        return self._pair(a, d)
+
+    def counters(self, defender_id: int, limit: int = 10) -> list[dict[str, Any]]:
+        """Pokemon most likely to beat `defender_id` 1v1, best first
+        (ties go to whoever needs fewer hits)."""
+        d = self._index.get(defender_id)
+        if d is None:
+            return []
+        n = len(self._ids)
+        win_prob = self._columns["win_prob"]
+        hits = self._columns["hits_to_ko"]
+        ranked = sorted(
+            (a for a in range(n) if a != d),
+            key=lambda a: (-win_prob[a * n + d], hits[a * n + d]),
+        )
+        return [self._pair(a, d) for a in ranked[:limit]]
+
+    def win_row(self, attacker_id: int, defender_ids: list[int]) -> list[float] | None:
+        """win_prob of attacker_id against each of defender_ids, or None if
+        any of them is not in the table."""
+        a = self._index.get(attacker_id)
+        defenders = [self._index.get(pid) for pid in defender_ids]
+        if a is None or None in defenders:
+            return None
+        n = len(self._ids)
+        win_prob = self._columns["win_prob"]
+        return [win_prob[a * n + d] for d in defenders]
+
+    def coverage(self, team_ids: list[int], opponent_ids: list[int] | None = None) -> float:
+        """Mean over opponents of the team's best 1v1 win probability against them.
+
+        Opponents default to every Pokemon in the table.
+        """
+        n = len(self._ids)
+        team = [self._index[pid] for pid in team_ids if pid in self._index]
+        if opponent_ids is None:
+            opponents = range(n)
+        else:
+            opponents = [self._index[pid] for pid in opponent_ids if pid in self._index]
+        if not team or not opponents:
+            return 0.0
+        win_prob = self._columns["win_prob"]
+        return sum(max(win_prob[a * n + d] for a in team) for d in opponents) / len(opponents)
+
+
+_open_tables: dict[Path, tuple[tuple[int, int], MatchupTable]] = {}
+
+
+def open_matchups(path: Path) -> MatchupTable | None:
+    """Shared MatchupTable for `path`, reopened after a rebuild; None if not built."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _open_tables.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    table = MatchupTable(path)
+    _open_tables[path] = (key, table)
+    # The replaced table may still be in use by another request; its
+    # mapping is released when the object is garbage-collected.
+    return table
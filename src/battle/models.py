@@ -1,4 +1,6 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+from src.battle.type_chart import combo_index, type_index
 
 
 @dataclass(frozen=True)
@@ -12,6 +14,8 @@ class BattleConfig:
     team_max: int = 6
     turn_delay: float = 3.5
     switch_timeout: float = 30.0
+    # How long a disconnected player's seat is held for a resume.
+    reconnect_grace: float = 30.0
 
 
 @dataclass(frozen=True)
@@ -30,6 +34,18 @@ class BattlePokemonStats:
     type1_en: str
     type2_id: int | None
     type2_en: str | None
+    # Type-chart indices, resolved once so damage calculation never
+    # touches type-name strings.
+    type1_idx: int = field(init=False, repr=False, compare=False)
+    type2_idx: int = field(init=False, repr=False, compare=False)
+    combo_idx: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        type1_idx = type_index(self.type1_en)
+        type2_idx = type_index(self.type2_en)
+        object.__setattr__(self, "type1_idx", type1_idx)
+        object.__setattr__(self, "type2_idx", type2_idx)
+        object.__setattr__(self, "combo_idx", combo_index(type1_idx, type2_idx))
 
     @property
     def battle_hp(self) -> int:
@@ -0,0 +1,120 @@
+"""Compact battle records and deterministic replay.
+
+TurnBattleEngine draws every random number from its own seeded RNG, so
+a battle is fully described by the seed, both team lineups and the
+switch choices. A BattleRecord stores just that, packed into a few dozen
+bytes (text form: URL-safe base64):
+
+    version u8, seed u64, team sizes u8 u8, Pokemon ids u16...,
+    switch count u8, switch indices u8...
+
+replay_battle() feeds the record back into a fresh engine and returns
+the full TurnEvent stream. Stats are read from the current database, so
+a replay is exact as long as the teams' stats and BattleConfig have not
+changed since the battle.
+"""
+
+from __future__ import annotations
+
+import base64
+import sqlite3
+import struct
+from dataclasses import dataclass
+
+from src.battle.engine import TurnBattleEngine
+from src.battle.models import BattleConfig, BattlePokemonStats, TurnEvent
+from src.battle.state import create_team
+from src.db.queries import fetch_battle_stats
+
+RECORD_VERSION = 1
+
+_HEAD = struct.Struct("<BQBB")
+
+
+@dataclass(frozen=True)
+class BattleRecord:
+    seed: int
+    team1: tuple[int, ...]
+    team2: tuple[int, ...]
+    switches: tuple[int, ...] = ()
+
+    def to_bytes(self) -> bytes:
+        ids = self.team1 + self.team2
+        return (
+            _HEAD.pack(RECORD_VERSION, self.seed, len(self.team1), len(self.team2))
+            + struct.pack(f"<{len(ids)}H", *ids)
+            + struct.pack(f"<B{len(self.switches)}B", len(self.switches), *self.switches)
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BattleRecord":
+        try:
+            version, seed, n1, n2 = _HEAD.unpack_from(data, 0)
+            if version != RECORD_VERSION:
+                raise ValueError(f"Unsupported battle record version: {version}")
+            offset = _HEAD.size
+            ids = struct.unpack_from(f"<{n1 + n2}H", data, offset)
+            offset += 2 * (n1 + n2)
+            (n_switches,) = struct.unpack_from("<B", data, offset)
+            switches = struct.unpack_from(f"<{n_switches}B", data, offset + 1)
+        except struct.error:
+            raise ValueError("Truncated battle record") from None
+        return cls(seed=seed, team1=ids[:n1], team2=ids[n1:], switches=switches)
+
+    def to_text(self) -> str:
+        return base64.urlsafe_b64encode(self.to_bytes()).rstrip(b"=").decode("ascii")
+
+    @classmethod
+    def from_text(cls, text: str) -> "BattleRecord":
+        text = text.strip()
+        try:
+            data = base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+        except ValueError:
+            raise ValueError("Invalid battle record") from None
+        return cls.from_bytes(data)
+
+
+def record_battle(engine: TurnBattleEngine) -> BattleRecord:
+    return BattleRecord(
+        seed=engine.seed,
+        team1=tuple(p.stats.pokemon_id for p in engine.team1),
+        team2=tuple(p.stats.pokemon_id for p in engine.team2),
+        switches=tuple(engine.switch_log),
+    )
+
+
+def replay_battle(
+    record: BattleRecord,
+    stats1: list[BattlePokemonStats],
+    stats2: list[BattlePokemonStats],
+    config: BattleConfig | None = None,
+) -> tuple[TurnBattleEngine, list[TurnEvent]]:
+    """Re-run a recorded battle. Returns the finished engine and all events."""
+    engine = TurnBattleEngine(
+        create_team(stats1, 1), create_team(stats2, 2), config, seed=record.seed,
+    )
+    switches = iter(record.switches)
+    events: list[TurnEvent] = []
+
+    while not engine.finished:
+        events.extend(engine.execute_turn())
+        if engine.state != "waiting_switch":
+            continue
+        index = next(switches, None)
+        if index is None or engine.switch_pokemon(engine.waiting_switch_team, index) is None:
+            raise ValueError(f"Record does not match the battle at turn {engine.turn}")
+
+    return engine, events
+
+
+def load_and_replay(
+    conn: sqlite3.Connection,
+    record: BattleRecord,
+    config: BattleConfig | None = None,
+) -> tuple[TurnBattleEngine, list[TurnEvent]]:
+    """replay_battle() with team stats fetched from the database."""
+    stats1 = fetch_battle_stats(conn, list(record.team1))
+    stats2 = fetch_battle_stats(conn, list(record.team2))
+    if len(stats1) != len(record.team1) or len(stats2) != len(record.team2):
+        raise ValueError("Record refers to Pokemon missing from the database")
+    return replay_battle(record, stats1, stats2, config)
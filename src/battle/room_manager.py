@@ -1,13 +1,22 @@
 from __future__ import annotations
 
+from src.battle.room_store import InMemoryRoomDirectory
 from src.battle.rules import DEFAULT_RULES, RoomRules
 from src.battle.state import Room, Player
 
 
 class RoomManager:
-    def __init__(self) -> None:
+    """Rooms hosted by this worker.
+
+    Room codes and player membership go through `directory`, which
+    several workers may share (see src.battle.room_store); Room objects
+    stay in the memory of the worker that created them.
+    """
+
+    def __init__(self, directory=None, worker_id: str = "local") -> None:
+        self.directory = directory or InMemoryRoomDirectory()
+        self.worker_id = worker_id
         self._rooms: dict[str, Room] = {}
-        self._sid_to_room: dict[str, str] = {}
         self._sid_to_nickname: dict[str, str] = {}
 
     def set_nickname(self, sid: str, nickname: str) -> None:
@@ -24,21 +33,21 @@ class RoomManager:
         nickname = self._sid_to_nickname.get(sid)
         if nickname is None:
             return None
-        if sid in self._sid_to_room:
+        if self.directory.room_of(sid) is not None:
             return None
 
         code = self._generate_unique_code()
         player = Player(sid=sid, nickname=nickname)
         room = Room(code=code, host=player, rules=rules)
         self._rooms[code] = room
-        self._sid_to_room[sid] = code
+        self.directory.add_member(sid, code)
         return room
 
     def join_room(self, sid: str, code: str) -> tuple[Room | None, str]:
         nickname = self._sid_to_nickname.get(sid)
         if nickname is None:
             return None, "请先设置昵称"
-        if sid in self._sid_to_room:
+        if self.directory.room_of(sid) is not None:
             return None, "你已经在一个房间中"
 
         room = self._rooms.get(code)
@@ -51,22 +60,20 @@ class RoomManager:
 
         player = Player(sid=sid, nickname=nickname)
         room.players.append(player)
-        self._sid_to_room[sid] = code
+        self.directory.add_member(sid, code)
         return room, ""
 
     def leave_room(self, sid: str) -> tuple[Room | None, bool]:
-        code = self._sid_to_room.pop(sid, None)
-        if code is None:
-            return None, False
-
-        room = self._rooms.get(code)
+        room = self._rooms.get(self.directory.room_of(sid) or "")
         if room is None:
             return None, False
+        self.directory.remove_member(sid)
 
         room.players = [p for p in room.players if p.sid != sid]
         empty = len(room.players) == 0
         if empty:
-            self._rooms.pop(code, None)
+            self._rooms.pop(room.code, None)
+            self.directory.release(room.code)
         else:
             for p in room.players:
                 p.ready = False
@@ -75,7 +82,7 @@ class RoomManager:
         return room, empty
 
     def get_room_by_sid(self, sid: str) -> Room | None:
-        code = self._sid_to_room.get(sid)
+        code = self.directory.room_of(sid)
         if code is None:
             return None
         return self._rooms.get(code)
@@ -83,13 +90,40 @@ class RoomManager:
     def get_room(self, code: str) -> Room | None:
         return self._rooms.get(code)
 
+    def owner_of(self, code: str) -> str | None:
+        """Worker hosting room `code`, if it is not this one."""
+        owner = self.directory.owner(code)
+        return owner if owner != self.worker_id else None
+
+    def owner_for_sid(self, sid: str) -> str | None:
+        """Worker hosting the room `sid` is in, if it is not this one."""
+        code = self.directory.room_of(sid)
+        return self.owner_of(code) if code is not None else None
+
+    def rebind(self, old_sid: str, new_sid: str) -> None:
+        """Move a reconnected player's membership and nickname to a new sid."""
+        self.move_member(old_sid, new_sid)
+        nickname = self._sid_to_nickname.pop(old_sid, None)
+        if nickname is not None:
+            self._sid_to_nickname[new_sid] = nickname
+
+    def move_member(self, old_sid: str, new_sid: str) -> None:
+        """Move only the room membership of old_sid to new_sid."""
+        code = self.directory.remove_member(old_sid)
+        if code is not None:
+            self.directory.add_member(new_sid, code)
+
+    def forget_nickname(self, sid: str) -> None:
+        self._sid_to_nickname.pop(sid, None)
+
     def remove_sid(self, sid: str) -> None:
         self._sid_to_nickname.pop(sid, None)
-        self._sid_to_room.pop(sid, None)
+        if self.directory.room_of(sid) in self._rooms:
+            self.directory.remove_member(sid)
 
     def _generate_unique_code(self) -> str:
         for _ in range(100):
             code = Room.generate_code()
-            if code not in self._rooms:
+            if self.directory.claim(code, self.worker_id):
                 return code
         raise RuntimeError("无法生成唯一房间号")
@@ -0,0 +1,183 @@
+"""Room directories: which worker owns a room, and which room a player is in.
+
+RoomManager keeps the Room objects (and the battles running in them)
+in the memory of the worker that created the room. The directory is the
+part that has to be shared when several worker processes serve rooms:
+room codes are claimed in it so they are unique across workers, and
+player membership (sid -> room code) is recorded in it so any worker
+can find the owner of a player's room and route the player's events
+there.
+
+InMemoryRoomDirectory is the single-process default. SQLiteRoomDirectory
+shares the directory between processes on one host through a SQLite
+file (data/rooms.db). Workers there record a heartbeat; sweep() frees
+the rooms of a worker that stopped beating, e.g. after a crash, so its
+codes and players do not stay routed to it.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+class InMemoryRoomDirectory:
+    def __init__(self) -> None:
+        self._owners: dict[str, str] = {}
+        self._members: dict[str, str] = {}
+
+    def claim(self, code: str, worker_id: str) -> bool:
+        """Register a new room code for worker_id; False if it is taken."""
+        if code in self._owners:
+            return False
+        self._owners[code] = worker_id
+        return True
+
+    def release(self, code: str) -> None:
+        self._owners.pop(code, None)
+        for sid in [sid for sid, c in self._members.items() if c == code]:
+            del self._members[sid]
+
+    def owner(self, code: str) -> str | None:
+        return self._owners.get(code)
+
+    def add_member(self, sid: str, code: str) -> None:
+        self._members[sid] = code
+
+    def remove_member(self, sid: str) -> str | None:
+        return self._members.pop(sid, None)
+
+    def room_of(self, sid: str) -> str | None:
+        return self._members.get(sid)
+
+    def release_worker(self, worker_id: str) -> None:
+        """Forget every room of a worker, e.g. when it restarts."""
+        for code in [c for c, owner in self._owners.items() if owner == worker_id]:
+            self.release(code)
+
+    def heartbeat(self, worker_id: str) -> None:
+        pass
+
+    def sweep(self, timeout: float) -> int:
+        """Release the rooms of dead workers; there are none in one process."""
+        return 0
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS room_owners (
+    code TEXT PRIMARY KEY,
+    worker_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_room_owners_worker ON room_owners(worker_id);
+CREATE TABLE IF NOT EXISTS room_members (
+    sid TEXT PRIMARY KEY,
+    code TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_room_members_code ON room_members(code);
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY,
+    seen REAL NOT NULL
+);
+"""
+
+
+class SQLiteRoomDirectory:
+    """Directory shared by every worker process that opens the same file."""
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._path = path
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def claim(self, code: str, worker_id: str) -> bool:
+        cursor = self._conn().execute(
+            "INSERT OR IGNORE INTO room_owners (code, worker_id) VALUES (?, ?)",
+            (code, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def release(self, code: str) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN")
+            conn.execute("DELETE FROM room_owners WHERE code = ?", (code,))
+            conn.execute("DELETE FROM room_members WHERE code = ?", (code,))
+
+    def owner(self, code: str) -> str | None:
+        row = self._conn().execute(
+            "SELECT worker_id FROM room_owners WHERE code = ?", (code,),
+        ).fetchone()
+        return row[0] if row else None
+
+    def add_member(self, sid: str, code: str) -> None:
+        self._conn().execute(
+            "INSERT OR REPLACE INTO room_members (sid, code) VALUES (?, ?)",
+            (sid, code),
+        )
+
+    def remove_member(self, sid: str) -> str | None:
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT code FROM room_members WHERE sid = ?", (sid,),
+            ).fetchone()
+            conn.execute("DELETE FROM room_members WHERE sid = ?", (sid,))
+        return row[0] if row else None
+
+    def room_of(self, sid: str) -> str | None:
+        row = self._conn().execute(
+            "SELECT code FROM room_members WHERE sid = ?", (sid,),
+        ).fetchone()
+        return row[0] if row else None
+
+    def release_worker(self, worker_id: str) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN")
+            conn.execute(
+                "DELETE FROM room_members WHERE code IN "
+                "(SELECT code FROM room_owners WHERE worker_id = ?)",
+                (worker_id,),
+            )
+            conn.execute("DELETE FROM room_owners WHERE worker_id = ?", (worker_id,))
+            conn.execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+
+    def heartbeat(self, worker_id: str) -> None:
+        """Mark worker_id alive; call it well within sweep()'s timeout."""
+        self._conn().execute(
+            "INSERT OR REPLACE INTO workers (worker_id, seen) VALUES (?, ?)",
+            (worker_id, time.time()),
+        )
+
+    def sweep(self, timeout: float) -> int:
+        """Release every room whose worker has not beaten for `timeout`
+        seconds (or never did); returns how many rooms were released."""
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "DELETE FROM workers WHERE seen < ?", (time.time() - timeout,),
+            )
+            conn.execute(
+                "DELETE FROM room_members WHERE code IN "
+                "(SELECT code FROM room_owners WHERE worker_id NOT IN "
+                "(SELECT worker_id FROM workers))"
+            )
+            cursor = conn.execute(
+                "DELETE FROM room_owners WHERE worker_id NOT IN "
+                "(SELECT worker_id FROM workers)"
+            )
+        return cursor.rowcount
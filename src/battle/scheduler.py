@@ -0,0 +1,94 @@
+"""One background task that fires every battle room's timers.
+
+Pending timers sit in a single heap ordered by deadline. The scheduler
+task wakes at least every `tick` seconds and runs whatever is due, so a
+timer fires at most about `tick` late however many rooms are running,
+and the number of threads/greenlets stays fixed. The task is started
+through the given `start_task` / `sleep` functions (e.g. the SocketIO
+server's), so it works under any Flask-SocketIO async mode.
+
+Callbacks run one after another on the scheduler task and must not
+block; a callback that raises is logged and does not stop the others.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class Timer:
+    __slots__ = ("deadline", "callback", "args", "cancelled")
+
+    def __init__(self, deadline: float, callback: Callable[..., Any], args: tuple) -> None:
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """Drop the timer if it has not fired yet."""
+        self.cancelled = True
+
+
+class TimerScheduler:
+    def __init__(
+        self,
+        start_task: Callable[..., Any],
+        sleep: Callable[[float], Any],
+        tick: float = 0.05,
+    ) -> None:
+        self._start_task = start_task
+        self._sleep = sleep
+        self._tick = tick
+        self._heap: list[tuple[float, int, Timer]] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._running = False
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def call_later(self, delay: float, callback: Callable[..., Any], *args: Any) -> Timer:
+        timer = Timer(time.monotonic() + max(0.0, delay), callback, args)
+        with self._lock:
+            heapq.heappush(self._heap, (timer.deadline, next(self._seq), timer))
+            start = not self._running
+            self._running = True
+        if start:
+            self._start_task(self._run)
+        return timer
+
+    def call_soon(self, callback: Callable[..., Any], *args: Any) -> Timer:
+        return self.call_later(0.0, callback, *args)
+
+    def _pop_due(self, now: float) -> list[Timer]:
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due.append(heapq.heappop(self._heap)[2])
+        return due
+
+    def _run(self) -> None:
+        while True:
+            for timer in self._pop_due(time.monotonic()):
+                if timer.cancelled:
+                    continue
+                try:
+                    timer.callback(*timer.args)
+                except Exception:
+                    logger.exception("Scheduled callback %r failed", timer.callback)
+
+            with self._lock:
+                next_deadline = self._heap[0][0] if self._heap else None
+            wait = self._tick
+            if next_deadline is not None:
+                wait = min(wait, max(0.0, next_deadline - time.monotonic()))
+            self._sleep(wait)
@@ -0,0 +1,278 @@
+"""Headless Monte Carlo battles between two fixed teams.
+
+Drives TurnBattleEngine directly: no sockets, no delays, and switches
+are decided by a switch policy instead of a player. Battles are split
+into fixed-size chunks that run on a process pool; each chunk derives
+its battles' engine seeds from (seed, chunk index), so a given seed
+reproduces the same results for any worker count.
+
+engine="batch" runs the same battles on the NumPy batch engine
+(src.battle.batch) instead: auto-switch only, a single process, and
+statistically equivalent results at a much higher throughput.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import random
+import secrets
+import time
+from array import array
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from src.battle.engine import TurnBattleEngine
+from src.battle.models import BattleConfig, BattlePokemonStats
+from src.battle.state import create_team
+from src.battle.type_chart import best_attack_slot
+
+SwitchPolicy = Callable[[TurnBattleEngine, int], int]
+
+ENGINES = ("turn", "batch")
+
+_CHUNK_SIZE = 1000
+_BATCH_CHUNK_SIZE = 100_000
+_Z_95 = 1.959964
+
+
+def switch_first(engine: TurnBattleEngine, team: int) -> int:
+    """Same choice as auto_switch: first alive team member."""
+    return engine.get_alive(team)[0].index
+
+
+def switch_random(engine: TurnBattleEngine, team: int) -> int:
+    return engine.rng.choice(engine.get_alive(team)).index
+
+
+def switch_best_matchup(engine: TurnBattleEngine, team: int) -> int:
+    """Best offensive multiplier against the opposing active Pokemon,
+    then least damage taken from it, then most HP left."""
+    opponent = engine.get_active(2 if team == 1 else 1).stats
+
+    def score(candidate) -> tuple[float, float, int]:
+        stats = candidate.stats
+        _slot, offense = best_attack_slot(stats.type1_idx, stats.type2_idx, opponent.combo_idx)
+        _slot, defense = best_attack_slot(opponent.type1_idx, opponent.type2_idx, stats.combo_idx)
+        return offense, -defense, candidate.current_hp
+
+    return max(engine.get_alive(team), key=score).index
+
+
+SWITCH_POLICIES: dict[str, SwitchPolicy] = {
+    "first": switch_first,
+    "random": switch_random,
+    "best": switch_best_matchup,
+}
+
+
+def _resolve_policy(policy: str | SwitchPolicy) -> SwitchPolicy:
+    if callable(policy):
+        return policy
+    try:
+        return SWITCH_POLICIES[policy]
+    except KeyError:
+        raise ValueError(f"Unknown switch policy: {policy}") from None
+
+
+def run_battle(
+    team1: list[BattlePokemonStats],
+    team2: list[BattlePokemonStats],
+    config: BattleConfig,
+    policy1: SwitchPolicy = switch_first,
+    policy2: SwitchPolicy = switch_first,
+    seed: int | None = None,
+) -> tuple[int, int, int, int]:
+    """Play one battle to the end. Returns (winner, turns, damage1, damage2),
+    where damageN is the total damage rolled by team N."""
+    engine = TurnBattleEngine(
+        create_team(team1, 1), create_team(team2, 2), config, seed=seed,
+    )
+    policies = (None, policy1, policy2)
+    dealt = [0, 0, 0]
+
+    while not engine.finished:
+        for event in engine.execute_turn():
+            dealt[event.attacker_team] += event.damage
+        if engine.state == "waiting_switch":
+            team = engine.waiting_switch_team
+            engine.switch_pokemon(team, policies[team](engine, team))
+
+    return engine.winner_team, engine.turn, dealt[1], dealt[2]
+
+
+def _simulate_chunk(
+    team1: list[BattlePokemonStats],
+    team2: list[BattlePokemonStats],
+    config: BattleConfig,
+    policy1: str | SwitchPolicy,
+    policy2: str | SwitchPolicy,
+    battles: int,
+    seed: str,
+) -> tuple[int, array, array, array]:
+    rng = random.Random(seed)
+    p1 = _resolve_policy(policy1)
+    p2 = _resolve_policy(policy2)
+    wins1 = 0
+    turns = array("I")
+    damage1 = array("I")
+    damage2 = array("I")
+    for _ in range(battles):
+        winner, n_turns, d1, d2 = run_battle(
+            team1, team2, config, p1, p2, seed=rng.getrandbits(64),
+        )
+        wins1 += winner == 1
+        turns.append(n_turns)
+        damage1.append(d1)
+        damage2.append(d2)
+    return wins1, turns, damage1, damage2
+
+
+def wilson_interval(successes: int, trials: int, z: float = _Z_95) -> tuple[float, float]:
+    """Wilson score interval for a binomial proportion."""
+    if trials == 0:
+        return 0.0, 1.0
+    p = successes / trials
+    denom = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denom
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denom
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def _simulate_batch(
+    team1: list[BattlePokemonStats],
+    team2: list[BattlePokemonStats],
+    config: BattleConfig,
+    battles: int,
+    seed: int,
+) -> tuple[int, array, array, array]:
+    from src.battle.batch import run_matchup
+
+    wins1 = 0
+    turns, damage1, damage2 = array("I"), array("I"), array("I")
+    for index, start in enumerate(range(0, battles, _BATCH_CHUNK_SIZE)):
+        size = min(_BATCH_CHUNK_SIZE, battles - start)
+        result = run_matchup(team1, team2, size, config=config, seed=[seed, index])
+        wins1 += int((result.winners == 1).sum())
+        turns.extend(result.turns.tolist())
+        damage1.extend(result.damage[:, 0].tolist())
+        damage2.extend(result.damage[:, 1].tolist())
+    return wins1, turns, damage1, damage2
+
+
+def _distribution(values: array) -> dict[str, float]:
+    ordered = sorted(values)
+    n = len(ordered)
+
+    def pct(q: float) -> float:
+        return float(ordered[min(n - 1, int(q * n))])
+
+    return {
+        "mean": sum(ordered) / n,
+        "min": float(ordered[0]),
+        "p5": pct(0.05),
+        "p50": pct(0.50),
+        "p95": pct(0.95),
+        "max": float(ordered[-1]),
+    }
+
+
+@dataclass(frozen=True)
+class SimulationResult:
+    battles: int
+    seed: int
+    wins1: int
+    wins2: int
+    win_rate1: float
+    win_rate1_ci: tuple[float, float]
+    turns: dict[str, float]
+    damage1: dict[str, float]
+    damage2: dict[str, float]
+    elapsed: float
+
+    def to_dict(self) -> dict:
+        return {
+            "battles": self.battles,
+            "seed": self.seed,
+            "wins1": self.wins1,
+            "wins2": self.wins2,
+            "win_rate1": self.win_rate1,
+            "win_rate1_ci95": list(self.win_rate1_ci),
+            "turns": self.turns,
+            "damage1": self.damage1,
+            "damage2": self.damage2,
+            "elapsed": self.elapsed,
+        }
+
+
+def simulate(
+    team1: list[BattlePokemonStats],
+    team2: list[BattlePokemonStats],
+    *,
+    battles: int = 1000,
+    config: BattleConfig | None = None,
+    policy1: str | SwitchPolicy = "first",
+    policy2: str | SwitchPolicy = "first",
+    workers: int | None = None,
+    seed: int | None = None,
+    engine: str = "turn",
+) -> SimulationResult:
+    """Run `battles` headless battles of team1 vs team2 and aggregate them.
+
+    Custom policies must be module-level functions so they can be sent
+    to worker processes. The batch engine only supports the "first"
+    policy (auto_switch).
+    """
+    if not team1 or not team2:
+        raise ValueError("Both teams need at least one Pokemon")
+    if battles < 1:
+        raise ValueError("battles must be positive")
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine}")
+    if engine == "batch" and (policy1, policy2) != ("first", "first"):
+        raise ValueError("The batch engine only supports the 'first' switch policy")
+    _resolve_policy(policy1)
+    _resolve_policy(policy2)
+
+    config = config or BattleConfig()
+    seed = secrets.randbits(32) if seed is None else seed
+    workers = workers or os.cpu_count() or 1
+
+    sizes = [_CHUNK_SIZE] * (battles // _CHUNK_SIZE)
+    if battles % _CHUNK_SIZE:
+        sizes.append(battles % _CHUNK_SIZE)
+    jobs = [
+        (team1, team2, config, policy1, policy2, size, f"{seed}:{index}")
+        for index, size in enumerate(sizes)
+    ]
+
+    started = time.perf_counter()
+    if engine == "batch":
+        chunks = [_simulate_batch(team1, team2, config, battles, seed)]
+    elif workers == 1 or len(jobs) == 1:
+        chunks = [_simulate_chunk(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            chunks = list(pool.map(_simulate_chunk, *zip(*jobs)))
+    elapsed = time.perf_counter() - started
+
+    wins1 = sum(chunk[0] for chunk in chunks)
+    turns, damage1, damage2 = array("I"), array("I"), array("I")
+    for _wins, chunk_turns, chunk_damage1, chunk_damage2 in chunks:
+        turns.extend(chunk_turns)
+        damage1.extend(chunk_damage1)
+        damage2.extend(chunk_damage2)
+
+    return SimulationResult(
+        battles=battles,
+        seed=seed,
+        wins1=wins1,
+        wins2=battles - wins1,
+        win_rate1=wins1 / battles,
+        win_rate1_ci=wilson_interval(wins1, battles),
+        turns=_distribution(turns),
+        damage1=_distribution(damage1),
+        damage2=_distribution(damage2),
+        elapsed=elapsed,
+    )
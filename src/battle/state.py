@@ -32,6 +32,16 @@ class BattlePokemon:
             "speed": self.stats.battle_speed,
         }
 
+    def to_brief(self) -> dict:
+        """Fields that stay fixed for the whole battle (HP starts full)."""
+        return {
+            "index": self.index,
+            "pokemon_id": self.stats.pokemon_id,
+            "name_zh": self.stats.name_zh,
+            "max_hp": self.max_hp,
+            "type1_en": self.stats.type1_en,
+        }
+
 
 class Player:
     def __init__(self, sid: str, nickname: str) -> None:
@@ -60,6 +70,9 @@ class Room:
         self.status = "waiting"
         self.turn = 0
         self.rules = rules
+        # Bumped for every room_update delta; see take_changes().
+        self.version = 0
+        self._published = self.to_dict()
 
     @property
     def is_full(self) -> bool:
@@ -87,6 +100,38 @@ class Room:
             "rules": self.rules.to_dict(),
         }
 
+    def snapshot(self) -> dict:
+        """Full state for a client joining or resyncing."""
+        return {"version": self.version, **self.to_dict()}
+
+    def take_changes(self) -> dict | None:
+        """Fields changed since the last call, as the next version's delta.
+
+        Changed player fields are keyed by player index under "players";
+        "player_count" is set when a player joined or left. Returns None
+        if nothing changed.
+        """
+        state = self.to_dict()
+        old, self._published = self._published, state
+        changes = {
+            k: v for k, v in state.items() if k != "players" and old[k] != v
+        }
+        players = {}
+        for i, player in enumerate(state["players"]):
+            prev = old["players"][i] if i < len(old["players"]) else {}
+            diff = {k: v for k, v in player.items() if prev.get(k) != v}
+            if diff:
+                players[str(i)] = diff
+        if players:
+            changes["players"] = players
+        if len(state["players"]) != len(old["players"]):
+            changes["player_count"] = len(state["players"])
+        if not changes:
+            return None
+        self.version += 1
+        changes["version"] = self.version
+        return changes
+
     @staticmethod
     def generate_code() -> str:
         chars = string.ascii_uppercase + string.digits
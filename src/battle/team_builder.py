@@ -0,0 +1,385 @@
+"""Team suggestions that satisfy a room's rules.
+
+Candidates are the Pokemon that pass the per-Pokemon rules (stat total
+cap, fully evolved only); the legendary cap is enforced on whole teams.
+Teams are scored against a seeded sample of legal opponents:
+
+    type score: share of opponents some member hits super-effectively,
+                averaged with the share some member resists;
+    win score:  mean 1v1 win probability of the members against the
+                opponents, read from the matchup table when it has been
+                built (build-matchups) and estimated from base stat
+                totals and type multipliers otherwise. Every member
+                fights in a battle, so each one counts, not just the
+                best one per opponent (which saturates near 1.0).
+
+The search is local search (swap one member for the best replacement
+until no swap helps) from random legal teams, restarted until the time
+budget runs out. Each worker process searches from its own seed. If
+time is left, the best teams are re-ranked by headless battles
+(src.battle.simulate) against random legal opponent teams.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import secrets
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.battle.matchups import open_matchups
+from src.battle.models import BattleConfig, BattlePokemonStats
+from src.battle.rules import RoomRules, validate_team
+from src.battle.simulate import run_battle
+from src.battle.type_chart import best_attack_slot
+from src.db.queries import battle_stats_from_row, fetch_rule_candidates
+
+TYPE_WEIGHT = 0.4
+WIN_WEIGHT = 0.6
+
+# Share of the budget spent on local search; the rest goes to re-ranking.
+_SEARCH_SHARE = 0.7
+_OPPONENT_TEAMS = 8
+# Stop searching early once this many restarts in a row found nothing new.
+_STALE_RESTARTS = 50
+
+
+@dataclass(frozen=True)
+class _Pool:
+    """Per-candidate scoring data, indexed like the candidate list.
+
+    offense[c] / resist[c] are bitmasks over the opponent sample;
+    strength[c] is candidate c's mean 1v1 win probability against the sample.
+    """
+
+    legendary: tuple[bool, ...]
+    offense: tuple[int, ...]
+    resist: tuple[int, ...]
+    strength: tuple[float, ...]
+    n_opponents: int
+
+
+def _build_pool(
+    stats: list[BattlePokemonStats],
+    legendary: list[bool],
+    totals: list[int],
+    opponents: list[int],
+    matchups_path: Path | None,
+) -> tuple[_Pool, str]:
+    table = open_matchups(matchups_path) if matchups_path is not None else None
+    opponent_ids = [stats[j].pokemon_id for j in opponents]
+    source = "matchups" if table is not None else "stats"
+
+    offense, resist, strength = [], [], []
+    for c, mine in enumerate(stats):
+        off_mask = res_mask = 0
+        estimate = []
+        for bit, j in enumerate(opponents):
+            theirs = stats[j]
+            _slot, dealt = best_attack_slot(mine.type1_idx, mine.type2_idx, theirs.combo_idx)
+            _slot, taken = best_attack_slot(theirs.type1_idx, theirs.type2_idx, mine.combo_idx)
+            if dealt >= 2:
+                off_mask |= 1 << bit
+            if taken < 1:
+                res_mask |= 1 << bit
+            power = totals[c] * dealt
+            estimate.append(power / (power + totals[j] * taken or 1))
+        row = table.win_row(mine.pokemon_id, opponent_ids) if table is not None else None
+        if row is None:
+            row = estimate
+            if table is not None:
+                source = "mixed"
+        offense.append(off_mask)
+        resist.append(res_mask)
+        strength.append(sum(row) / len(row))
+
+    pool = _Pool(
+        legendary=tuple(legendary),
+        offense=tuple(offense),
+        resist=tuple(resist),
+        strength=tuple(strength),
+        n_opponents=len(opponents),
+    )
+    return pool, source
+
+
+def _score_parts(pool: _Pool, team: list[int]) -> tuple[float, float]:
+    off = res = 0
+    for c in team:
+        off |= pool.offense[c]
+        res |= pool.resist[c]
+    m = pool.n_opponents
+    type_score = (off.bit_count() + res.bit_count()) / (2 * m)
+    win_score = sum(pool.strength[c] for c in team) / len(team)
+    return type_score, win_score
+
+
+def _score(pool: _Pool, team: list[int]) -> float:
+    type_score, win_score = _score_parts(pool, team)
+    return TYPE_WEIGHT * type_score + WIN_WEIGHT * win_score
+
+
+def _random_team(
+    rng: random.Random,
+    legendary: tuple[bool, ...] | list[bool],
+    candidates: list[int],
+    size: int,
+    max_legendary: int | None,
+) -> list[int]:
+    order = list(candidates)
+    rng.shuffle(order)
+    team: list[int] = []
+    legends = 0
+    for c in order:
+        if legendary[c]:
+            if max_legendary is not None and legends >= max_legendary:
+                continue
+            legends += 1
+        team.append(c)
+        if len(team) == size:
+            break
+    return team
+
+
+def _local_search(
+    pool: _Pool,
+    rng: random.Random,
+    size: int,
+    max_legendary: int | None,
+) -> tuple[float, list[int]]:
+    everyone = list(range(len(pool.strength)))
+    team = _random_team(rng, pool.legendary, everyone, size, max_legendary)
+    m = pool.n_opponents
+    best = _score(pool, team)
+
+    improved = True
+    while improved:
+        improved = False
+        slots = list(range(size))
+        rng.shuffle(slots)
+        for slot in slots:
+            rest = team[:slot] + team[slot + 1:]
+            off = res = 0
+            for c in rest:
+                off |= pool.offense[c]
+                res |= pool.resist[c]
+            rest_strength = sum(pool.strength[c] for c in rest)
+            legends = sum(pool.legendary[c] for c in rest)
+            members = set(team)
+
+            choice = team[slot]
+            for c in everyone:
+                if c in members:
+                    continue
+                if pool.legendary[c] and max_legendary is not None and legends >= max_legendary:
+                    continue
+                type_score = ((off | pool.offense[c]).bit_count()
+                              + (res | pool.resist[c]).bit_count()) / (2 * m)
+                win_score = (rest_strength + pool.strength[c]) / size
+                score = TYPE_WEIGHT * type_score + WIN_WEIGHT * win_score
+                if score > best + 1e-12:
+                    best, choice = score, c
+            if choice != team[slot]:
+                team[slot] = choice
+                improved = True
+
+    return best, team
+
+
+def _search_worker(
+    pool: _Pool,
+    size: int,
+    max_legendary: int | None,
+    seconds: float,
+    seed: str,
+    restarts: int | None,
+    keep: int,
+) -> tuple[int, list[tuple[float, tuple[int, ...]]]]:
+    """Restart local search until `seconds` pass or it stops finding new
+    teams (or exactly `restarts` times); returns (restarts done, top teams)."""
+    rng = random.Random(seed)
+    deadline = time.monotonic() + seconds
+    found: dict[frozenset[int], tuple[float, tuple[int, ...]]] = {}
+    done = stale = 0
+    while restarts is None or done < restarts:
+        score, team = _local_search(pool, rng, size, max_legendary)
+        done += 1
+        key = frozenset(team)
+        stale = stale + 1 if key in found else 0
+        found.setdefault(key, (score, tuple(team)))
+        if restarts is None and (time.monotonic() >= deadline or stale >= _STALE_RESTARTS):
+            break
+    return done, sorted(found.values(), reverse=True)[:keep]
+
+
+@dataclass(frozen=True)
+class TeamSuggestion:
+    pokemon_ids: tuple[int, ...]
+    score: float
+    type_score: float
+    win_score: float
+    win_rate: float | None = None   # from the re-ranking battles, if any ran
+    battles: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "pokemon_ids": list(self.pokemon_ids),
+            "score": self.score,
+            "type_score": self.type_score,
+            "win_score": self.win_score,
+            "win_rate": self.win_rate,
+            "battles": self.battles,
+        }
+
+
+@dataclass(frozen=True)
+class SuggestResult:
+    rules: RoomRules
+    teams: list[TeamSuggestion]
+    candidates: int
+    restarts: int
+    source: str     # win score from "matchups", "stats" or "mixed"
+    seed: int
+    elapsed: float
+
+    def to_dict(self) -> dict:
+        return {
+            "rules": self.rules.to_dict(),
+            "teams": [team.to_dict() for team in self.teams],
+            "candidates": self.candidates,
+            "restarts": self.restarts,
+            "source": self.source,
+            "seed": self.seed,
+            "elapsed": self.elapsed,
+        }
+
+
+def _rerank(
+    teams: list[tuple[int, ...]],
+    stats: list[BattlePokemonStats],
+    opponent_teams: list[list[int]],
+    config: BattleConfig,
+    rng: random.Random,
+    deadline: float,
+    max_battles: int,
+) -> list[tuple[int, int]]:
+    """Round-robin battles of every team against the opponent teams until
+    the deadline or max_battles each. Returns (wins, battles) per team."""
+    results = [[0, 0] for _ in teams]
+    lineups = [[stats[c] for c in team] for team in teams]
+    opposing = [[stats[c] for c in team] for team in opponent_teams]
+    for round_index in range(max_battles):
+        if time.monotonic() >= deadline:
+            break
+        opponent = opposing[round_index % len(opposing)]
+        seed = rng.getrandbits(64)
+        for lineup, result in zip(lineups, results):
+            winner, _turns, _d1, _d2 = run_battle(lineup, opponent, config, seed=seed)
+            result[0] += winner == 1
+            result[1] += 1
+    return [tuple(result) for result in results]
+
+
+def suggest_teams(
+    conn: sqlite3.Connection,
+    rules: RoomRules,
+    *,
+    size: int = 6,
+    count: int = 3,
+    budget: float = 2.0,
+    workers: int | None = 1,
+    seed: int | None = None,
+    opponents: int = 64,
+    restarts: int | None = None,
+    battles: int = 200,
+    matchups_path: Path | None = None,
+    config: BattleConfig | None = None,
+) -> SuggestResult:
+    """Search for the `count` best legal teams of `size` within `budget` seconds.
+
+    The result depends on the seed and on how many restarts fit in the
+    budget; pass `restarts` (per worker) to make it reproducible.
+    `workers=None` uses one process per CPU.
+    """
+    config = config or BattleConfig()
+    if not config.team_min <= size <= config.team_max:
+        raise ValueError(f"Team size must be between {config.team_min} and {config.team_max}")
+    started = time.monotonic()
+    deadline = started + budget
+    seed = secrets.randbits(32) if seed is None else seed
+    workers = workers or os.cpu_count() or 1
+
+    rows = fetch_rule_candidates(
+        conn,
+        max_stat_total=rules.max_stat_total,
+        fully_evolved_only=rules.fully_evolved_only,
+    )
+    stats = [battle_stats_from_row(row) for row in rows]
+    legendary = [bool(row["is_legendary"] or row["is_mythical"]) for row in rows]
+    regular = len(legendary) - sum(legendary)
+    allowed = sum(legendary) if rules.max_legendary is None else min(sum(legendary), rules.max_legendary)
+    if regular + allowed < size:
+        raise ValueError(f"Only {regular + allowed} Pokemon can be used together under these rules")
+
+    rng = random.Random(seed)
+    everyone = list(range(len(stats)))
+    sample = sorted(rng.sample(everyone, min(opponents, len(stats))))
+    pool, source = _build_pool(
+        stats, legendary, [row["total"] for row in rows], sample, matchups_path,
+    )
+
+    search_seconds = max(0.0, (deadline - time.monotonic()) * _SEARCH_SHARE)
+    jobs = [
+        (pool, size, rules.max_legendary, search_seconds, f"{seed}:{index}", restarts, count)
+        for index in range(workers)
+    ]
+    if workers == 1:
+        outcomes = [_search_worker(*jobs[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            outcomes = list(executor.map(_search_worker, *zip(*jobs)))
+
+    found: dict[frozenset[int], tuple[float, tuple[int, ...]]] = {}
+    for _done, teams in outcomes:
+        for score, team in teams:
+            found.setdefault(frozenset(team), (score, team))
+    ranked = [team for _score_value, team in sorted(found.values(), reverse=True)[:count]]
+
+    opponent_teams = [
+        _random_team(rng, legendary, sample, size, rules.max_legendary)
+        for _ in range(_OPPONENT_TEAMS)
+    ]
+    records = _rerank(ranked, stats, opponent_teams, config, rng, deadline, battles)
+
+    suggestions = []
+    for team, (wins, played) in zip(ranked, records):
+        # Lead with the strongest single member; auto-switch then goes in score order.
+        lineup = sorted(team, key=lambda c: -_score(pool, [c]))
+        team_rows = [rows[c] for c in lineup]
+        if validate_team(rules, [dict(row) for row in team_rows]):
+            continue
+        type_score, win_score = _score_parts(pool, lineup)
+        suggestions.append(TeamSuggestion(
+            pokemon_ids=tuple(row["id"] for row in team_rows),
+            score=TYPE_WEIGHT * type_score + WIN_WEIGHT * win_score,
+            type_score=type_score,
+            win_score=win_score,
+            win_rate=wins / played if played else None,
+            battles=played,
+        ))
+    if any(s.battles for s in suggestions):
+        suggestions.sort(key=lambda s: (-(s.win_rate or 0.0), -s.score))
+
+    return SuggestResult(
+        rules=rules,
+        teams=suggestions,
+        candidates=len(stats),
+        restarts=sum(done for done, _teams in outcomes),
+        source=source,
+        seed=seed,
+        elapsed=time.monotonic() - started,
+    )
@@ -31,20 +31,65 @@ _CHART: list[list[float]] = [
 ]
 
 
-def get_type_effectiveness(attacker_type: str, defender_type1: str, defender_type2: str | None) -> float:
-    atk_idx = TYPE_INDEX.get(attacker_type.lower())
-    def1_idx = TYPE_INDEX.get(defender_type1.lower())
-    if atk_idx is None or def1_idx is None:
-        return 1.0
+# Unknown / missing types resolve to NO_TYPE, which is neutral (1.0).
+NO_TYPE = len(TYPE_NAMES)
+
+
+def type_index(name: str | None) -> int:
+    if not name:
+        return NO_TYPE
+    return TYPE_INDEX.get(name.lower(), NO_TYPE)
+
+
+# Defender type combinations: 18 single types + 153 unordered pairs = 171,
+# plus one neutral column for an unknown primary type.
+_COMBO_INDEX: list[list[int]] = [[0] * (NO_TYPE + 1) for _ in range(NO_TYPE + 1)]
+_COMBOS: list[tuple[int, int]] = []
+for _t1 in range(NO_TYPE):
+    for _t2 in range(_t1, NO_TYPE):
+        _COMBO_INDEX[_t1][_t2] = _COMBO_INDEX[_t2][_t1] = len(_COMBOS)
+        _COMBOS.append((_t1, _t2))
+N_COMBOS = len(_COMBOS)
+NEUTRAL_COMBO = N_COMBOS
+for _t in range(NO_TYPE):
+    # A missing secondary type means single-typed.
+    _COMBO_INDEX[_t][NO_TYPE] = _COMBO_INDEX[_t][_t]
+    _COMBO_INDEX[NO_TYPE][_t] = NEUTRAL_COMBO
+_COMBO_INDEX[NO_TYPE][NO_TYPE] = NEUTRAL_COMBO
+
+
+def combo_index(type1_idx: int, type2_idx: int = NO_TYPE) -> int:
+    return _COMBO_INDEX[type1_idx][type2_idx]
 
-    mult = _CHART[atk_idx][def1_idx]
 
-    if defender_type2:
-        def2_idx = TYPE_INDEX.get(defender_type2.lower())
-        if def2_idx is not None:
-            mult *= _CHART[atk_idx][def2_idx]
+# DUAL_CHART[attacker_idx][combo_idx], precomputed once: 19 x 172.
+DUAL_CHART: list[list[float]] = [
+    [
+        _CHART[atk][t1] * (_CHART[atk][t2] if t2 != t1 else 1.0)
+        for t1, t2 in _COMBOS
+    ] + [1.0]
+    for atk in range(NO_TYPE)
+] + [[1.0] * (N_COMBOS + 1)]
 
-    return mult
+
+def best_attack_slot(
+    attacker_type1_idx: int,
+    attacker_type2_idx: int,
+    defender_combo_idx: int,
+) -> tuple[int, float]:
+    """Pick the attacker's better type: (0 for type1 / 1 for type2, multiplier)."""
+    eff1 = DUAL_CHART[attacker_type1_idx][defender_combo_idx]
+    if attacker_type2_idx == NO_TYPE:
+        return 0, eff1
+    eff2 = DUAL_CHART[attacker_type2_idx][defender_combo_idx]
+    if eff2 > eff1:
+        return 1, eff2
+    return 0, eff1
+
+
+def get_type_effectiveness(attacker_type: str, defender_type1: str, defender_type2: str | None) -> float:
+    combo = combo_index(type_index(defender_type1), type_index(defender_type2))
+    return DUAL_CHART[type_index(attacker_type)][combo]
 
 
 def best_attack_type(
@@ -53,11 +98,9 @@ def best_attack_type(
     defender_type1: str,
     defender_type2: str | None,
 ) -> tuple[str, float]:
-    eff1 = get_type_effectiveness(attacker_type1, defender_type1, defender_type2)
-    if attacker_type2 is None:
-        return attacker_type1, eff1
-
-    eff2 = get_type_effectiveness(attacker_type2, defender_type1, defender_type2)
-    if eff2 > eff1:
-        return attacker_type2, eff2
-    return attacker_type1, eff1
+    slot, mult = best_attack_slot(
+        type_index(attacker_type1),
+        type_index(attacker_type2) if attacker_type2 is not None else NO_TYPE,
+        combo_index(type_index(defender_type1), type_index(defender_type2)),
+    )
+    return (attacker_type2 if slot else attacker_type1), mult
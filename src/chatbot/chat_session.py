@@ -1,12 +1,14 @@
 from src.config import Config
-from src.db.connection import create_connection
+from src.db.connection import create_read_connection, prepare_database
 from src.chatbot.query_parser import parse_query
 from src.chatbot.query_handler import handle_query
 from src.chatbot.response_formatter import format_response
 
 
 def run_chat() -> None:
-    conn = create_connection(Config().db_path)
+    db_path = Config().db_path
+    prepare_database(db_path)
+    conn = create_read_connection(db_path)
     print("宝可梦问答机器人 — 输入问题，输入「退出」结束")
     try:
         while True:
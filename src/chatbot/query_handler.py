@@ -1,6 +1,9 @@
 import sqlite3
 
+from src.battle.matchups import open_matchups
+from src.config import Config
 from src.db.queries import (
+    fetch_battle_stats,
     fetch_pokemon_detail,
     fetch_top_by_stat,
     filter_pokemon,
@@ -63,6 +66,28 @@ def _handle_filter_ability(parsed: ParsedQuery, conn: sqlite3.Connection) -> dic
     return {"type": "ability", "rows": rows, "ability_name": parsed.ability_name}
 
 
+def _handle_counters(parsed: ParsedQuery, conn: sqlite3.Connection) -> dict:
+    row, _abilities = fetch_pokemon_detail(conn, parsed.pokemon_name)
+    if row is None:
+        results = search_pokemon(conn, parsed.pokemon_name)
+        return {"type": "search_results", "rows": results, "term": parsed.pokemon_name}
+
+    table = open_matchups(Config().matchups_path)
+    if table is None:
+        return {"type": "counters", "row": row, "counters": None}
+
+    counters = table.counters(row["id"], parsed.limit)
+    stats = {
+        s.pokemon_id: s
+        for s in fetch_battle_stats(conn, [c["attacker_id"] for c in counters])
+    }
+    for record in counters:
+        attacker = stats.get(record["attacker_id"])
+        record["name_zh"] = attacker.name_zh if attacker else ""
+        record["name_en"] = attacker.name_en if attacker else ""
+    return {"type": "counters", "row": row, "counters": counters}
+
+
 def _handle_unknown(_parsed: ParsedQuery, _conn: sqlite3.Connection) -> dict:
     return {"type": "unknown"}
 
@@ -72,5 +97,6 @@ _HANDLERS = {
     QueryType.TOP_BY_STAT: _handle_top_by_stat,
     QueryType.FILTER_TYPE: _handle_filter_type,
     QueryType.FILTER_ABILITY: _handle_filter_ability,
+    QueryType.COUNTERS: _handle_counters,
     QueryType.UNKNOWN: _handle_unknown,
 }
@@ -5,6 +5,7 @@ from src.chatbot.rules import (
     EXIT_WORDS,
     GEN_KEYWORDS,
     INTENT_ABILITY_KEYWORDS,
+    INTENT_COUNTER_KEYWORDS,
     INTENT_FILTER_KEYWORDS,
     INTENT_INFO_KEYWORDS,
     STAT_KEYWORDS,
@@ -23,6 +24,13 @@ def parse_query(text: str, conn: sqlite3.Connection) -> ParsedQuery | None:
     if lower in EXIT_WORDS:
         return None
 
+    counter_target = _extract_counter_target(text, conn)
+    if counter_target:
+        return ParsedQuery(
+            query_type=QueryType.COUNTERS,
+            pokemon_name=counter_target,
+        )
+
     stat = _extract_stat(text)
     type_name = _extract_type(text)
     generation = _extract_gen(text)
@@ -119,6 +127,18 @@ def _extract_ability(text: str) -> str:
     return ""
 
 
+def _extract_counter_target(text: str, conn: sqlite3.Connection) -> str:
+    lower = text.lower()
+    if not any(keyword in lower for keyword in INTENT_COUNTER_KEYWORDS):
+        return ""
+    cleaned = lower
+    for keyword in INTENT_COUNTER_KEYWORDS:
+        cleaned = cleaned.replace(keyword, "")
+    for filler in ("谁", "能", "可以", "哪些", "宝可梦", "用", "?", "？", "what", "who"):
+        cleaned = cleaned.replace(filler, "")
+    return _extract_pokemon_name(cleaned, conn)
+
+
 def _detect_intent(text: str) -> QueryType:
     for keyword in INTENT_INFO_KEYWORDS:
         if keyword in text:
@@ -36,7 +36,8 @@ HELP_TEXT = (
     '  - 查询宝可梦：「皮卡丘」\n'
     '  - 排行：「最强的水系」\n'
     '  - 筛选：「第一世代火系」\n'
-    '  - 特性：「特性 威吓」'
+    '  - 特性：「特性 威吓」\n'
+    '  - 克制：「什么克制皮卡丘」'
 )
 
 
@@ -121,6 +122,26 @@ def _format_ability(result: dict) -> str:
     return header + format_pokemon_table(rows)
 
 
+def _format_counters(result: dict) -> str:
+    row = result["row"]
+    name = row["name_zh_hans"] or row["name_en"]
+    counters = result["counters"]
+
+    if counters is None:
+        return "  对战数据尚未生成，请先运行 pokemon-scraper build-matchups"
+    if not counters:
+        return f"  没有找到{name}的克星"
+
+    lines = [f"  单挑胜率最高的{name}克星：\n"]
+    for i, record in enumerate(counters, 1):
+        counter_name = record["name_zh"] or record["name_en"]
+        lines.append(
+            f"  {i}. {counter_name} ({record['name_en']}) — "
+            f"胜率 {record['win_prob']:.0%}，约 {record['hits_to_ko']} 次攻击击倒"
+        )
+    return lines[0] + "\n".join(lines[1:])
+
+
 def _format_unknown(_result: dict) -> str:
     return HELP_TEXT
 
@@ -131,5 +152,6 @@ _FORMATTERS = {
     "ranking": _format_ranking,
     "filter": _format_filter,
     "ability": _format_ability,
+    "counters": _format_counters,
     "unknown": _format_unknown,
 }
@@ -7,6 +7,7 @@ class QueryType(Enum):
     TOP_BY_STAT = "top_by_stat"
     FILTER_TYPE = "filter_type"
     FILTER_ABILITY = "filter_ability"
+    COUNTERS = "counters"
     UNKNOWN = "unknown"
 
 
@@ -117,3 +118,7 @@ INTENT_FILTER_KEYWORDS = frozenset({
 INTENT_ABILITY_KEYWORDS = frozenset({
     "特性", "ability", "拥有", "会什么技能",
 })
+
+INTENT_COUNTER_KEYWORDS = frozenset({
+    "克制", "克星", "打得过", "怎么打", "counter", "beats",
+})
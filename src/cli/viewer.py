@@ -2,7 +2,7 @@ import argparse
 import math
 
 from src.config import Config
-from src.db.connection import create_connection
+from src.db.connection import create_read_connection, prepare_database
 from src.db.queries import (
     fetch_pokemon_detail,
     fetch_pokemon_page,
@@ -10,21 +10,28 @@ from src.db.queries import (
     get_total_count,
     search_pokemon,
 )
+from src.db.snapshot import Snapshot, snapshot_is_fresh
 from src.cli.display import format_pokemon_detail, format_pokemon_table
 
 
 def _open_conn():
-    return create_connection(Config().db_path)
+    db_path = Config().db_path
+    prepare_database(db_path)
+    return create_read_connection(db_path)
 
 
-def _show_detail(conn, id_or_name: str) -> None:
-    row, abilities = fetch_pokemon_detail(conn, id_or_name)
+def _print_detail(row, abilities, id_or_name: str) -> None:
     if row is None:
         print(f"  未找到宝可梦: {id_or_name}")
         return
     print(format_pokemon_detail(row, abilities))
 
 
+def _show_detail(conn, id_or_name: str) -> None:
+    row, abilities = fetch_pokemon_detail(conn, id_or_name)
+    _print_detail(row, abilities, id_or_name)
+
+
 def cmd_browse(args: argparse.Namespace) -> None:
     page_size = args.page_size
     conn = _open_conn()
@@ -75,6 +82,13 @@ def cmd_search(args: argparse.Namespace) -> None:
 
 
 def cmd_info(args: argparse.Namespace) -> None:
+    config = Config()
+    if snapshot_is_fresh(config.snapshot_path, config.db_path):
+        with Snapshot(config.snapshot_path) as snapshot:
+            row, abilities = snapshot.fetch_detail(args.id_or_name)
+            _print_detail(row, abilities, args.id_or_name)
+        return
+
     conn = _open_conn()
     try:
         _show_detail(conn, args.id_or_name)
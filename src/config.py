@@ -17,8 +17,12 @@ class Config:
     )
     data_dir: Path = field(default_factory=lambda: _PROJECT_ROOT / "data")
     db_path: Path = field(default_factory=lambda: _PROJECT_ROOT / "data" / "pokemon.db")
+    snapshot_path: Path = field(default_factory=lambda: _PROJECT_ROOT / "data" / "pokemon.snap")
+    matchups_path: Path = field(default_factory=lambda: _PROJECT_ROOT / "data" / "matchups.bin")
+    rooms_db_path: Path = field(default_factory=lambda: _PROJECT_ROOT / "data" / "rooms.db")
     artwork_dir: Path = field(default_factory=lambda: _PROJECT_ROOT / "data" / "images" / "artwork")
     sprite_dir: Path = field(default_factory=lambda: _PROJECT_ROOT / "data" / "images" / "sprites")
+    images_dir: Path = field(default_factory=lambda: _PROJECT_ROOT / "data" / "images")
     requests_per_second: float = 2.0
     max_retries: int = 3
     retry_base_delay: float = 1.0
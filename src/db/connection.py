@@ -1,19 +1,99 @@
 import sqlite3
 from pathlib import Path
 
+from .profiling import profiled_connect, profiling_enabled
 from .schema import init_database
 
+# Write profile: keep the -wal file bounded during long scrapes.
+_WAL_AUTOCHECKPOINT_PAGES = 1000
+_JOURNAL_SIZE_LIMIT = 64 * 1024 * 1024
+
+# Read profile: serve from the page cache and mmap instead of read() calls.
+_READ_CACHE_SIZE_KIB = 64 * 1024
+_READ_MMAP_SIZE = 256 * 1024 * 1024
+
+
+def _connect(database: str, **kwargs: object) -> sqlite3.Connection:
+    if profiling_enabled():
+        return profiled_connect(database, **kwargs)
+    return sqlite3.connect(database, **kwargs)
+
 
 def create_connection(db_path: Path) -> sqlite3.Connection:
     db_path.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(str(db_path))
+    conn = _connect(str(db_path))
     conn.execute("PRAGMA journal_mode=WAL")
     conn.execute("PRAGMA foreign_keys=ON")
+    conn.execute(f"PRAGMA wal_autocheckpoint={_WAL_AUTOCHECKPOINT_PAGES}")
+    conn.execute(f"PRAGMA journal_size_limit={_JOURNAL_SIZE_LIMIT}")
     conn.row_factory = sqlite3.Row
     init_database(conn)
     return conn
 
 
+def create_read_connection(db_path: Path) -> sqlite3.Connection:
+    """Open a read-only connection tuned for serving.
+
+    The schema is not initialized here; run prepare_database() once
+    (e.g. at startup) before handing out read connections.
+    """
+    conn = _connect(f"{db_path.resolve().as_uri()}?mode=ro", uri=True)
+    conn.execute("PRAGMA query_only=ON")
+    conn.execute(f"PRAGMA cache_size=-{_READ_CACHE_SIZE_KIB}")
+    conn.execute(f"PRAGMA mmap_size={_READ_MMAP_SIZE}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def prepare_database(db_path: Path) -> None:
+    """Bring schema and derived tables up to date so read connections work."""
+    conn = create_connection(db_path)
+    try:
+        ensure_pokemon_full(conn)
+        ensure_evolution_closure(conn)
+    finally:
+        conn.close()
+
+
+def checkpoint_wal(conn: sqlite3.Connection, mode: str = "PASSIVE") -> None:
+    """Checkpoint the WAL; TRUNCATE also shrinks the -wal file to zero."""
+    if mode not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+        raise ValueError(f"Invalid checkpoint mode: {mode}")
+    conn.execute(f"PRAGMA wal_checkpoint({mode})")
+
+
+def ensure_pokemon_full(conn: sqlite3.Connection) -> None:
+    """Materialize pokemon_full for databases scraped before it existed."""
+    has_source = conn.execute("SELECT 1 FROM pokemon LIMIT 1").fetchone()
+    if has_source is None:
+        return
+
+    has_full = conn.execute("SELECT 1 FROM pokemon_full LIMIT 1").fetchone()
+    if has_full is not None:
+        return
+
+    from src.db.repository import rebuild_pokemon_full
+    count = rebuild_pokemon_full(conn)
+    print(f"Materialized pokemon_full: {count} rows.")
+
+
+def ensure_evolution_closure(conn: sqlite3.Connection) -> None:
+    """Build evolution_closure for databases backfilled before it existed."""
+    has_source = conn.execute("SELECT 1 FROM pokemon LIMIT 1").fetchone()
+    if has_source is None:
+        return
+
+    has_closure = conn.execute(
+        "SELECT 1 FROM evolution_closure LIMIT 1"
+    ).fetchone()
+    if has_closure is not None:
+        return
+
+    from src.db.repository import rebuild_evolution_closure
+    rebuild_evolution_closure(conn)
+
+
 def ensure_evolution_data(conn: sqlite3.Connection) -> None:
     """Auto-backfill evolution data if pokemon exist but fields are empty."""
     total = conn.execute("SELECT COUNT(*) as cnt FROM pokemon").fetchone()["cnt"]
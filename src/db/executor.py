@@ -0,0 +1,111 @@
+"""Dedicated thread pool that runs read queries on warm connections.
+
+Socket.IO handlers and background tasks submit work here instead of
+opening a connection and querying inline, so event handling never waits
+behind schema init or disk I/O.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, TypeVar
+
+from .connection import create_read_connection
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_SLOW_WAIT_SECONDS = 0.1
+
+
+class DBExecutor:
+    """Run `fn(conn, *args)` on a pool of threads, each owning one read connection."""
+
+    def __init__(self, db_path: Path, max_workers: int = 4) -> None:
+        self._db_path = db_path
+        self._local = threading.local()
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="db-executor",
+        )
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._max_pending = 0
+        self._completed = 0
+        self._failed = 0
+        self._total_wait = 0.0
+        self._total_run = 0.0
+        self._max_wait = 0.0
+        self._max_run = 0.0
+
+    def submit(self, fn: Callable[..., T], *args: Any) -> Future[T]:
+        """Queue `fn(conn, *args)` and return a future for its result."""
+        with self._lock:
+            self._pending += 1
+            self._max_pending = max(self._max_pending, self._pending)
+        return self._pool.submit(self._run, fn, time.perf_counter(), args)
+
+    def run(self, fn: Callable[..., T], *args: Any, timeout: float | None = None) -> T:
+        """Submit and block for the result."""
+        return self.submit(fn, *args).result(timeout=timeout)
+
+    async def run_async(self, fn: Callable[..., T], *args: Any) -> T:
+        """Submit and await the result from an asyncio event loop."""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def stats(self) -> dict[str, float | int]:
+        with self._lock:
+            done = self._completed + self._failed
+            return {
+                "pending": self._pending,
+                "max_pending": self._max_pending,
+                "completed": self._completed,
+                "failed": self._failed,
+                "avg_wait_ms": self._total_wait / done * 1000 if done else 0.0,
+                "avg_run_ms": self._total_run / done * 1000 if done else 0.0,
+                "max_wait_ms": self._max_wait * 1000,
+                "max_run_ms": self._max_run * 1000,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = create_read_connection(self._db_path)
+            self._local.conn = conn
+        return conn
+
+    def _run(self, fn: Callable[..., T], enqueued: float, args: tuple) -> T:
+        started = time.perf_counter()
+        wait = started - enqueued
+        if wait > _SLOW_WAIT_SECONDS:
+            logger.warning(
+                "DB executor queue wait %.1f ms for %s",
+                wait * 1000, getattr(fn, "__name__", fn),
+            )
+        ok = False
+        try:
+            result = fn(self._connection(), *args)
+            ok = True
+            return result
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._pending -= 1
+                if ok:
+                    self._completed += 1
+                else:
+                    self._failed += 1
+                self._total_wait += wait
+                self._total_run += elapsed
+                self._max_wait = max(self._max_wait, wait)
+                self._max_run = max(self._max_run, elapsed)
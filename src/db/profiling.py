@@ -0,0 +1,279 @@
+"""Opt-in SQL tracing, slow-query log and EXPLAIN QUERY PLAN capture.
+
+Enabled by setting POKEMON_DB_PROFILE=1. Connections opened through
+src.db.connection are then created as ProfiledConnection: a trace
+callback counts every statement SQLite runs, timing wrappers measure
+execute + fetch time, and the first execution of each SELECT template
+captures its query plan. Statistics are grouped by statement template
+(literals and IN-lists collapsed) and merged into data/db_profile.json
+at exit, where `pokemon-scraper db-profile` reads them.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ENV = "POKEMON_DB_PROFILE"
+SLOW_MS_ENV = "POKEMON_DB_SLOW_MS"
+_DEFAULT_SLOW_MS = 50.0
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_SPACE_RE = re.compile(r"\s+")
+
+_SORT_KEYS = {
+    "total": lambda s: s["total_ms"],
+    "count": lambda s: s["count"],
+    "max": lambda s: s["max_ms"],
+    "avg": lambda s: s["total_ms"] / s["timed"] if s["timed"] else 0.0,
+}
+
+
+def profiling_enabled() -> bool:
+    return os.environ.get(PROFILE_ENV, "") not in ("", "0")
+
+
+def normalize_sql(sql: str) -> str:
+    """Reduce a statement to its template so executions can be grouped."""
+    text = _STRING_RE.sub("?", sql)
+    text = _NUMBER_RE.sub("?", text)
+    text = _IN_LIST_RE.sub("IN (?...)", text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+class QueryProfiler:
+    def __init__(self, slow_ms: float) -> None:
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict[str, Any]] = {}
+        self._local = threading.local()
+
+    def _entry(self, template: str) -> dict[str, Any]:
+        entry = self._stats.get(template)
+        if entry is None:
+            entry = {
+                "count": 0, "timed": 0, "total_ms": 0.0, "max_ms": 0.0,
+                "plan": None,
+            }
+            self._stats[template] = entry
+        return entry
+
+    def trace(self, expanded_sql: str) -> None:
+        """sqlite3 trace callback: count every statement actually run."""
+        if getattr(self._local, "explaining", False):
+            return
+        self._local.last_sql = expanded_sql
+        template = normalize_sql(expanded_sql)
+        with self._lock:
+            self._entry(template)["count"] += 1
+
+    def record(self, template: str, elapsed: float) -> None:
+        elapsed_ms = elapsed * 1000
+        with self._lock:
+            entry = self._entry(template)
+            entry["timed"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+        if elapsed_ms >= self.slow_ms:
+            logger.warning(
+                "Slow query (%.1f ms): %s",
+                elapsed_ms, getattr(self._local, "last_sql", template),
+            )
+
+    def add_fetch_time(self, template: str, elapsed: float) -> None:
+        with self._lock:
+            self._entry(template)["total_ms"] += elapsed * 1000
+
+    def needs_plan(self, template: str) -> bool:
+        with self._lock:
+            entry = self._stats.get(template)
+            return entry is None or entry["plan"] is None
+
+    def capture_plan(
+        self,
+        conn: sqlite3.Connection,
+        template: str,
+        sql: str,
+        parameters: Any,
+    ) -> None:
+        self._local.explaining = True
+        try:
+            rows = sqlite3.Cursor(conn).execute(
+                "EXPLAIN QUERY PLAN " + sql, parameters,
+            ).fetchall()
+        except sqlite3.Error as exc:
+            plan = [f"(plan unavailable: {exc})"]
+        else:
+            plan = [row[3] for row in rows]
+        finally:
+            self._local.explaining = False
+        with self._lock:
+            self._entry(template)["plan"] = plan
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            return {k: dict(v) for k, v in self._stats.items()}
+
+    def save(self, path: Path) -> None:
+        """Merge this process's statistics into the JSON file at `path`."""
+        current = self.snapshot()
+        if not current:
+            return
+        merged = load_profile(path)
+        for template, entry in current.items():
+            into = merged.get(template)
+            if into is None:
+                merged[template] = entry
+                continue
+            into["count"] += entry["count"]
+            into["timed"] += entry["timed"]
+            into["total_ms"] += entry["total_ms"]
+            into["max_ms"] = max(into["max_ms"], entry["max_ms"])
+            into["plan"] = into["plan"] or entry["plan"]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            json.dumps({"statements": merged}, ensure_ascii=False, indent=2),
+            encoding="utf-8",
+        )
+
+
+_profiler: QueryProfiler | None = None
+_profiler_lock = threading.Lock()
+
+
+def get_profiler() -> QueryProfiler:
+    global _profiler
+    with _profiler_lock:
+        if _profiler is None:
+            slow_ms = float(os.environ.get(SLOW_MS_ENV, _DEFAULT_SLOW_MS))
+            _profiler = QueryProfiler(slow_ms)
+            atexit.register(_save_at_exit)
+        return _profiler
+
+
+def _save_at_exit() -> None:
+    from src.config import Config
+
+    if _profiler is not None:
+        _profiler.save(profile_path(Config().data_dir))
+
+
+def profile_path(data_dir: Path) -> Path:
+    return data_dir / "db_profile.json"
+
+
+def load_profile(path: Path) -> dict[str, dict[str, Any]]:
+    if not path.exists():
+        return {}
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return data.get("statements", {})
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    _template: str | None = None
+
+    def execute(self, sql: str, parameters: Any = (), /) -> "ProfiledCursor":
+        profiler = get_profiler()
+        template = normalize_sql(sql)
+        self._template = template
+        if profiler.needs_plan(template) and _is_query(sql):
+            profiler.capture_plan(self.connection, template, sql, parameters)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            profiler.record(template, time.perf_counter() - start)
+
+    def executemany(self, sql: str, seq_of_parameters: Any, /) -> "ProfiledCursor":
+        profiler = get_profiler()
+        template = normalize_sql(sql)
+        self._template = template
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            profiler.record(template, time.perf_counter() - start)
+
+    def fetchone(self) -> Any:
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._add_fetch_time(time.perf_counter() - start)
+        return row
+
+    def fetchmany(self, size: int | None = None) -> list[Any]:
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._add_fetch_time(time.perf_counter() - start)
+        return rows
+
+    def fetchall(self) -> list[Any]:
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._add_fetch_time(time.perf_counter() - start)
+        return rows
+
+    def _add_fetch_time(self, elapsed: float) -> None:
+        if self._template is not None:
+            get_profiler().add_fetch_time(self._template, elapsed)
+
+
+class ProfiledConnection(sqlite3.Connection):
+    def cursor(self, factory: type = ProfiledCursor) -> sqlite3.Cursor:
+        return super().cursor(factory)
+
+    def execute(self, sql: str, parameters: Any = (), /) -> sqlite3.Cursor:
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Any, /) -> sqlite3.Cursor:
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def profiled_connect(database: str, **kwargs: Any) -> sqlite3.Connection:
+    conn = sqlite3.connect(database, factory=ProfiledConnection, **kwargs)
+    conn.set_trace_callback(get_profiler().trace)
+    return conn
+
+
+def _is_query(sql: str) -> bool:
+    head = sql.lstrip().split(None, 1)[:1]
+    return bool(head) and head[0].upper() in ("SELECT", "WITH")
+
+
+def format_profile_report(
+    stats: dict[str, dict[str, Any]],
+    *,
+    sort_by: str = "total",
+    limit: int = 20,
+    show_plans: bool = False,
+) -> str:
+    if not stats:
+        return "No profile data. Run with POKEMON_DB_PROFILE=1 first."
+
+    key = _SORT_KEYS.get(sort_by, _SORT_KEYS["total"])
+    ranked = sorted(stats.items(), key=lambda kv: key(kv[1]), reverse=True)
+
+    lines = [
+        f"{'total ms':>10} {'count':>8} {'avg ms':>8} {'max exec':>8}  statement",
+    ]
+    for template, s in ranked[:limit]:
+        avg = s["total_ms"] / s["timed"] if s["timed"] else 0.0
+        lines.append(
+            f"{s['total_ms']:>10.1f} {s['count']:>8} {avg:>8.2f} "
+            f"{s['max_ms']:>8.2f}  {template[:120]}"
+        )
+        if show_plans and s.get("plan"):
+            for step in s["plan"]:
+                lines.append(f"{'':>39}  -> {step}")
+    return "\n".join(lines)
@@ -1,49 +1,108 @@
+import json
 import sqlite3
+import time
 
-_BASE_QUERY = """
-SELECT p.id, p.name_en, p.name_zh_hans, p.name_zh_hant, p.name_ja,
+_COLUMNS = """
+       p.id, p.name_en, p.name_zh_hans, p.name_zh_hant, p.name_ja,
        p.genus_zh, p.height, p.weight, p.generation,
        p.artwork_path, p.sprite_path,
        p.is_legendary, p.is_mythical, p.is_fully_evolved, p.evolution_stage,
-       t1.id AS type1_id, t1.name_en AS type1_en,
-       t1.name_zh_hans AS type1_zh_hans, t1.name_zh_hant AS type1_zh_hant,
-       t2.id AS type2_id, t2.name_en AS type2_en,
-       t2.name_zh_hans AS type2_zh_hans, t2.name_zh_hant AS type2_zh_hant,
-       s.hp, s.attack, s.defense, s.sp_attack, s.sp_defense, s.speed, s.total
-FROM pokemon p
-JOIN types t1 ON p.type1_id = t1.id
-LEFT JOIN types t2 ON p.type2_id = t2.id
-JOIN pokemon_stats s ON p.id = s.pokemon_id
+       p.type1_id, p.type1_en, p.type1_zh_hans, p.type1_zh_hant,
+       p.type2_id, p.type2_en, p.type2_zh_hans, p.type2_zh_hant,
+       p.hp, p.attack, p.defense, p.sp_attack, p.sp_defense, p.speed, p.total
+"""
+
+_BASE_QUERY = f"""
+SELECT {_COLUMNS}
+FROM pokemon_full p
+"""
+
+_DETAIL_QUERY = """
+SELECT p.*
+FROM pokemon_full p
 """
 
 _VALID_SORT_COLUMNS = {
     "id": ("p.id", "ASC"),
-    "total": ("s.total", "DESC"),
-    "hp": ("s.hp", "DESC"),
-    "attack": ("s.attack", "DESC"),
-    "defense": ("s.defense", "DESC"),
-    "sp_attack": ("s.sp_attack", "DESC"),
-    "sp_defense": ("s.sp_defense", "DESC"),
-    "speed": ("s.speed", "DESC"),
+    "total": ("p.total", "DESC"),
+    "hp": ("p.hp", "DESC"),
+    "attack": ("p.attack", "DESC"),
+    "defense": ("p.defense", "DESC"),
+    "sp_attack": ("p.sp_attack", "DESC"),
+    "sp_defense": ("p.sp_defense", "DESC"),
+    "speed": ("p.speed", "DESC"),
 }
 
 _VALID_STATS = {"hp", "attack", "defense", "sp_attack", "sp_defense", "speed", "total"}
 
+_TOTAL_COUNT_TTL = 60.0
+_total_count_cache: dict[str, tuple[float, int]] = {}
+
 
 def get_total_count(conn: sqlite3.Connection) -> int:
-    row = conn.execute("SELECT COUNT(*) AS c FROM pokemon").fetchone()
+    row = conn.execute("SELECT COUNT(*) AS c FROM pokemon_full").fetchone()
     return row["c"]
 
 
+def get_total_count_cached(
+    conn: sqlite3.Connection,
+    cache_key: str,
+    ttl: float = _TOTAL_COUNT_TTL,
+) -> int:
+    """Return get_total_count(), reusing the value for `ttl` seconds per key."""
+    now = time.monotonic()
+    cached = _total_count_cache.get(cache_key)
+    if cached is not None and now - cached[0] < ttl:
+        return cached[1]
+    total = get_total_count(conn)
+    _total_count_cache[cache_key] = (now, total)
+    return total
+
+
 def fetch_pokemon_page(
     conn: sqlite3.Connection,
     offset: int = 0,
     limit: int = 20,
+    *,
+    after_id: int | None = None,
+    before_id: int | None = None,
 ) -> list[sqlite3.Row]:
+    """Fetch one page ordered by id.
+
+    `after_id` / `before_id` select keyset mode, which seeks on the primary
+    key instead of skipping `offset` rows; `offset` is ignored then.
+    """
+    if after_id is not None:
+        sql = _BASE_QUERY + "WHERE p.id > ? ORDER BY p.id LIMIT ?"
+        return conn.execute(sql, (after_id, limit)).fetchall()
+    if before_id is not None:
+        sql = _BASE_QUERY + "WHERE p.id < ? ORDER BY p.id DESC LIMIT ?"
+        rows = conn.execute(sql, (before_id, limit)).fetchall()
+        rows.reverse()
+        return rows
     sql = _BASE_QUERY + "ORDER BY p.id LIMIT ? OFFSET ?"
     return conn.execute(sql, (limit, offset)).fetchall()
 
 
+def make_cursor(row: sqlite3.Row, sort_by: str = "id") -> str:
+    """Encode the sort key of `row` as an opaque `value:id` cursor."""
+    col, _direction = _VALID_SORT_COLUMNS.get(sort_by, ("p.id", "ASC"))
+    return f"{row[col.split('.', 1)[1]]}:{row['id']}"
+
+
+def parse_cursor(cursor: str | None) -> tuple[int, int] | None:
+    """Decode a cursor produced by make_cursor(). Returns None on bad input."""
+    if not cursor:
+        return None
+    value, sep, last_id = cursor.partition(":")
+    if not sep:
+        return None
+    try:
+        return int(value), int(last_id)
+    except ValueError:
+        return None
+
+
 def search_pokemon(
     conn: sqlite3.Connection,
     term: str,
@@ -62,13 +121,13 @@ def search_pokemon(
 def fetch_pokemon_detail(
     conn: sqlite3.Connection,
     id_or_name: str,
-) -> tuple[sqlite3.Row | None, list[sqlite3.Row]]:
+) -> tuple[sqlite3.Row | None, list[dict]]:
     if id_or_name.isdigit():
-        sql = _BASE_QUERY + "WHERE p.id = ?"
+        sql = _DETAIL_QUERY + "WHERE p.id = ?"
         row = conn.execute(sql, (int(id_or_name),)).fetchone()
     else:
-        sql = _BASE_QUERY + """
-        WHERE LOWER(p.name_en) = LOWER(?)
+        sql = _DETAIL_QUERY + """
+        WHERE p.name_en = ? COLLATE NOCASE
            OR p.name_zh_hans = ?
            OR p.name_zh_hant = ?
         """
@@ -77,18 +136,7 @@ def fetch_pokemon_detail(
     if row is None:
         return None, []
 
-    abilities = conn.execute(
-        """
-        SELECT ability_id, name_en, name_zh_hans, name_zh_hant,
-               is_hidden, slot, flavor_text_zh
-        FROM pokemon_abilities
-        WHERE pokemon_id = ?
-        ORDER BY slot
-        """,
-        (row["id"],),
-    ).fetchall()
-
-    return row, abilities
+    return row, json.loads(row["abilities_json"])
 
 
 def filter_pokemon(
@@ -99,14 +147,20 @@ def filter_pokemon(
     min_total: int | None = None,
     sort_by: str = "id",
     limit: int = 20,
+    after: tuple[int, int] | None = None,
 ) -> list[sqlite3.Row]:
+    """Filter and sort Pokemon.
+
+    `after` is a parsed cursor (sort value, id) from the last row of the
+    previous page; ties on the sort column are broken by id.
+    """
     conditions = []
     params: list[object] = []
 
     if type_name is not None:
         conditions.append(
-            "(t1.name_en = ? OR t2.name_en = ? "
-            "OR t1.name_zh_hans = ? OR t2.name_zh_hans = ?)"
+            "(p.type1_en = ? OR p.type2_en = ? "
+            "OR p.type1_zh_hans = ? OR p.type2_zh_hans = ?)"
         )
         params.extend([type_name, type_name, type_name, type_name])
 
@@ -115,16 +169,29 @@ def filter_pokemon(
         params.append(gen)
 
     if min_total is not None:
-        conditions.append("s.total >= ?")
+        conditions.append("p.total >= ?")
         params.append(min_total)
 
+    col, direction = _VALID_SORT_COLUMNS.get(sort_by, ("p.id", "ASC"))
+    op = ">" if direction == "ASC" else "<"
+
+    if after is not None:
+        if col == "p.id":
+            conditions.append(f"p.id {op} ?")
+            params.append(after[1])
+        else:
+            conditions.append(f"({col}, p.id) {op} (?, ?)")
+            params.extend(after)
+
     where_clause = ""
     if conditions:
         where_clause = "WHERE " + " AND ".join(conditions)
 
-    col, direction = _VALID_SORT_COLUMNS.get(sort_by, ("p.id", "ASC"))
+    order_clause = f"{col} {direction}"
+    if col != "p.id":
+        order_clause += f", p.id {direction}"
 
-    sql = f"{_BASE_QUERY}{where_clause} ORDER BY {col} {direction} LIMIT ?"
+    sql = f"{_BASE_QUERY}{where_clause} ORDER BY {order_clause} LIMIT ?"
     params.append(limit)
 
     return conn.execute(sql, params).fetchall()
@@ -169,6 +236,28 @@ def fetch_all_types(conn: sqlite3.Connection) -> list[sqlite3.Row]:
     return conn.execute("SELECT * FROM types ORDER BY id").fetchall()
 
 
+def battle_stats_from_row(row: sqlite3.Row):
+    """BattlePokemonStats from a pokemon_full row (id, names, sprite, stats, types)."""
+    from src.battle.models import BattlePokemonStats
+
+    return BattlePokemonStats(
+        pokemon_id=row["id"],
+        name_zh=row["name_zh_hans"],
+        name_en=row["name_en"],
+        sprite_path=row["sprite_path"],
+        base_hp=row["hp"],
+        base_attack=row["attack"],
+        base_defense=row["defense"],
+        base_sp_attack=row["sp_attack"],
+        base_sp_defense=row["sp_defense"],
+        base_speed=row["speed"],
+        type1_id=row["type1_id"],
+        type1_en=row["type1_en"],
+        type2_id=row["type2_id"],
+        type2_en=row["type2_en"],
+    )
+
+
 def fetch_battle_stats(
     conn: sqlite3.Connection,
     pokemon_ids: list[int],
@@ -176,20 +265,14 @@ def fetch_battle_stats(
     if not pokemon_ids:
         return []
 
-    from src.battle.models import BattlePokemonStats
-
     placeholders = ",".join("?" for _ in pokemon_ids)
     rows = conn.execute(
         f"""
-        SELECT p.id, p.name_zh_hans, p.name_en, p.sprite_path,
-               s.hp, s.attack, s.defense, s.sp_attack, s.sp_defense, s.speed,
-               t1.id AS type1_id, t1.name_en AS type1_en,
-               t2.id AS type2_id, t2.name_en AS type2_en
-        FROM pokemon p
-        JOIN pokemon_stats s ON p.id = s.pokemon_id
-        JOIN types t1 ON p.type1_id = t1.id
-        LEFT JOIN types t2 ON p.type2_id = t2.id
-        WHERE p.id IN ({placeholders})
+        SELECT id, name_zh_hans, name_en, sprite_path,
+               hp, attack, defense, sp_attack, sp_defense, speed,
+               type1_id, type1_en, type2_id, type2_en
+        FROM pokemon_full
+        WHERE id IN ({placeholders})
         """,
         pokemon_ids,
     ).fetchall()
@@ -200,22 +283,7 @@ def fetch_battle_stats(
         row = id_to_row.get(pid)
         if row is None:
             continue
-        result.append(BattlePokemonStats(
-            pokemon_id=row["id"],
-            name_zh=row["name_zh_hans"],
-            name_en=row["name_en"],
-            sprite_path=row["sprite_path"],
-            base_hp=row["hp"],
-            base_attack=row["attack"],
-            base_defense=row["defense"],
-            base_sp_attack=row["sp_attack"],
-            base_sp_defense=row["sp_defense"],
-            base_speed=row["speed"],
-            type1_id=row["type1_id"],
-            type1_en=row["type1_en"],
-            type2_id=row["type2_id"],
-            type2_en=row["type2_en"],
-        ))
+        result.append(battle_stats_from_row(row))
     return result
 
 
@@ -230,10 +298,9 @@ def fetch_team_validation_data(
     placeholders = ",".join("?" for _ in pokemon_ids)
     rows = conn.execute(
         f"""
-        SELECT p.id, s.total, p.is_legendary, p.is_mythical, p.is_fully_evolved
-        FROM pokemon p
-        JOIN pokemon_stats s ON p.id = s.pokemon_id
-        WHERE p.id IN ({placeholders})
+        SELECT id, total, is_legendary, is_mythical, is_fully_evolved
+        FROM pokemon_full
+        WHERE id IN ({placeholders})
         """,
         pokemon_ids,
     ).fetchall()
@@ -241,23 +308,77 @@ def fetch_team_validation_data(
     return [dict(row) for row in rows]
 
 
+def fetch_pokemon_by_ids(
+    conn: sqlite3.Connection,
+    pokemon_ids: list[int],
+) -> list[sqlite3.Row]:
+    """List rows for the given IDs, in the given order; unknown IDs are skipped."""
+    if not pokemon_ids:
+        return []
+    placeholders = ",".join("?" for _ in pokemon_ids)
+    rows = conn.execute(
+        _BASE_QUERY + f" WHERE p.id IN ({placeholders})", pokemon_ids,
+    ).fetchall()
+    id_to_row = {row["id"]: row for row in rows}
+    return [id_to_row[pid] for pid in pokemon_ids if pid in id_to_row]
+
+
+def fetch_rule_candidates(
+    conn: sqlite3.Connection,
+    *,
+    max_stat_total: int | None = None,
+    fully_evolved_only: bool = False,
+) -> list[sqlite3.Row]:
+    """Pokemon that individually pass a room's stat-total and evolution rules."""
+    conditions = []
+    params: list[object] = []
+    if max_stat_total is not None:
+        conditions.append("p.total <= ?")
+        params.append(max_stat_total)
+    if fully_evolved_only:
+        conditions.append("p.is_fully_evolved = 1")
+
+    sql = _BASE_QUERY
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY p.id"
+    return conn.execute(sql, params).fetchall()
+
+
 def search_by_ability(
     conn: sqlite3.Connection,
     ability_name: str,
 ) -> list[sqlite3.Row]:
     pattern = f"%{ability_name}%"
-    ability_rows = conn.execute(
-        """
-        SELECT DISTINCT pokemon_id FROM pokemon_abilities
+    sql = _BASE_QUERY + """
+    WHERE p.id IN (
+        SELECT pokemon_id FROM pokemon_abilities
         WHERE name_zh_hans LIKE ? OR name_en LIKE ?
-        """,
-        (pattern, pattern),
-    ).fetchall()
+    )
+    ORDER BY p.id LIMIT 50
+    """
+    return conn.execute(sql, (pattern, pattern)).fetchall()
 
-    if not ability_rows:
-        return []
 
-    ids = [row["pokemon_id"] for row in ability_rows]
-    placeholders = ",".join("?" for _ in ids)
-    sql = f"{_BASE_QUERY}WHERE p.id IN ({placeholders}) ORDER BY p.id LIMIT 50"
-    return conn.execute(sql, ids).fetchall()
+def fetch_evolution_chain(
+    conn: sqlite3.Connection,
+    pokemon_id: int,
+) -> list[sqlite3.Row]:
+    """Whole evolution family of `pokemon_id`, root first, ordered by depth.
+
+    Each row carries `chain_depth` (0 = base form) and
+    `evolves_from_species_id` so callers can draw branches.
+    """
+    sql = f"""
+    SELECT {_COLUMNS}, p.evolves_from_species_id, c.depth AS chain_depth
+    FROM evolution_closure c
+    JOIN pokemon_full p ON p.id = c.descendant
+    WHERE c.ancestor = (
+        SELECT ancestor FROM evolution_closure
+        WHERE descendant = ?
+        ORDER BY depth DESC
+        LIMIT 1
+    )
+    ORDER BY c.depth, p.id
+    """
+    return conn.execute(sql, (pokemon_id,)).fetchall()
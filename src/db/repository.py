@@ -1,105 +1,260 @@
+import json
 import sqlite3
+from collections.abc import Iterable, Iterator
 
 from src.models import Pokemon, PokemonAbility, PokemonStats, PokemonType
 
 
-def upsert_type(conn: sqlite3.Connection, ptype: PokemonType) -> None:
-    conn.execute(
-        """
-        INSERT INTO types (id, name_en, name_zh_hans, name_zh_hant)
-        VALUES (?, ?, ?, ?)
-        ON CONFLICT(id) DO UPDATE SET
-            name_en=excluded.name_en,
-            name_zh_hans=excluded.name_zh_hans,
-            name_zh_hant=excluded.name_zh_hant
-        """,
-        (ptype.id, ptype.name_en, ptype.name_zh_hans, ptype.name_zh_hant),
-    )
-    conn.commit()
+_UPSERT_TYPE_SQL = """
+INSERT INTO types (id, name_en, name_zh_hans, name_zh_hant)
+VALUES (?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET
+    name_en=excluded.name_en,
+    name_zh_hans=excluded.name_zh_hans,
+    name_zh_hant=excluded.name_zh_hant
+"""
 
+_UPSERT_POKEMON_SQL = """
+INSERT INTO pokemon (
+    id, name_en, name_zh_hans, name_zh_hant, name_ja,
+    genus_zh, type1_id, type2_id, height, weight,
+    generation, artwork_path, sprite_path,
+    is_legendary, is_mythical, evolves_from_species_id, row_version
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET
+    name_en=excluded.name_en,
+    name_zh_hans=excluded.name_zh_hans,
+    name_zh_hant=excluded.name_zh_hant,
+    name_ja=excluded.name_ja,
+    genus_zh=excluded.genus_zh,
+    type1_id=excluded.type1_id,
+    type2_id=excluded.type2_id,
+    height=excluded.height,
+    weight=excluded.weight,
+    generation=excluded.generation,
+    artwork_path=excluded.artwork_path,
+    sprite_path=excluded.sprite_path,
+    is_legendary=excluded.is_legendary,
+    is_mythical=excluded.is_mythical,
+    evolves_from_species_id=excluded.evolves_from_species_id,
+    row_version=excluded.row_version
+"""
 
-def upsert_pokemon(conn: sqlite3.Connection, pokemon: Pokemon) -> None:
+_UPSERT_STATS_SQL = """
+INSERT INTO pokemon_stats (
+    pokemon_id, hp, attack, defense,
+    sp_attack, sp_defense, speed, total
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(pokemon_id) DO UPDATE SET
+    hp=excluded.hp,
+    attack=excluded.attack,
+    defense=excluded.defense,
+    sp_attack=excluded.sp_attack,
+    sp_defense=excluded.sp_defense,
+    speed=excluded.speed,
+    total=excluded.total
+"""
+
+_INSERT_ABILITY_SQL = """
+INSERT INTO pokemon_abilities (
+    pokemon_id, ability_id, name_en,
+    name_zh_hans, name_zh_hant, is_hidden, slot
+) VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Stay well below SQLite's bound-parameter limit for IN (...) lookups.
+_LOOKUP_CHUNK = 500
+
+
+def _type_row(ptype: PokemonType) -> tuple:
+    return (ptype.id, ptype.name_en, ptype.name_zh_hans, ptype.name_zh_hant)
+
+
+def _pokemon_row(pokemon: Pokemon) -> tuple:
     type2_id = pokemon.types[1].id if len(pokemon.types) > 1 else None
+    return (
+        pokemon.id, pokemon.name_en, pokemon.name_zh_hans,
+        pokemon.name_zh_hant, pokemon.name_ja, pokemon.genus_zh,
+        pokemon.types[0].id, type2_id,
+        pokemon.height, pokemon.weight, pokemon.generation,
+        pokemon.artwork_path, pokemon.sprite_path,
+        int(pokemon.is_legendary), int(pokemon.is_mythical),
+        pokemon.evolves_from_species_id,
+    )
 
-    conn.execute(
-        """
-        INSERT INTO pokemon (
-            id, name_en, name_zh_hans, name_zh_hant, name_ja,
-            genus_zh, type1_id, type2_id, height, weight,
-            generation, artwork_path, sprite_path,
-            is_legendary, is_mythical, evolves_from_species_id
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(id) DO UPDATE SET
-            name_en=excluded.name_en,
-            name_zh_hans=excluded.name_zh_hans,
-            name_zh_hant=excluded.name_zh_hant,
-            name_ja=excluded.name_ja,
-            genus_zh=excluded.genus_zh,
-            type1_id=excluded.type1_id,
-            type2_id=excluded.type2_id,
-            height=excluded.height,
-            weight=excluded.weight,
-            generation=excluded.generation,
-            artwork_path=excluded.artwork_path,
-            sprite_path=excluded.sprite_path,
-            is_legendary=excluded.is_legendary,
-            is_mythical=excluded.is_mythical,
-            evolves_from_species_id=excluded.evolves_from_species_id
-        """,
-        (
-            pokemon.id, pokemon.name_en, pokemon.name_zh_hans,
-            pokemon.name_zh_hant, pokemon.name_ja, pokemon.genus_zh,
-            pokemon.types[0].id, type2_id,
-            pokemon.height, pokemon.weight, pokemon.generation,
-            pokemon.artwork_path, pokemon.sprite_path,
-            int(pokemon.is_legendary), int(pokemon.is_mythical),
-            pokemon.evolves_from_species_id,
-        ),
+
+def _stats_row(pokemon: Pokemon) -> tuple:
+    return (
+        pokemon.id,
+        pokemon.stats.hp, pokemon.stats.attack, pokemon.stats.defense,
+        pokemon.stats.sp_attack, pokemon.stats.sp_defense,
+        pokemon.stats.speed, pokemon.stats.total,
     )
 
-    conn.execute(
-        """
-        INSERT INTO pokemon_stats (
-            pokemon_id, hp, attack, defense,
-            sp_attack, sp_defense, speed, total
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(pokemon_id) DO UPDATE SET
-            hp=excluded.hp,
-            attack=excluded.attack,
-            defense=excluded.defense,
-            sp_attack=excluded.sp_attack,
-            sp_defense=excluded.sp_defense,
-            speed=excluded.speed,
-            total=excluded.total
-        """,
+
+def _ability_rows(pokemon: Pokemon) -> list[tuple]:
+    return [
         (
-            pokemon.id,
-            pokemon.stats.hp, pokemon.stats.attack, pokemon.stats.defense,
-            pokemon.stats.sp_attack, pokemon.stats.sp_defense,
-            pokemon.stats.speed, pokemon.stats.total,
-        ),
+            pokemon.id, ability.id, ability.name_en,
+            ability.name_zh_hans, ability.name_zh_hant,
+            int(ability.is_hidden), ability.slot,
+        )
+        for ability in pokemon.abilities
+    ]
+
+
+def _next_row_version(conn: sqlite3.Connection) -> int:
+    """Next value of the monotonically increasing pokemon.row_version."""
+    row = conn.execute("SELECT COALESCE(MAX(row_version), 0) FROM pokemon").fetchone()
+    return row[0] + 1
+
+
+def touch_pokemon(conn: sqlite3.Connection, ids: Iterable[int]) -> None:
+    """Stamp `ids` with a new row_version after an UPDATE outside the
+    upserts, so --since-last exports pick the change up."""
+    version = _next_row_version(conn)
+    conn.executemany(
+        "UPDATE pokemon SET row_version = ? WHERE id = ?",
+        [(version, pid) for pid in ids],
     )
 
+
+def get_max_row_version(conn: sqlite3.Connection) -> int:
+    row = conn.execute(
+        "SELECT COALESCE(MAX(row_version), 0) FROM pokemon_full"
+    ).fetchone()
+    return row[0]
+
+
+def upsert_type(conn: sqlite3.Connection, ptype: PokemonType) -> None:
+    conn.execute(_UPSERT_TYPE_SQL, _type_row(ptype))
+    conn.commit()
+
+
+def upsert_pokemon(conn: sqlite3.Connection, pokemon: Pokemon) -> None:
+    conn.execute(
+        _UPSERT_POKEMON_SQL,
+        _pokemon_row(pokemon) + (_next_row_version(conn),),
+    )
+    conn.execute(_UPSERT_STATS_SQL, _stats_row(pokemon))
     conn.execute(
         "DELETE FROM pokemon_abilities WHERE pokemon_id = ?",
         (pokemon.id,),
     )
-    for ability in pokemon.abilities:
-        conn.execute(
-            """
-            INSERT INTO pokemon_abilities (
-                pokemon_id, ability_id, name_en,
-                name_zh_hans, name_zh_hant, is_hidden, slot
-            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+    conn.executemany(_INSERT_ABILITY_SQL, _ability_rows(pokemon))
+    conn.commit()
+
+
+def _existing_snapshots(
+    conn: sqlite3.Connection,
+    ids: list[int],
+) -> dict[int, tuple]:
+    """Current (pokemon, stats, abilities) rows for `ids`, shaped like the
+    tuples built by _pokemon_row/_stats_row/_ability_rows."""
+    pokemon_rows: dict[int, tuple] = {}
+    stats_rows: dict[int, tuple] = {}
+    ability_rows: dict[int, list[tuple]] = {}
+
+    for start in range(0, len(ids), _LOOKUP_CHUNK):
+        chunk = ids[start:start + _LOOKUP_CHUNK]
+        placeholders = ",".join("?" for _ in chunk)
+        for row in conn.execute(
+            f"""
+            SELECT id, name_en, name_zh_hans, name_zh_hant, name_ja,
+                   genus_zh, type1_id, type2_id, height, weight,
+                   generation, artwork_path, sprite_path,
+                   is_legendary, is_mythical, evolves_from_species_id
+            FROM pokemon WHERE id IN ({placeholders})
+            """,
+            chunk,
+        ):
+            pokemon_rows[row[0]] = tuple(row)
+        for row in conn.execute(
+            f"""
+            SELECT pokemon_id, hp, attack, defense,
+                   sp_attack, sp_defense, speed, total
+            FROM pokemon_stats WHERE pokemon_id IN ({placeholders})
             """,
-            (
-                pokemon.id, ability.id, ability.name_en,
-                ability.name_zh_hans, ability.name_zh_hant,
-                int(ability.is_hidden), ability.slot,
-            ),
+            chunk,
+        ):
+            stats_rows[row[0]] = tuple(row)
+        for row in conn.execute(
+            f"""
+            SELECT pokemon_id, ability_id, name_en,
+                   name_zh_hans, name_zh_hant, is_hidden, slot
+            FROM pokemon_abilities WHERE pokemon_id IN ({placeholders})
+            ORDER BY pokemon_id, slot
+            """,
+            chunk,
+        ):
+            ability_rows.setdefault(row[0], []).append(tuple(row))
+
+    return {
+        pid: (row, stats_rows.get(pid), ability_rows.get(pid, []))
+        for pid, row in pokemon_rows.items()
+    }
+
+
+def upsert_many_pokemon(
+    conn: sqlite3.Connection,
+    pokemon_iter: Iterable[Pokemon],
+) -> dict[str, int]:
+    """Bulk upsert in one transaction with one executemany per table.
+
+    Records identical to what is already stored are skipped; the rest
+    share one new row_version, so incremental exports pick up exactly
+    this batch. Types referenced by the records are upserted as well.
+    Returns counts of inserted, updated and unchanged Pokemon.
+    """
+    staged: dict[int, Pokemon] = {p.id: p for p in pokemon_iter}
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    if not staged:
+        return counts
+
+    existing = _existing_snapshots(conn, list(staged))
+    version = _next_row_version(conn)
+
+    types: dict[int, PokemonType] = {}
+    pokemon_rows: list[tuple] = []
+    stats_rows: list[tuple] = []
+    ability_rows: list[tuple] = []
+    replaced_ids: list[tuple[int]] = []
+
+    for pid, pokemon in staged.items():
+        new_abilities = sorted(_ability_rows(pokemon), key=lambda r: r[6])
+        new_snapshot = (_pokemon_row(pokemon), _stats_row(pokemon), new_abilities)
+        old_snapshot = existing.get(pid)
+
+        if old_snapshot == new_snapshot:
+            counts["unchanged"] += 1
+            continue
+        counts["updated" if old_snapshot is not None else "inserted"] += 1
+
+        for ptype in pokemon.types:
+            types[ptype.id] = ptype
+        pokemon_rows.append(new_snapshot[0] + (version,))
+        stats_rows.append(new_snapshot[1])
+        ability_rows.extend(new_abilities)
+        replaced_ids.append((pid,))
+
+    if not pokemon_rows:
+        return counts
+
+    try:
+        conn.executemany(_UPSERT_TYPE_SQL, [_type_row(t) for t in types.values()])
+        conn.executemany(_UPSERT_POKEMON_SQL, pokemon_rows)
+        conn.executemany(_UPSERT_STATS_SQL, stats_rows)
+        conn.executemany(
+            "DELETE FROM pokemon_abilities WHERE pokemon_id = ?",
+            replaced_ids,
         )
+        conn.executemany(_INSERT_ABILITY_SQL, ability_rows)
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
 
-    conn.commit()
+    return counts
 
 
 def mark_data_scraped(conn: sqlite3.Connection, pokemon_id: int) -> None:
@@ -114,6 +269,21 @@ def mark_data_scraped(conn: sqlite3.Connection, pokemon_id: int) -> None:
     conn.commit()
 
 
+def mark_many_data_scraped(
+    conn: sqlite3.Connection,
+    pokemon_ids: Iterable[int],
+) -> None:
+    conn.executemany(
+        """
+        INSERT INTO scrape_log (pokemon_id, data_scraped, images_downloaded)
+        VALUES (?, 1, 0)
+        ON CONFLICT(pokemon_id) DO UPDATE SET data_scraped=1
+        """,
+        [(pid,) for pid in pokemon_ids],
+    )
+    conn.commit()
+
+
 def mark_images_downloaded(conn: sqlite3.Connection, pokemon_id: int) -> None:
     conn.execute(
         """
@@ -157,38 +327,125 @@ def get_scrape_status(conn: sqlite3.Connection) -> dict[str, int]:
     }
 
 
-def fetch_all_pokemon(conn: sqlite3.Connection) -> list[dict]:
+def rebuild_pokemon_full(conn: sqlite3.Connection) -> int:
+    """Rebuild the denormalized pokemon_full read table in one transaction."""
+    try:
+        conn.execute("DELETE FROM pokemon_full")
+        conn.execute(
+            """
+            INSERT INTO pokemon_full (
+                id, name_en, name_zh_hans, name_zh_hant, name_ja,
+                genus_zh, height, weight, generation,
+                artwork_path, sprite_path,
+                is_legendary, is_mythical, is_fully_evolved, evolution_stage,
+                evolves_from_species_id,
+                type1_id, type1_en, type1_zh_hans, type1_zh_hant,
+                type2_id, type2_en, type2_zh_hans, type2_zh_hant,
+                hp, attack, defense, sp_attack, sp_defense, speed, total,
+                abilities_json, row_version
+            )
+            SELECT
+                p.id, p.name_en, p.name_zh_hans, p.name_zh_hant, p.name_ja,
+                p.genus_zh, p.height, p.weight, p.generation,
+                p.artwork_path, p.sprite_path,
+                p.is_legendary, p.is_mythical, p.is_fully_evolved,
+                p.evolution_stage, p.evolves_from_species_id,
+                t1.id, t1.name_en, t1.name_zh_hans, t1.name_zh_hant,
+                t2.id, t2.name_en, t2.name_zh_hans, t2.name_zh_hant,
+                s.hp, s.attack, s.defense, s.sp_attack, s.sp_defense,
+                s.speed, s.total,
+                COALESCE((
+                    SELECT json_group_array(json_object(
+                        'ability_id', a.ability_id,
+                        'name_en', a.name_en,
+                        'name_zh_hans', a.name_zh_hans,
+                        'name_zh_hant', a.name_zh_hant,
+                        'is_hidden', a.is_hidden,
+                        'slot', a.slot,
+                        'flavor_text_zh', a.flavor_text_zh
+                    ))
+                    FROM (
+                        SELECT * FROM pokemon_abilities
+                        WHERE pokemon_id = p.id
+                        ORDER BY slot
+                    ) a
+                ), '[]'),
+                p.row_version
+            FROM pokemon p
+            JOIN types t1 ON p.type1_id = t1.id
+            LEFT JOIN types t2 ON p.type2_id = t2.id
+            JOIN pokemon_stats s ON p.id = s.pokemon_id
+            """
+        )
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+    return conn.execute("SELECT COUNT(*) AS c FROM pokemon_full").fetchone()["c"]
+
+
+def rebuild_evolution_closure(conn: sqlite3.Connection) -> int:
+    """Rebuild evolution_closure from evolves_from_species_id in one transaction."""
+    try:
+        conn.execute("DELETE FROM evolution_closure")
+        conn.execute(
+            """
+            WITH RECURSIVE chain(ancestor, descendant, depth) AS (
+                SELECT id, id, 0 FROM pokemon
+                UNION ALL
+                SELECT c.ancestor, p.id, c.depth + 1
+                FROM chain c
+                JOIN pokemon p ON p.evolves_from_species_id = c.descendant
+                WHERE c.depth < 10
+            )
+            INSERT OR IGNORE INTO evolution_closure (ancestor, descendant, depth)
+            SELECT ancestor, descendant, depth FROM chain
+            """
+        )
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+    return conn.execute(
+        "SELECT COUNT(*) AS c FROM evolution_closure"
+    ).fetchone()["c"]
+
+
+def iter_all_pokemon(
+    conn: sqlite3.Connection,
+    since_version: int | None = None,
+) -> Iterator[dict]:
+    """Yield every Pokemon in id order without materializing the result set.
+
+    With `since_version`, only rows whose row_version is greater.
+    """
+    where = "WHERE row_version > ?" if since_version is not None else ""
+    params = (since_version,) if since_version is not None else ()
     rows = conn.execute(
-        """
+        f"""
         SELECT
-            p.id, p.name_en, p.name_zh_hans, p.name_zh_hant, p.name_ja,
-            p.genus_zh, p.height, p.weight, p.generation,
-            p.artwork_path, p.sprite_path,
-            t1.name_en as type1_en, t1.name_zh_hans as type1_zh_hans,
-            t2.name_en as type2_en, t2.name_zh_hans as type2_zh_hans,
-            s.hp, s.attack, s.defense, s.sp_attack, s.sp_defense,
-            s.speed, s.total
-        FROM pokemon p
-        JOIN types t1 ON p.type1_id = t1.id
-        LEFT JOIN types t2 ON p.type2_id = t2.id
-        JOIN pokemon_stats s ON p.id = s.pokemon_id
-        ORDER BY p.id
-        """
-    ).fetchall()
+            id, name_en, name_zh_hans, name_zh_hant, name_ja,
+            genus_zh, height, weight, generation,
+            artwork_path, sprite_path,
+            type1_en, type1_zh_hans, type2_en, type2_zh_hans,
+            hp, attack, defense, sp_attack, sp_defense,
+            speed, total, abilities_json
+        FROM pokemon_full
+        {where}
+        ORDER BY id
+        """,
+        params,
+    )
 
-    result = []
     for row in rows:
         pokemon_dict = dict(row)
-        abilities = conn.execute(
-            """
-            SELECT name_en, name_zh_hans, name_zh_hant, is_hidden, slot
-            FROM pokemon_abilities
-            WHERE pokemon_id = ?
-            ORDER BY slot
-            """,
-            (row["id"],),
-        ).fetchall()
-        pokemon_dict["abilities"] = [dict(a) for a in abilities]
-        result.append(pokemon_dict)
+        pokemon_dict["abilities"] = json.loads(
+            pokemon_dict.pop("abilities_json"),
+        )
+        yield pokemon_dict
+
 
-    return result
+def fetch_all_pokemon(conn: sqlite3.Connection) -> list[dict]:
+    return list(iter_all_pokemon(conn))
@@ -51,6 +51,67 @@ CREATE TABLE IF NOT EXISTS scrape_log (
     data_scraped INTEGER NOT NULL DEFAULT 0,
     images_downloaded INTEGER NOT NULL DEFAULT 0
 );
+
+-- Denormalized read table, rebuilt by rebuild_pokemon_full() after writes.
+CREATE TABLE IF NOT EXISTS pokemon_full (
+    id INTEGER PRIMARY KEY,
+    name_en TEXT NOT NULL,
+    name_zh_hans TEXT NOT NULL DEFAULT '',
+    name_zh_hant TEXT NOT NULL DEFAULT '',
+    name_ja TEXT NOT NULL DEFAULT '',
+    genus_zh TEXT NOT NULL DEFAULT '',
+    height INTEGER NOT NULL DEFAULT 0,
+    weight INTEGER NOT NULL DEFAULT 0,
+    generation INTEGER NOT NULL DEFAULT 0,
+    artwork_path TEXT NOT NULL DEFAULT '',
+    sprite_path TEXT NOT NULL DEFAULT '',
+    is_legendary INTEGER NOT NULL DEFAULT 0,
+    is_mythical INTEGER NOT NULL DEFAULT 0,
+    is_fully_evolved INTEGER NOT NULL DEFAULT 0,
+    evolution_stage INTEGER NOT NULL DEFAULT 0,
+    evolves_from_species_id INTEGER,
+    type1_id INTEGER NOT NULL,
+    type1_en TEXT NOT NULL,
+    type1_zh_hans TEXT NOT NULL DEFAULT '',
+    type1_zh_hant TEXT NOT NULL DEFAULT '',
+    type2_id INTEGER,
+    type2_en TEXT,
+    type2_zh_hans TEXT,
+    type2_zh_hant TEXT,
+    hp INTEGER NOT NULL,
+    attack INTEGER NOT NULL,
+    defense INTEGER NOT NULL,
+    sp_attack INTEGER NOT NULL,
+    sp_defense INTEGER NOT NULL,
+    speed INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    abilities_json TEXT NOT NULL DEFAULT '[]',
+    row_version INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_pokemon_full_generation
+    ON pokemon_full (generation, id);
+CREATE INDEX IF NOT EXISTS idx_pokemon_full_type1
+    ON pokemon_full (type1_en, generation, id);
+CREATE INDEX IF NOT EXISTS idx_pokemon_full_type2
+    ON pokemon_full (type2_en, generation, id);
+CREATE INDEX IF NOT EXISTS idx_pokemon_full_total
+    ON pokemon_full (total, id);
+CREATE INDEX IF NOT EXISTS idx_pokemon_full_name_en
+    ON pokemon_full (name_en COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_pokemon_full_name_zh_hans
+    ON pokemon_full (name_zh_hans);
+
+-- Transitive closure of evolves_from_species_id, including depth-0 self rows.
+CREATE TABLE IF NOT EXISTS evolution_closure (
+    ancestor INTEGER NOT NULL,
+    descendant INTEGER NOT NULL,
+    depth INTEGER NOT NULL,
+    PRIMARY KEY (ancestor, descendant)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_evolution_closure_descendant
+    ON evolution_closure (descendant, depth);
 """
 
 
@@ -85,6 +146,16 @@ _MIGRATIONS = [
         "is_fully_evolved",
         "ALTER TABLE pokemon ADD COLUMN is_fully_evolved INTEGER NOT NULL DEFAULT 0",
     ),
+    (
+        "pokemon",
+        "row_version",
+        "ALTER TABLE pokemon ADD COLUMN row_version INTEGER NOT NULL DEFAULT 0",
+    ),
+    (
+        "pokemon_full",
+        "row_version",
+        "ALTER TABLE pokemon_full ADD COLUMN row_version INTEGER NOT NULL DEFAULT 0",
+    ),
 ]
 
 
@@ -0,0 +1,266 @@
+"""Columnar, mmap-able binary snapshot of pokemon_full.
+
+Layout (little endian):
+
+    header     MAGIC, version, column count
+    directory  per column: name, item format, row count, offset, byte length
+    columns    8-byte aligned raw arrays
+
+Numeric columns are fixed-width arrays (stats fit in uint8). Each string
+column is stored as `<name>.off` (uint32 offsets, rows + 1) plus
+`<name>.data` (UTF-8 bytes). Types live in a separate small table that
+`type1` / `type2` index into (0xFF = none). Readers memory-map the file
+and view columns with memoryview.cast, so opening costs one mmap and a
+directory parse regardless of dataset size.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import sqlite3
+import struct
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any
+
+MAGIC = b"PKSNAP01"
+VERSION = 1
+
+_HEADER = struct.Struct("<8sHH")
+_DIR_ENTRY = struct.Struct("<24s2sIQQ")
+_NO_TYPE = 0xFF
+
+_FLAG_LEGENDARY = 1
+_FLAG_MYTHICAL = 2
+_FLAG_FULLY_EVOLVED = 4
+
+_NUMERIC_COLUMNS: dict[str, str] = {
+    "id": "H",
+    "generation": "B",
+    "evolution_stage": "B",
+    "flags": "B",
+    "type1": "B",
+    "type2": "B",
+    "hp": "B",
+    "attack": "B",
+    "defense": "B",
+    "sp_attack": "B",
+    "sp_defense": "B",
+    "speed": "B",
+    "total": "H",
+    "height": "H",
+    "weight": "H",
+}
+
+_STRING_COLUMNS = (
+    "name_en", "name_zh_hans", "name_zh_hant", "name_ja", "genus_zh",
+    "artwork_path", "sprite_path", "abilities_json",
+)
+
+_TYPE_STRING_COLUMNS = ("type_en", "type_zh_hans", "type_zh_hant")
+
+
+def _string_column(values: list[str]) -> tuple[array, bytes]:
+    offsets = array("I", [0])
+    blob = bytearray()
+    for value in values:
+        blob += value.encode("utf-8")
+        offsets.append(len(blob))
+    return offsets, bytes(blob)
+
+
+def build_snapshot(conn: sqlite3.Connection, output_path: Path) -> int:
+    """Write a snapshot of pokemon_full to `output_path`. Returns row count."""
+    types = conn.execute(
+        "SELECT id, name_en, name_zh_hans, name_zh_hant FROM types ORDER BY id"
+    ).fetchall()
+    type_index = {row["id"]: i for i, row in enumerate(types)}
+
+    rows = conn.execute("SELECT * FROM pokemon_full ORDER BY id").fetchall()
+
+    columns: list[tuple[str, str, int, bytes]] = []
+
+    for name, fmt in _NUMERIC_COLUMNS.items():
+        if name == "flags":
+            values = [
+                (_FLAG_LEGENDARY if r["is_legendary"] else 0)
+                | (_FLAG_MYTHICAL if r["is_mythical"] else 0)
+                | (_FLAG_FULLY_EVOLVED if r["is_fully_evolved"] else 0)
+                for r in rows
+            ]
+        elif name == "type1":
+            values = [type_index[r["type1_id"]] for r in rows]
+        elif name == "type2":
+            values = [
+                type_index[r["type2_id"]] if r["type2_id"] is not None else _NO_TYPE
+                for r in rows
+            ]
+        else:
+            values = [r[name] for r in rows]
+        columns.append((name, fmt, len(rows), array(fmt, values).tobytes()))
+
+    for name in _STRING_COLUMNS:
+        offsets, blob = _string_column([r[name] or "" for r in rows])
+        columns.append((f"{name}.off", "I", len(offsets), offsets.tobytes()))
+        columns.append((f"{name}.data", "B", len(blob), blob))
+
+    columns.append(("type_id", "H", len(types), array("H", [t["id"] for t in types]).tobytes()))
+    for name, source in zip(_TYPE_STRING_COLUMNS, ("name_en", "name_zh_hans", "name_zh_hant")):
+        offsets, blob = _string_column([t[source] for t in types])
+        columns.append((f"{name}.off", "I", len(offsets), offsets.tobytes()))
+        columns.append((f"{name}.data", "B", len(blob), blob))
+
+    data_start = _HEADER.size + _DIR_ENTRY.size * len(columns)
+    directory = bytearray()
+    body = bytearray()
+    for name, fmt, count, raw in columns:
+        pad = -(data_start + len(body)) % 8
+        body += b"\0" * pad
+        offset = data_start + len(body)
+        directory += _DIR_ENTRY.pack(
+            name.encode("ascii"), fmt.encode("ascii"), count, offset, len(raw),
+        )
+        body += raw
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_suffix(output_path.suffix + ".tmp")
+    with tmp_path.open("wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(columns)))
+        f.write(directory)
+        f.write(body)
+    tmp_path.replace(output_path)
+    return len(rows)
+
+
+class Snapshot:
+    """Read-only view over a snapshot file."""
+
+    def __init__(self, path: Path) -> None:
+        with path.open("rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        magic, version, n_columns = _HEADER.unpack_from(self._view, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"Not a pokemon snapshot (v{VERSION}): {path}")
+
+        # Every slice/cast is its own export of the mmap buffer and must be
+        # released before the mmap can close.
+        self._exports: list[memoryview] = []
+        self._columns: dict[str, memoryview] = {}
+        for i in range(n_columns):
+            name, fmt, _count, offset, length = _DIR_ENTRY.unpack_from(
+                self._view, _HEADER.size + i * _DIR_ENTRY.size,
+            )
+            raw = self._view[offset:offset + length]
+            column = raw.cast(fmt.decode("ascii"))
+            self._exports += (column, raw)
+            self._columns[name.rstrip(b"\0").decode("ascii")] = column
+
+        self._ids = self._columns["id"]
+
+    def close(self) -> None:
+        self._columns = {}
+        for view in getattr(self, "_exports", ()):
+            view.release()
+        self._exports = []
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def column(self, name: str) -> memoryview:
+        return self._columns[name]
+
+    def _string(self, name: str, index: int) -> str:
+        offsets = self._columns[f"{name}.off"]
+        data = self._columns[f"{name}.data"]
+        return bytes(data[offsets[index]:offsets[index + 1]]).decode("utf-8")
+
+    def _string_equals(self, name: str, index: int, encoded: bytes) -> bool:
+        offsets = self._columns[f"{name}.off"]
+        start, end = offsets[index], offsets[index + 1]
+        return end - start == len(encoded) and self._columns[f"{name}.data"][start:end] == encoded
+
+    def find_row(self, id_or_name: str) -> int | None:
+        """Row index for an id or exact en (case-insensitive) / zh name."""
+        if id_or_name.isdigit():
+            pid = int(id_or_name)
+            index = bisect_left(self._ids, pid)
+            if index < len(self._ids) and self._ids[index] == pid:
+                return index
+            return None
+
+        encoded = id_or_name.encode("utf-8")
+        lowered = id_or_name.lower()
+        for index in range(len(self._ids)):
+            if (
+                self._string_equals("name_zh_hans", index, encoded)
+                or self._string_equals("name_zh_hant", index, encoded)
+                or self._string("name_en", index).lower() == lowered
+            ):
+                return index
+        return None
+
+    def row(self, index: int) -> dict[str, Any]:
+        """Decode one row into the same keys the detail query returns."""
+        c = self._columns
+        flags = c["flags"][index]
+        record: dict[str, Any] = {
+            name: c[name][index]
+            for name in _NUMERIC_COLUMNS
+            if name not in ("flags", "type1", "type2")
+        }
+        for name in _STRING_COLUMNS:
+            record[name] = self._string(name, index)
+        record["is_legendary"] = int(bool(flags & _FLAG_LEGENDARY))
+        record["is_mythical"] = int(bool(flags & _FLAG_MYTHICAL))
+        record["is_fully_evolved"] = int(bool(flags & _FLAG_FULLY_EVOLVED))
+
+        for slot in ("type1", "type2"):
+            t = c[slot][index]
+            if t == _NO_TYPE:
+                record[f"{slot}_id"] = None
+                record[f"{slot}_en"] = None
+                record[f"{slot}_zh_hans"] = None
+                record[f"{slot}_zh_hant"] = None
+                continue
+            record[f"{slot}_id"] = c["type_id"][t]
+            record[f"{slot}_en"] = self._string("type_en", t)
+            record[f"{slot}_zh_hans"] = self._string("type_zh_hans", t)
+            record[f"{slot}_zh_hant"] = self._string("type_zh_hant", t)
+        return record
+
+    def fetch_detail(self, id_or_name: str) -> tuple[dict | None, list[dict]]:
+        """Snapshot counterpart of db.queries.fetch_pokemon_detail()."""
+        index = self.find_row(id_or_name)
+        if index is None:
+            return None, []
+        record = self.row(index)
+        return record, json.loads(record["abilities_json"])
+
+
+def snapshot_is_fresh(snapshot_path: Path, db_path: Path) -> bool:
+    """True if the snapshot was written after the last database change."""
+    if not snapshot_path.exists() or not db_path.exists():
+        return False
+    snap_mtime = snapshot_path.stat().st_mtime
+    if db_path.stat().st_mtime > snap_mtime:
+        return False
+    # Readers recreate an empty -wal on open; only pending frames count.
+    wal_path = db_path.with_name(db_path.name + "-wal")
+    if wal_path.exists():
+        wal = wal_path.stat()
+        if wal.st_size > 0 and wal.st_mtime > snap_mtime:
+            return False
+    return True
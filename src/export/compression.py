@@ -0,0 +1,53 @@
+"""Text output streams with optional gzip / zstd compression."""
+
+from __future__ import annotations
+
+import gzip
+import io
+from pathlib import Path
+from typing import TextIO
+
+COMPRESSIONS = ("gzip", "zstd")
+
+_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+
+def compression_suffix(compression: str | None) -> str:
+    return _SUFFIXES.get(compression, "") if compression else ""
+
+
+def infer_compression(path: Path) -> str | None:
+    """Pick a compression from the file suffix (.gz / .zst), if any."""
+    for name, suffix in _SUFFIXES.items():
+        if path.suffix == suffix:
+            return name
+    return None
+
+
+def open_text_output(
+    path: Path,
+    compression: str | None = None,
+    newline: str | None = None,
+) -> TextIO:
+    """Open `path` for streaming UTF-8 text, compressing on the fly."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if compression is None:
+        return path.open("w", encoding="utf-8", newline=newline)
+
+    if compression == "gzip":
+        return gzip.open(path, "wt", encoding="utf-8", newline=newline)
+
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError(
+                "zstd compression requires the 'zstandard' package "
+                "(pip install 'pokemon-scraper[zstd]')"
+            ) from None
+        raw = path.open("wb")
+        writer = zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(writer, encoding="utf-8", newline=newline)
+
+    raise ValueError(f"Unknown compression: {compression}")
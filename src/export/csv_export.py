@@ -1,60 +1,222 @@
 import csv
+import re
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from src.db.repository import fetch_all_pokemon
+from src.db.connection import create_read_connection
+from src.export.compression import compression_suffix, open_text_output
 
+# Output column -> SQL expression over pokemon_full p. Only the selected
+# columns are read, so narrow exports skip the ability JSON entirely.
+_ABILITY_NAMES = (
+    "(SELECT group_concat(json_extract(value, '$.{field}'), '; ') "
+    "FROM json_each(p.abilities_json))"
+)
 
-def export_csv(conn: sqlite3.Connection, output_path: Path) -> None:
-    pokemon_list = fetch_all_pokemon(conn)
+COLUMNS: dict[str, str] = {
+    "id": "p.id",
+    "name_en": "p.name_en",
+    "name_zh_hans": "p.name_zh_hans",
+    "name_zh_hant": "p.name_zh_hant",
+    "name_ja": "p.name_ja",
+    "genus_zh": "p.genus_zh",
+    "type1_en": "p.type1_en",
+    "type1_zh_hans": "p.type1_zh_hans",
+    "type2_en": "p.type2_en",
+    "type2_zh_hans": "p.type2_zh_hans",
+    "height": "p.height",
+    "weight": "p.weight",
+    "generation": "p.generation",
+    "hp": "p.hp",
+    "attack": "p.attack",
+    "defense": "p.defense",
+    "sp_attack": "p.sp_attack",
+    "sp_defense": "p.sp_defense",
+    "speed": "p.speed",
+    "total": "p.total",
+    "abilities_en": _ABILITY_NAMES.format(field="name_en"),
+    "abilities_zh": _ABILITY_NAMES.format(field="name_zh_hans"),
+    "artwork_path": "p.artwork_path",
+    "sprite_path": "p.sprite_path",
+}
 
-    fieldnames = [
-        "id", "name_en", "name_zh_hans", "name_zh_hant", "name_ja",
-        "genus_zh", "type1_en", "type1_zh_hans", "type2_en", "type2_zh_hans",
-        "height", "weight", "generation",
-        "hp", "attack", "defense", "sp_attack", "sp_defense", "speed", "total",
-        "abilities_en", "abilities_zh",
-        "artwork_path", "sprite_path",
-    ]
+SPLIT_MODES = ("generation", "type")
+
+_FETCH_SIZE = 500
+
+
+def parse_columns(spec: str | None) -> list[str]:
+    """Turn "id,name_en,hp" into a validated column list (all if empty)."""
+    if not spec:
+        return list(COLUMNS)
+    columns = [c.strip() for c in spec.split(",") if c.strip()]
+    unknown = [c for c in columns if c not in COLUMNS]
+    if unknown:
+        raise ValueError(
+            f"Unknown column(s): {', '.join(unknown)}. "
+            f"Available: {', '.join(COLUMNS)}"
+        )
+    return columns
+
+
+def _write_csv(
+    conn: sqlite3.Connection,
+    output_path: Path,
+    columns: list[str],
+    compression: str | None,
+    where: str = "",
+    params: tuple = (),
+    deleted_ids: list[int] | None = None,
+) -> int:
+    select = ", ".join(f"{COLUMNS[c]} AS {c}" for c in columns)
+    cursor = conn.execute(
+        f"SELECT {select} FROM pokemon_full p {where} ORDER BY p.id", params,
+    )
+
+    count = 0
+    with open_text_output(output_path, compression, newline="") as f:
+        writer = csv.writer(f)
+        if deleted_ids is None:
+            writer.writerow(columns)
+        else:
+            writer.writerow(columns + ["deleted"])
+        while True:
+            rows = cursor.fetchmany(_FETCH_SIZE)
+            if not rows:
+                break
+            if deleted_ids is not None:
+                rows = [tuple(row) + (0,) for row in rows]
+            writer.writerows(rows)
+            count += len(rows)
+
+        if deleted_ids:
+            id_index = columns.index("id")
+            for pid in deleted_ids:
+                tombstone = [""] * len(columns) + [1]
+                tombstone[id_index] = pid
+                writer.writerow(tombstone)
+    return count
+
+
+def export_csv(
+    conn: sqlite3.Connection,
+    output_path: Path,
+    *,
+    columns: list[str] | None = None,
+    compression: str | None = None,
+    since_version: int | None = None,
+    deleted_ids: list[int] | None = None,
+) -> None:
+    """Stream Pokemon rows to a CSV file.
+
+    With `since_version` only newer rows are written and a trailing
+    `deleted` column is added; tombstone rows carry just the id and
+    deleted=1. Incremental exports therefore need the id column.
+    """
+    columns = columns or list(COLUMNS)
+    if since_version is None:
+        count = _write_csv(conn, output_path, columns, compression)
+        print(f"Exported {count} Pokemon to {output_path}")
+        return
+
+    if "id" not in columns:
+        raise ValueError("Incremental CSV export requires the id column")
+    deleted_ids = deleted_ids or []
+    count = _write_csv(
+        conn, output_path, columns, compression,
+        "WHERE p.row_version > ?", (since_version,), deleted_ids,
+    )
+    print(
+        f"Exported {count} changed and {len(deleted_ids)} deleted "
+        f"Pokemon to {output_path}"
+    )
+
+
+def _shard_keys(conn: sqlite3.Connection, split_by: str) -> list:
+    if split_by == "generation":
+        rows = conn.execute(
+            "SELECT DISTINCT generation FROM pokemon_full ORDER BY generation"
+        )
+    else:
+        rows = conn.execute(
+            """
+            SELECT type1_en FROM pokemon_full
+            UNION
+            SELECT type2_en FROM pokemon_full WHERE type2_en IS NOT NULL
+            ORDER BY 1
+            """
+        )
+    return [row[0] for row in rows]
+
+
+def _shard_path(output_path: Path, split_by: str, key, compression: str | None) -> Path:
+    name = output_path.name
+    suffix = compression_suffix(compression)
+    if suffix and name.endswith(suffix):
+        name = name[: -len(suffix)]
+    stem = name[:-4] if name.endswith(".csv") else name
+    label = f"gen{key}" if split_by == "generation" else re.sub(r"[^\w-]", "_", str(key))
+    return output_path.with_name(f"{stem}-{label}.csv{suffix}")
+
+
+def _write_shard(
+    db_path: Path,
+    output_path: Path,
+    columns: list[str],
+    compression: str | None,
+    split_by: str,
+    key,
+) -> int:
+    if split_by == "generation":
+        where, params = "WHERE p.generation = ?", (key,)
+    else:
+        where, params = "WHERE p.type1_en = ? OR p.type2_en = ?", (key, key)
+
+    conn = create_read_connection(db_path)
+    try:
+        return _write_csv(conn, output_path, columns, compression, where, params)
+    finally:
+        conn.close()
+
+
+def export_csv_split(
+    db_path: Path,
+    output_path: Path,
+    split_by: str,
+    *,
+    columns: list[str] | None = None,
+    compression: str | None = None,
+    max_workers: int = 4,
+) -> None:
+    """Write one CSV per generation or type, shards in parallel.
+
+    Shards are named after `output_path`, e.g. pokemon-gen1.csv or
+    pokemon-fire.csv.gz. In type mode a dual-type Pokemon appears in both
+    of its type shards.
+    """
+    if split_by not in SPLIT_MODES:
+        raise ValueError(f"Unknown split mode: {split_by}")
+    columns = columns or list(COLUMNS)
+
+    conn = create_read_connection(db_path)
+    try:
+        keys = _shard_keys(conn, split_by)
+    finally:
+        conn.close()
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    with output_path.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
+    paths = [_shard_path(output_path, split_by, key, compression) for key in keys]
 
-        for row in pokemon_list:
-            abilities_en = "; ".join(
-                a["name_en"] for a in row["abilities"]
-            )
-            abilities_zh = "; ".join(
-                a["name_zh_hans"] for a in row["abilities"]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(
+                _write_shard, db_path, path, columns, compression, split_by, key,
             )
+            for key, path in zip(keys, paths)
+        ]
+        counts = [future.result() for future in futures]
 
-            writer.writerow({
-                "id": row["id"],
-                "name_en": row["name_en"],
-                "name_zh_hans": row["name_zh_hans"],
-                "name_zh_hant": row["name_zh_hant"],
-                "name_ja": row["name_ja"],
-                "genus_zh": row["genus_zh"],
-                "type1_en": row["type1_en"],
-                "type1_zh_hans": row["type1_zh_hans"],
-                "type2_en": row.get("type2_en", ""),
-                "type2_zh_hans": row.get("type2_zh_hans", ""),
-                "height": row["height"],
-                "weight": row["weight"],
-                "generation": row["generation"],
-                "hp": row["hp"],
-                "attack": row["attack"],
-                "defense": row["defense"],
-                "sp_attack": row["sp_attack"],
-                "sp_defense": row["sp_defense"],
-                "speed": row["speed"],
-                "total": row["total"],
-                "abilities_en": abilities_en,
-                "abilities_zh": abilities_zh,
-                "artwork_path": row["artwork_path"],
-                "sprite_path": row["sprite_path"],
-            })
-
-    print(f"Exported {len(pokemon_list)} Pokemon to {output_path}")
+    for path, count in zip(paths, counts):
+        print(f"  {path.name}: {count}")
+    print(f"Exported {len(paths)} {split_by} shards to {output_path.parent}")
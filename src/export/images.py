@@ -0,0 +1,267 @@
+"""Image bundles: a streaming tar/zip of data/images plus a hash manifest.
+
+The manifest (data/images/manifest.json) lists every artwork/sprite file
+with its size and SHA-256 and also serves as the index `status` reads
+instead of globbing the image directories. Archives carry the manifest
+as their first member, so an import can verify each file as it arrives.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import re
+import sys
+import tarfile
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator
+
+MANIFEST_NAME = "manifest.json"
+IMAGE_KINDS = ("artwork", "sprites")
+ARCHIVE_FORMATS = ("tar", "tar.gz", "zip")
+
+_MEMBER_RE = re.compile(r"^(artwork|sprites)/\d+\.png$")
+_CHUNK_SIZE = 1 << 20
+
+
+def archive_format(path: str) -> str:
+    """Infer the archive format from a file name (tar for stdout/unknown)."""
+    if path.endswith((".tar.gz", ".tgz")):
+        return "tar.gz"
+    if path.endswith(".zip"):
+        return "zip"
+    return "tar"
+
+
+def _sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _image_files(images_dir: Path) -> Iterator[tuple[str, Path]]:
+    for kind in IMAGE_KINDS:
+        kind_dir = images_dir / kind
+        if not kind_dir.exists():
+            continue
+        for path in sorted(kind_dir.glob("*.png"), key=lambda p: (len(p.name), p.name)):
+            yield f"{kind}/{path.name}", path
+
+
+def load_image_manifest(images_dir: Path) -> dict[str, Any] | None:
+    path = images_dir / MANIFEST_NAME
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _save_manifest(images_dir: Path, files: dict[str, dict[str, Any]]) -> dict[str, Any]:
+    manifest = {
+        "counts": {
+            kind: sum(1 for name in files if name.startswith(kind + "/"))
+            for kind in IMAGE_KINDS
+        },
+        "files": files,
+    }
+    images_dir.mkdir(parents=True, exist_ok=True)
+    path = images_dir / MANIFEST_NAME
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+    tmp_path.replace(path)
+    return manifest
+
+
+def build_image_manifest(images_dir: Path, max_workers: int = 4) -> dict[str, Any]:
+    """Hash every image in parallel and write the manifest.
+
+    Entries whose size and mtime match the previous manifest are reused
+    without re-reading the file.
+    """
+    previous = (load_image_manifest(images_dir) or {}).get("files", {})
+    files: dict[str, dict[str, Any]] = {}
+    to_hash: list[tuple[str, Path, int, float]] = []
+
+    for name, path in _image_files(images_dir):
+        stat = path.stat()
+        old = previous.get(name)
+        if old and old["size"] == stat.st_size and old["mtime"] == stat.st_mtime:
+            files[name] = old
+        else:
+            to_hash.append((name, path, stat.st_size, stat.st_mtime))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        digests = pool.map(lambda item: _sha256_file(item[1]), to_hash)
+        for (name, _path, size, mtime), digest in zip(to_hash, digests):
+            files[name] = {"size": size, "sha256": digest, "mtime": mtime}
+
+    ordered = {name: files[name] for name, _path in _image_files(images_dir)}
+    return _save_manifest(images_dir, ordered)
+
+
+def image_counts(images_dir: Path) -> dict[str, int] | None:
+    """Per-kind file counts from the manifest, or None if it is stale.
+
+    Adding or removing a file bumps its directory's mtime, so the
+    manifest is trusted only while it is newer than both directories.
+    """
+    path = images_dir / MANIFEST_NAME
+    if not path.exists():
+        return None
+    manifest_mtime = path.stat().st_mtime
+    for kind in IMAGE_KINDS:
+        kind_dir = images_dir / kind
+        # Equal timestamps are ambiguous on coarse clocks; rescan then.
+        if kind_dir.exists() and kind_dir.stat().st_mtime >= manifest_mtime:
+            return None
+    return load_image_manifest(images_dir)["counts"]
+
+
+def _open_output(output: str) -> BinaryIO:
+    if output == "-":
+        return sys.stdout.buffer
+    path = Path(output)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path.open("wb")
+
+
+def export_images(
+    images_dir: Path,
+    output: str,
+    *,
+    fmt: str | None = None,
+    max_workers: int = 4,
+) -> int:
+    """Stream all images into a tar/zip at `output` ("-" for stdout).
+
+    Files are copied straight from disk into the archive stream; nothing
+    is staged. Returns the number of images written.
+    """
+    fmt = fmt or archive_format(output)
+    if fmt not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unknown archive format: {fmt}")
+
+    manifest = build_image_manifest(images_dir, max_workers)
+    manifest_bytes = json.dumps(manifest, indent=1).encode("utf-8")
+    files = manifest["files"]
+
+    out = _open_output(output)
+    try:
+        if fmt == "zip":
+            # PNGs are already compressed; store them as-is.
+            with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_STORED) as archive:
+                archive.writestr(MANIFEST_NAME, manifest_bytes)
+                for name in files:
+                    archive.write(images_dir / name, name)
+        else:
+            mode = "w|gz" if fmt == "tar.gz" else "w|"
+            with tarfile.open(fileobj=out, mode=mode) as archive:
+                info = tarfile.TarInfo(MANIFEST_NAME)
+                info.size = len(manifest_bytes)
+                archive.addfile(info, io.BytesIO(manifest_bytes))
+                for name in files:
+                    path = images_dir / name
+                    info = archive.gettarinfo(str(path), arcname=name)
+                    with path.open("rb") as f:
+                        archive.addfile(info, f)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+        else:
+            out.flush()
+    return len(files)
+
+
+def _members(source: str, fmt: str) -> Iterator[tuple[str, bytes]]:
+    """Yield (name, data) for each regular file in the archive, in order."""
+    if fmt == "zip":
+        if source == "-":
+            raise ValueError("zip archives cannot be read from stdin; use tar")
+        with zipfile.ZipFile(source) as archive:
+            for info in archive.infolist():
+                if not info.is_dir():
+                    yield info.filename, archive.read(info)
+        return
+
+    fileobj = sys.stdin.buffer if source == "-" else None
+    name = None if source == "-" else source
+    with tarfile.open(name=name, fileobj=fileobj, mode="r|*") as archive:
+        for member in archive:
+            if not member.isfile():
+                continue
+            f = archive.extractfile(member)
+            yield member.name, f.read()
+
+
+def _verify_and_write(
+    images_dir: Path,
+    name: str,
+    data: bytes,
+    expected: dict[str, Any],
+) -> str | None:
+    """Write one image if it matches its manifest entry; error text otherwise."""
+    if len(data) != expected["size"]:
+        return f"{name}: size {len(data)} != {expected['size']}"
+    digest = hashlib.sha256(data).hexdigest()
+    if digest != expected["sha256"]:
+        return f"{name}: sha256 mismatch"
+    target = images_dir / name
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.name + ".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(target)
+    return None
+
+
+def import_images(
+    source: str,
+    images_dir: Path,
+    *,
+    fmt: str | None = None,
+    max_workers: int = 4,
+) -> dict[str, Any]:
+    """Extract an archive made by export_images() into `images_dir`.
+
+    Members are read sequentially from the stream while hashing and
+    writing happen on a thread pool; at most a few files per worker are
+    held in memory at once. Files missing from the manifest,
+    with unexpected names, or failing the size/hash check are not
+    written. Returns imported/failed counts and error messages.
+    """
+    fmt = fmt or archive_format(source)
+    expected_files: dict[str, dict[str, Any]] | None = None
+    errors: list[str] = []
+    results: list[str | None] = []
+    pending: deque = deque()
+    seen: set[str] = set()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for name, data in _members(source, fmt):
+            if name == MANIFEST_NAME:
+                expected_files = json.loads(data)["files"]
+                continue
+            if expected_files is None:
+                raise ValueError("Archive does not start with a manifest")
+            if not _MEMBER_RE.match(name) or name not in expected_files:
+                errors.append(f"{name}: not in manifest")
+                continue
+            seen.add(name)
+            pending.append(pool.submit(
+                _verify_and_write, images_dir, name, data, expected_files[name],
+            ))
+            if len(pending) >= max_workers * 4:
+                results.append(pending.popleft().result())
+        results.extend(future.result() for future in pending)
+
+    errors.extend(error for error in results if error is not None)
+    imported = sum(1 for error in results if error is None)
+    if expected_files is not None and len(seen) < len(expected_files):
+        errors.append(f"{len(expected_files) - len(seen)} file(s) missing from archive")
+
+    build_image_manifest(images_dir, max_workers)
+    return {"imported": imported, "failed": len(errors), "errors": errors}
@@ -0,0 +1,117 @@
+"""Change tracking for `--since-last` exports.
+
+Every repository upsert, and every scraper UPDATE that changes exported
+fields, stamps the affected Pokemon with a new row_version.
+After an export, data/export_state.json remembers, per output file, the
+highest row_version written, the exported ids and a content hash of
+(id, row_version) pairs plus export options. The next run then either
+skips entirely (hash unchanged), writes only rows with a newer
+row_version plus tombstones for ids that disappeared, or falls back to
+a full export when there is no usable state or the full file is gone.
+
+The full export is never overwritten by a delta: each delta goes to its
+own file named after the row_version it builds on (see delta_path), so
+the full file followed by the deltas in version order is the current
+data set.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+
+@dataclass(frozen=True)
+class ExportPlan:
+    since_version: int | None  # None means a full export
+    deleted_ids: list[int]
+    row_version: int
+    ids: list[int]
+    content_hash: str
+    options: dict[str, Any]
+
+
+def export_state_path(data_dir: Path) -> Path:
+    return data_dir / "export_state.json"
+
+
+def export_key(kind: str, output_path: Path) -> str:
+    return f"{kind}:{output_path.resolve()}"
+
+
+def delta_path(output_path: Path, since_version: int) -> Path:
+    """Where the delta on top of row_version `since_version` is written.
+
+    data/pokemon.ndjson.gz -> data/pokemon.since-42.ndjson.gz, so the full
+    export stays intact and deltas apply in version order.
+    """
+    stem, dot, suffixes = output_path.name.partition(".")
+    return output_path.with_name(f"{stem}.since-{since_version}{dot}{suffixes}")
+
+
+def load_export_state(path: Path) -> dict[str, dict[str, Any]]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _fingerprint(
+    conn: sqlite3.Connection,
+    options: dict[str, Any],
+) -> tuple[str, int, list[int]]:
+    digest = hashlib.sha256(json.dumps(options, sort_keys=True).encode("utf-8"))
+    ids: list[int] = []
+    max_version = 0
+    for pid, version in conn.execute(
+        "SELECT id, row_version FROM pokemon_full ORDER BY id"
+    ):
+        digest.update(f"{pid}:{version};".encode("ascii"))
+        ids.append(pid)
+        max_version = max(max_version, version)
+    return digest.hexdigest(), max_version, ids
+
+
+def plan_export(
+    conn: sqlite3.Connection,
+    state_path: Path,
+    key: str,
+    output_path: Path,
+    options: dict[str, Any],
+) -> ExportPlan | None:
+    """Decide what the next export of `key` must write; None if nothing."""
+    content_hash, row_version, ids = _fingerprint(conn, options)
+    previous = load_export_state(state_path).get(key)
+
+    if (
+        previous is None
+        or previous.get("options") != options
+        or not output_path.exists()
+    ):
+        return ExportPlan(None, [], row_version, ids, content_hash, options)
+
+    if previous["content_hash"] == content_hash:
+        return None
+
+    deleted_ids = sorted(set(previous["ids"]) - set(ids))
+    return ExportPlan(
+        previous["row_version"], deleted_ids, row_version, ids,
+        content_hash, options,
+    )
+
+
+def save_export_state(state_path: Path, key: str, plan: ExportPlan) -> None:
+    state = load_export_state(state_path)
+    state[key] = {
+        "row_version": plan.row_version,
+        "content_hash": plan.content_hash,
+        "options": plan.options,
+        "ids": plan.ids,
+    }
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = state_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(state), encoding="utf-8")
+    tmp_path.replace(state_path)
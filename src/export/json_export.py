@@ -2,58 +2,103 @@ import json
 import sqlite3
 from pathlib import Path
 
-from src.db.repository import fetch_all_pokemon
-
-
-def export_json(conn: sqlite3.Connection, output_path: Path) -> None:
-    pokemon_list = fetch_all_pokemon(conn)
-
-    records = []
-    for row in pokemon_list:
-        types = [row["type1_en"]]
-        types_zh = [row["type1_zh_hans"]]
-        if row.get("type2_en"):
-            types.append(row["type2_en"])
-            types_zh.append(row["type2_zh_hans"])
-
-        record = {
-            "id": row["id"],
-            "name_en": row["name_en"],
-            "name_zh_hans": row["name_zh_hans"],
-            "name_zh_hant": row["name_zh_hant"],
-            "name_ja": row["name_ja"],
-            "genus_zh": row["genus_zh"],
-            "types_en": types,
-            "types_zh": types_zh,
-            "height": row["height"],
-            "weight": row["weight"],
-            "generation": row["generation"],
-            "stats": {
-                "hp": row["hp"],
-                "attack": row["attack"],
-                "defense": row["defense"],
-                "sp_attack": row["sp_attack"],
-                "sp_defense": row["sp_defense"],
-                "speed": row["speed"],
-                "total": row["total"],
-            },
-            "abilities": [
-                {
-                    "name_en": a["name_en"],
-                    "name_zh_hans": a["name_zh_hans"],
-                    "name_zh_hant": a["name_zh_hant"],
-                    "is_hidden": bool(a["is_hidden"]),
-                }
-                for a in row["abilities"]
-            ],
-            "artwork_path": row["artwork_path"],
-            "sprite_path": row["sprite_path"],
-        }
-        records.append(record)
-
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text(
-        json.dumps(records, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
-    print(f"Exported {len(records)} Pokemon to {output_path}")
+from src.db.repository import iter_all_pokemon
+from src.export.compression import open_text_output
+
+FORMATS = ("json", "ndjson")
+
+
+def _to_record(row: dict) -> dict:
+    types = [row["type1_en"]]
+    types_zh = [row["type1_zh_hans"]]
+    if row.get("type2_en"):
+        types.append(row["type2_en"])
+        types_zh.append(row["type2_zh_hans"])
+
+    return {
+        "id": row["id"],
+        "name_en": row["name_en"],
+        "name_zh_hans": row["name_zh_hans"],
+        "name_zh_hant": row["name_zh_hant"],
+        "name_ja": row["name_ja"],
+        "genus_zh": row["genus_zh"],
+        "types_en": types,
+        "types_zh": types_zh,
+        "height": row["height"],
+        "weight": row["weight"],
+        "generation": row["generation"],
+        "stats": {
+            "hp": row["hp"],
+            "attack": row["attack"],
+            "defense": row["defense"],
+            "sp_attack": row["sp_attack"],
+            "sp_defense": row["sp_defense"],
+            "speed": row["speed"],
+            "total": row["total"],
+        },
+        "abilities": [
+            {
+                "name_en": a["name_en"],
+                "name_zh_hans": a["name_zh_hans"],
+                "name_zh_hant": a["name_zh_hant"],
+                "is_hidden": bool(a["is_hidden"]),
+            }
+            for a in row["abilities"]
+        ],
+        "artwork_path": row["artwork_path"],
+        "sprite_path": row["sprite_path"],
+    }
+
+
+def export_json(
+    conn: sqlite3.Connection,
+    output_path: Path,
+    *,
+    fmt: str = "json",
+    compression: str | None = None,
+    since_version: int | None = None,
+    deleted_ids: list[int] | None = None,
+) -> None:
+    """Stream every Pokemon to `output_path`, one record at a time.
+
+    "json" writes the same indented array as before; "ndjson" writes one
+    compact record per line. With `since_version` only newer rows are
+    written, followed by {"id": ..., "deleted": true} tombstones.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt}")
+
+    def records():
+        for row in iter_all_pokemon(conn, since_version):
+            yield _to_record(row)
+        for pid in deleted_ids or ():
+            yield {"id": pid, "deleted": True}
+
+    count = 0
+    with open_text_output(output_path, compression) as f:
+        if fmt == "json":
+            f.write("[")
+        for record in records():
+            if fmt == "ndjson":
+                f.write(json.dumps(record, ensure_ascii=False))
+                f.write("\n")
+            else:
+                # JSON strings never contain raw newlines, so re-indenting
+                # the per-record dump reproduces json.dumps(list, indent=2).
+                f.write(",\n  " if count else "\n  ")
+                f.write(
+                    json.dumps(record, ensure_ascii=False, indent=2)
+                    .replace("\n", "\n  ")
+                )
+            count += 1
+        if fmt == "json":
+            f.write("\n]" if count else "]")
+
+    deleted = len(deleted_ids or ())
+    if since_version is not None:
+        print(
+            f"Exported {count - deleted} changed and {deleted} deleted "
+            f"Pokemon to {output_path}"
+        )
+    else:
+        print(f"Exported {count} Pokemon to {output_path}")
@@ -0,0 +1,211 @@
+"""Static, precompressed dump of the battle JSON API.
+
+Writes a directory that any static file server / CDN can serve:
+
+    types.json                     /battle/api/types
+    pokemon/page/{n}.json          /battle/api/pokemon?page=n
+    pokemon/type/{type_en}.json    all Pokemon of a type
+    pokemon/gen/{gen}.json         all Pokemon of a generation
+    pokemon/{id}.json              one Pokemon with its abilities
+    manifest.json                  logical path -> hashed name, sha256, sizes
+
+Every file gets .gz and (with the optional `brotli` package) .br
+siblings plus an immutable content-hashed copy, e.g. pokemon/25.3fa2b1c9d0e1.json.
+Files whose content is unchanged since the previous manifest are not
+rewritten, so re-runs only touch what changed.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Iterator
+
+from src.db.queries import (
+    fetch_all_types,
+    fetch_pokemon_detail,
+    fetch_pokemon_page,
+    filter_pokemon,
+    get_total_count,
+)
+
+MANIFEST_NAME = "manifest.json"
+
+_HASH_LENGTH = 12
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def _encode(payload: dict[str, Any]) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _documents(conn: sqlite3.Connection, per_page: int) -> Iterator[tuple[str, dict]]:
+    """Yield (logical path, payload) for every file of the static API."""
+    total = get_total_count(conn)
+
+    types = [dict(row) for row in fetch_all_types(conn)]
+    yield "types.json", {"types": types}
+
+    page = 1
+    after_id = None
+    while True:
+        rows = fetch_pokemon_page(conn, limit=per_page, after_id=after_id)
+        if not rows and page > 1:
+            break
+        yield f"pokemon/page/{page}.json", {
+            "pokemon": [dict(row) for row in rows],
+            "total": total,
+            "page": page,
+            "per_page": per_page,
+        }
+        if len(rows) < per_page:
+            break
+        after_id = rows[-1]["id"]
+        page += 1
+
+    for ptype in types:
+        rows = filter_pokemon(conn, type_name=ptype["name_en"], limit=total)
+        yield f"pokemon/type/{ptype['name_en']}.json", {
+            "pokemon": [dict(row) for row in rows],
+            "total": len(rows),
+        }
+
+    generations = [
+        row[0]
+        for row in conn.execute(
+            "SELECT DISTINCT generation FROM pokemon_full ORDER BY generation"
+        )
+    ]
+    for gen in generations:
+        rows = filter_pokemon(conn, gen=gen, limit=total)
+        yield f"pokemon/gen/{gen}.json", {
+            "pokemon": [dict(row) for row in rows],
+            "total": len(rows),
+        }
+
+    for (pid,) in conn.execute("SELECT id FROM pokemon_full ORDER BY id").fetchall():
+        row, abilities = fetch_pokemon_detail(conn, str(pid))
+        pokemon = {
+            key: row[key]
+            for key in row.keys()
+            if key not in ("abilities_json", "row_version")
+        }
+        yield f"pokemon/{pid}.json", {"pokemon": pokemon, "abilities": abilities}
+
+
+def _hashed_name(logical: str, digest: str) -> str:
+    stem, _, ext = logical.rpartition(".")
+    return f"{stem}.{digest[:_HASH_LENGTH]}.{ext}"
+
+
+def _link_or_copy(source: Path, target: Path) -> None:
+    target.unlink(missing_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        target.write_bytes(source.read_bytes())
+
+
+def _write_document(
+    output_dir: Path,
+    logical: str,
+    body: bytes,
+    digest: str,
+    brotli_module,
+) -> dict[str, Any]:
+    hashed = _hashed_name(logical, digest)
+    path = output_dir / logical
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    variants = {"": body, ".gz": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli_module is not None:
+        variants[".br"] = brotli_module.compress(body, quality=11)
+
+    entry: dict[str, Any] = {"hashed": hashed, "sha256": digest, "size": len(body)}
+    for suffix, data in variants.items():
+        target = path.with_name(path.name + suffix)
+        tmp = target.with_name(target.name + ".tmp")
+        tmp.write_bytes(data)
+        tmp.replace(target)
+        _link_or_copy(target, output_dir / (hashed + suffix))
+        if suffix:
+            entry[suffix[1:]] = len(data)
+    return entry
+
+
+def export_static_api(
+    conn: sqlite3.Connection,
+    output_dir: Path,
+    *,
+    per_page: int = 24,
+    max_workers: int = 4,
+) -> dict[str, int]:
+    """Write the static API to `output_dir`. Returns written/unchanged/removed counts."""
+    manifest_path = output_dir / MANIFEST_NAME
+    previous: dict[str, dict[str, Any]] = {}
+    if manifest_path.exists():
+        previous = json.loads(manifest_path.read_text(encoding="utf-8"))["files"]
+
+    brotli_module = _brotli()
+    if brotli_module is None:
+        print("brotli not installed; skipping .br files (pip install 'pokemon-scraper[brotli]')")
+
+    manifest: dict[str, dict[str, Any]] = {}
+    counts = {"written": 0, "unchanged": 0, "removed": 0}
+
+    # Compression dominates and releases the GIL, so run it on a pool
+    # while the single connection keeps producing documents.
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = []
+        for logical, payload in _documents(conn, per_page):
+            body = _encode(payload)
+            digest = hashlib.sha256(body).hexdigest()
+            old = previous.get(logical)
+            if (
+                old is not None
+                and old["sha256"] == digest
+                and ("br" in old) == (brotli_module is not None)
+                and (output_dir / old["hashed"]).exists()
+            ):
+                manifest[logical] = old
+                counts["unchanged"] += 1
+                continue
+            pending.append((logical, pool.submit(
+                _write_document, output_dir, logical, body, digest, brotli_module,
+            )))
+        for logical, future in pending:
+            manifest[logical] = future.result()
+            counts["written"] += 1
+
+    live_hashed = {entry["hashed"] for entry in manifest.values()}
+    for logical, entry in previous.items():
+        stale = [entry["hashed"]] if entry["hashed"] not in live_hashed else []
+        if logical not in manifest:
+            stale.append(logical)
+            counts["removed"] += 1
+        for name in stale:
+            for suffix in ("", ".gz", ".br"):
+                (output_dir / (name + suffix)).unlink(missing_ok=True)
+
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    manifest_path.write_text(
+        json.dumps(
+            {"per_page": per_page, "files": dict(sorted(manifest.items()))},
+            ensure_ascii=False,
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+    return counts
@@ -1,26 +1,44 @@
 import argparse
-import asyncio
 import signal
 import sys
+import tarfile
+import zipfile
+from functools import partial
 from pathlib import Path
 
 from src.config import Config
-from src.db.connection import create_connection
-from src.db.repository import get_scrape_status
-from src.export.csv_export import export_csv
-from src.export.json_export import export_json
-from src.scraper.pokemon_scraper import PokemonScraper
-from src.scraper.ability_scraper import run_ability_scraper
-from src.scraper.evolution_backfill import (
-    backfill_from_csv,
-    backfill_species_fields,
-    compute_evolution_fields,
+from src.db.connection import (
+    checkpoint_wal,
+    create_connection,
+    create_read_connection,
+    prepare_database,
 )
+from src.db.profiling import format_profile_report, load_profile, profile_path
+from src.db.repository import get_scrape_status, get_scraped_ids, mark_images_downloaded
+from src.db.snapshot import build_snapshot
+from src.export.compression import COMPRESSIONS, compression_suffix, infer_compression
+from src.export.csv_export import SPLIT_MODES, export_csv, export_csv_split, parse_columns
+from src.export.incremental import (
+    delta_path,
+    export_key,
+    export_state_path,
+    plan_export,
+    save_export_state,
+)
+from src.export.images import ARCHIVE_FORMATS, export_images, image_counts, import_images
+from src.export.json_export import FORMATS as JSON_FORMATS, export_json
+from src.export.static_api import export_static_api
 from src.cli.viewer import cmd_browse, cmd_search, cmd_info, cmd_filter
 from src.chatbot.chat_session import run_chat
 
+# Scraper modules pull in httpx/asyncio and are imported inside their
+# commands, so read-only commands such as `info` start quickly.
+
 
 def cmd_scrape(args: argparse.Namespace) -> None:
+    import asyncio
+    from src.scraper.pokemon_scraper import PokemonScraper
+
     config = Config(
         requests_per_second=args.rate,
     )
@@ -58,24 +76,66 @@ def cmd_status(_args: argparse.Namespace) -> None:
         print(f"Data scraped:       {status['data_scraped']}")
         print(f"Images downloaded:  {status['images_downloaded']}")
 
-        artwork_count = len(list(config.artwork_dir.glob("*.png"))) if config.artwork_dir.exists() else 0
-        sprite_count = len(list(config.sprite_dir.glob("*.png"))) if config.sprite_dir.exists() else 0
+        counts = image_counts(config.images_dir)
+        if counts is not None:
+            artwork_count, sprite_count = counts["artwork"], counts["sprites"]
+        else:
+            artwork_count = len(list(config.artwork_dir.glob("*.png"))) if config.artwork_dir.exists() else 0
+            sprite_count = len(list(config.sprite_dir.glob("*.png"))) if config.sprite_dir.exists() else 0
         print(f"Artwork files:      {artwork_count}")
         print(f"Sprite files:       {sprite_count}")
     finally:
         conn.close()
 
 
+def _export_since_last(conn, kind: str, output: Path, options: dict, export) -> None:
+    """Export only what changed since the last export of `output`.
+
+    The first run writes the full file to `output`; later runs leave it
+    alone and write each delta next to it (see delta_path).
+    """
+    state_path = export_state_path(Config().data_dir)
+    key = export_key(kind, output)
+    plan = plan_export(conn, state_path, key, output, options)
+    if plan is None:
+        print(f"No changes since last export; {output} is up to date.")
+        return
+    if plan.since_version is None:
+        export(output)
+    else:
+        export(
+            delta_path(output, plan.since_version),
+            since_version=plan.since_version, deleted_ids=plan.deleted_ids,
+        )
+    save_export_state(state_path, key, plan)
+
+
 def cmd_export_json(args: argparse.Namespace) -> None:
     config = Config()
     if not config.db_path.exists():
         print("No database found. Run 'scrape' first.")
         return
 
-    conn = create_connection(config.db_path)
-    try:
+    if args.output:
         output = Path(args.output)
-        export_json(conn, output)
+        compression = args.compress or infer_compression(output)
+    else:
+        compression = args.compress
+        output = Path(f"data/pokemon.{args.format}{compression_suffix(compression)}")
+
+    prepare_database(config.db_path)
+    conn = create_read_connection(config.db_path)
+    try:
+        export = partial(
+            export_json, conn, fmt=args.format, compression=compression,
+        )
+        if args.since_last:
+            options = {"format": args.format, "compression": compression}
+            _export_since_last(conn, "json", output, options, export)
+        else:
+            export(output)
+    except RuntimeError as e:
+        print(f"Export failed: {e}")
     finally:
         conn.close()
 
@@ -86,19 +146,148 @@ def cmd_export_csv(args: argparse.Namespace) -> None:
         print("No database found. Run 'scrape' first.")
         return
 
-    conn = create_connection(config.db_path)
     try:
-        output = Path(args.output)
-        export_csv(conn, output)
+        columns = parse_columns(args.columns)
+    except ValueError as e:
+        print(e)
+        return
+
+    output = Path(args.output)
+    compression = args.compress or infer_compression(output)
+    if compression and not args.output.endswith(compression_suffix(compression)):
+        output = Path(args.output + compression_suffix(compression))
+
+    if args.split_by and args.since_last:
+        print("--since-last cannot be combined with --split-by")
+        return
+    if args.since_last and "id" not in columns:
+        print("--since-last requires the id column")
+        return
+
+    prepare_database(config.db_path)
+    try:
+        if args.split_by:
+            export_csv_split(
+                config.db_path, output, args.split_by,
+                columns=columns, compression=compression,
+                max_workers=args.workers,
+            )
+            return
+
+        conn = create_read_connection(config.db_path)
+        try:
+            export = partial(
+                export_csv, conn, columns=columns, compression=compression,
+            )
+            if args.since_last:
+                options = {"columns": columns, "compression": compression}
+                _export_since_last(conn, "csv", output, options, export)
+            else:
+                export(output)
+        finally:
+            conn.close()
+    except RuntimeError as e:
+        print(f"Export failed: {e}")
+
+
+def cmd_export_static_api(args: argparse.Namespace) -> None:
+    config = Config()
+    if not config.db_path.exists():
+        print("No database found. Run 'scrape' first.")
+        return
+
+    output = Path(args.output)
+    prepare_database(config.db_path)
+    conn = create_read_connection(config.db_path)
+    try:
+        counts = export_static_api(
+            conn, output, per_page=args.per_page, max_workers=args.workers,
+        )
+    finally:
+        conn.close()
+    print(
+        f"Static API in {output}: {counts['written']} written, "
+        f"{counts['unchanged']} unchanged, {counts['removed']} removed"
+    )
+
+
+def cmd_render_static(args: argparse.Namespace) -> None:
+    from src.web.static_site import render_static_site
+
+    config = Config()
+    if not config.db_path.exists():
+        print("No database found. Run 'scrape' first.")
+        return
+
+    output = Path(args.output)
+    prepare_database(config.db_path)
+    conn = create_read_connection(config.db_path)
+    try:
+        counts = render_static_site(
+            conn, output, max_workers=args.workers, force=args.force,
+        )
     finally:
         conn.close()
 
+    images_link = output / "img"
+    images_dir = (config.data_dir / "images").resolve()
+    if not images_link.exists() and images_dir.exists():
+        images_link.symlink_to(images_dir, target_is_directory=True)
+
+    print(
+        f"Static site in {output}: {counts['rendered']} rendered, "
+        f"{counts['unchanged']} unchanged, {counts['removed']} removed"
+    )
+
+
+def cmd_export_images(args: argparse.Namespace) -> None:
+    config = Config()
+    count = export_images(
+        config.images_dir, args.output, fmt=args.format, max_workers=args.workers,
+    )
+    if args.output != "-":
+        print(f"Exported {count} images to {args.output}")
+
+
+def cmd_import_images(args: argparse.Namespace) -> None:
+    config = Config()
+    try:
+        result = import_images(
+            args.archive, config.images_dir,
+            fmt=args.format, max_workers=args.workers,
+        )
+    except (ValueError, OSError, tarfile.TarError, zipfile.BadZipFile) as e:
+        print(f"Import failed: {e}")
+        return
+
+    for error in result["errors"]:
+        print(f"  {error}")
+    print(f"Imported {result['imported']} images, {result['failed']} failed verification")
+
+    if config.db_path.exists():
+        conn = create_connection(config.db_path)
+        try:
+            downloaded = [
+                pid for pid in get_scraped_ids(conn)
+                if (config.artwork_dir / f"{pid}.png").exists()
+                and (config.sprite_dir / f"{pid}.png").exists()
+            ]
+            for pid in downloaded:
+                mark_images_downloaded(conn, pid)
+        finally:
+            conn.close()
+
 
 def cmd_scrape_abilities(_args: argparse.Namespace) -> None:
+    from src.scraper.ability_scraper import run_ability_scraper
     run_ability_scraper()
 
 
 def cmd_web(args: argparse.Namespace) -> None:
+    if not Config().db_path.exists():
+        print("No database found. Run 'scrape' first.")
+        return
+
     from src.web.app import create_app, socketio
     app = create_app()
     socketio.run(
@@ -111,6 +300,13 @@ def cmd_web(args: argparse.Namespace) -> None:
 
 
 def cmd_backfill_evolution(args: argparse.Namespace) -> None:
+    import asyncio
+    from src.scraper.evolution_backfill import (
+        backfill_from_csv,
+        backfill_species_fields,
+        compute_evolution_fields,
+    )
+
     config = Config(requests_per_second=args.rate)
     conn = create_connection(config.db_path)
     try:
@@ -127,6 +323,254 @@ def cmd_chat(_args: argparse.Namespace) -> None:
     run_chat()
 
 
+def cmd_snapshot(args: argparse.Namespace) -> None:
+    config = Config()
+    if not config.db_path.exists():
+        print("No database found. Run 'scrape' first.")
+        return
+
+    output = Path(args.output) if args.output else config.snapshot_path
+    conn = create_connection(config.db_path)
+    try:
+        # Flush the WAL first so closing this connection does not touch
+        # the database file after the snapshot is written.
+        checkpoint_wal(conn, "TRUNCATE")
+        count = build_snapshot(conn, output)
+    finally:
+        conn.close()
+    print(f"Wrote snapshot of {count} Pokemon to {output}")
+
+
+def cmd_replay(args: argparse.Namespace) -> None:
+    import json
+
+    from src.battle.replay import BattleRecord, load_and_replay
+
+    config = Config()
+    if not config.db_path.exists():
+        print("No database found. Run 'scrape' first.")
+        return
+
+    try:
+        record = BattleRecord.from_text(args.record)
+    except ValueError as e:
+        print(e)
+        return
+
+    prepare_database(config.db_path)
+    conn = create_read_connection(config.db_path)
+    try:
+        engine, events = load_and_replay(conn, record)
+    except ValueError as e:
+        print(f"Replay failed: {e}")
+        return
+    finally:
+        conn.close()
+
+    if args.json:
+        print(json.dumps(
+            {
+                "seed": record.seed,
+                "team1": record.team1,
+                "team2": record.team2,
+                "winner_team": engine.winner_team,
+                "events": [event.to_dict() for event in events],
+            },
+            ensure_ascii=False,
+            indent=2,
+        ))
+        return
+
+    for event in events:
+        line = (
+            f"Turn {event.turn}: {event.attacker_name} -> {event.defender_name} "
+            f"[{event.attack_type} x{event.effectiveness:g}] {event.damage} dmg, "
+            f"HP {event.defender_hp}/{event.defender_max_hp}"
+        )
+        print(line + (" (fainted)" if event.is_fainted else ""))
+    print(f"Team {engine.winner_team} wins in {engine.turn} turns (seed {record.seed})")
+
+
+def cmd_build_matchups(args: argparse.Namespace) -> None:
+    from src.battle.matchups import build_matchups
+
+    config = Config()
+    if not config.db_path.exists():
+        print("No database found. Run 'scrape' first.")
+        return
+
+    output = Path(args.output) if args.output else config.matchups_path
+    prepare_database(config.db_path)
+    conn = create_read_connection(config.db_path)
+    try:
+        counts = build_matchups(conn, output, force=args.force)
+    except RuntimeError as e:
+        print(e)
+        return
+    finally:
+        conn.close()
+    print(
+        f"Matchups for {counts['pokemon']} Pokemon in {output}: "
+        f"{counts['computed']} pairs computed, {counts['reused']} reused"
+    )
+
+
+def cmd_db_profile(args: argparse.Namespace) -> None:
+    path = profile_path(Config().data_dir)
+    if args.reset:
+        path.unlink(missing_ok=True)
+        print(f"Cleared {path}")
+        return
+
+    print(format_profile_report(
+        load_profile(path),
+        sort_by=args.sort,
+        limit=args.limit,
+        show_plans=args.plans,
+    ))
+
+
+def _parse_team(value: str) -> list[int]:
+    try:
+        return [int(part) for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid team: {value}") from None
+
+
+def _positive_int(value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value}") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1: {value}")
+    return number
+
+
+def cmd_simulate(args: argparse.Namespace) -> None:
+    import json
+
+    from src.battle.rules import PRESETS, validate_team
+    from src.battle.simulate import simulate
+    from src.db.queries import fetch_battle_stats, fetch_team_validation_data
+
+    config = Config()
+    if not config.db_path.exists():
+        print("No database found. Run 'scrape' first.")
+        return
+
+    prepare_database(config.db_path)
+    conn = create_read_connection(config.db_path)
+    try:
+        teams = [fetch_battle_stats(conn, ids) for ids in (args.team1, args.team2)]
+        rule_errors: list[list[str]] = [[], []]
+        if args.rules:
+            rule_errors = [
+                validate_team(PRESETS[args.rules], fetch_team_validation_data(conn, ids))
+                for ids in (args.team1, args.team2)
+            ]
+    finally:
+        conn.close()
+
+    team_ids = (args.team1, args.team2)
+    for number, (ids, team, errors) in enumerate(zip(team_ids, teams, rule_errors), 1):
+        missing = sorted(set(ids) - {stats.pokemon_id for stats in team})
+        if missing:
+            print(f"Team {number}: unknown Pokemon {', '.join(map(str, missing))}")
+            return
+        for error in errors:
+            print(f"Team {number}: {error}")
+    if any(rule_errors):
+        return
+
+    try:
+        result = simulate(
+            teams[0], teams[1],
+            battles=args.battles,
+            policy1=args.policy1,
+            policy2=args.policy2,
+            workers=args.workers,
+            seed=args.seed,
+            engine=args.engine,
+        )
+    except (ValueError, RuntimeError) as e:
+        print(f"Simulation failed: {e}")
+        return
+    if args.json:
+        print(json.dumps(result.to_dict(), indent=2))
+        return
+
+    low, high = result.win_rate1_ci
+    rate = result.battles / result.elapsed if result.elapsed else float("inf")
+    print(f"{result.battles} battles in {result.elapsed:.2f}s ({rate:,.0f}/s), seed {result.seed}")
+    print(
+        f"Team 1 wins: {result.wins1} ({result.win_rate1:.2%}, "
+        f"95% CI {low:.2%}-{high:.2%}); team 2 wins: {result.wins2}"
+    )
+    print(
+        f"Turns: mean {result.turns['mean']:.1f}, "
+        f"p50 {result.turns['p50']:.0f}, p95 {result.turns['p95']:.0f}"
+    )
+    for number, damage in ((1, result.damage1), (2, result.damage2)):
+        print(
+            f"Team {number} damage: mean {damage['mean']:.0f}, p5 {damage['p5']:.0f}, "
+            f"p50 {damage['p50']:.0f}, p95 {damage['p95']:.0f}"
+        )
+
+
+def cmd_suggest_team(args: argparse.Namespace) -> None:
+    import json
+
+    from src.battle.rules import PRESETS
+    from src.battle.team_builder import suggest_teams
+    from src.db.queries import fetch_battle_stats
+
+    config = Config()
+    if not config.db_path.exists():
+        print("No database found. Run 'scrape' first.")
+        return
+
+    prepare_database(config.db_path)
+    conn = create_read_connection(config.db_path)
+    try:
+        try:
+            result = suggest_teams(
+                conn,
+                PRESETS[args.rules],
+                size=args.size,
+                count=args.count,
+                budget=args.budget,
+                workers=args.workers,
+                seed=args.seed,
+                restarts=args.restarts,
+                matchups_path=config.matchups_path,
+            )
+        except ValueError as e:
+            print(f"Cannot build a team: {e}")
+            return
+        names = [
+            fetch_battle_stats(conn, list(team.pokemon_ids)) for team in result.teams
+        ]
+    finally:
+        conn.close()
+
+    if args.json:
+        print(json.dumps(result.to_dict(), ensure_ascii=False, indent=2))
+        return
+
+    print(
+        f"{result.candidates} candidates, {result.restarts} searches in "
+        f"{result.elapsed:.2f}s (win score from {result.source}), seed {result.seed}"
+    )
+    for rank, (team, members) in enumerate(zip(result.teams, names), 1):
+        win_rate = f", win rate {team.win_rate:.1%} over {team.battles}" if team.battles else ""
+        print(
+            f"{rank}. score {team.score:.3f} (types {team.type_score:.2f}, "
+            f"1v1 {team.win_score:.2f}){win_rate}"
+        )
+        print("   " + ", ".join(f"#{p.pokemon_id} {p.name_zh}" for p in members))
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Pokemon Data Scraper - fetch from PokeAPI",
@@ -163,8 +607,20 @@ def main() -> None:
         "export-json", help="Export data to JSON",
     )
     json_parser.add_argument(
-        "--output", default="data/pokemon.json",
-        help="Output file path (default: data/pokemon.json)",
+        "--output", default=None,
+        help="Output file path (default: data/pokemon.<format>[.gz|.zst])",
+    )
+    json_parser.add_argument(
+        "--format", choices=JSON_FORMATS, default="json",
+        help="json: indented array; ndjson: one record per line",
+    )
+    json_parser.add_argument(
+        "--compress", choices=COMPRESSIONS, default=None,
+        help="Compress output (default: inferred from .gz/.zst suffix)",
+    )
+    json_parser.add_argument(
+        "--since-last", action="store_true",
+        help="Only write records changed since the last export (plus tombstones)",
     )
     json_parser.set_defaults(func=cmd_export_json)
 
@@ -175,8 +631,95 @@ def main() -> None:
         "--output", default="data/pokemon.csv",
         help="Output file path (default: data/pokemon.csv)",
     )
+    csv_parser.add_argument(
+        "--columns", default=None,
+        help="Comma-separated columns to export (default: all)",
+    )
+    csv_parser.add_argument(
+        "--compress", choices=COMPRESSIONS, default=None,
+        help="Compress output (default: inferred from .gz/.zst suffix)",
+    )
+    csv_parser.add_argument(
+        "--split-by", choices=SPLIT_MODES, default=None,
+        help="Write one file per generation or type",
+    )
+    csv_parser.add_argument(
+        "--workers", type=_positive_int, default=4,
+        help="Parallel writers for --split-by (default: 4)",
+    )
+    csv_parser.add_argument(
+        "--since-last", action="store_true",
+        help="Only write rows changed since the last export (plus tombstones)",
+    )
     csv_parser.set_defaults(func=cmd_export_csv)
 
+    static_parser = subparsers.add_parser(
+        "export-static-api", help="Export the battle JSON API as static files",
+    )
+    static_parser.add_argument(
+        "--output", default="data/static_api",
+        help="Output directory (default: data/static_api)",
+    )
+    static_parser.add_argument(
+        "--per-page", type=int, default=24,
+        help="Pokemon per list page (default: 24)",
+    )
+    static_parser.add_argument(
+        "--workers", type=_positive_int, default=4,
+        help="Parallel compression workers (default: 4)",
+    )
+    static_parser.set_defaults(func=cmd_export_static_api)
+
+    render_parser = subparsers.add_parser(
+        "render-static", help="Render the Pokedex web pages to static HTML",
+    )
+    render_parser.add_argument(
+        "--output", default="data/site",
+        help="Output directory (default: data/site)",
+    )
+    render_parser.add_argument(
+        "--workers", type=_positive_int, default=4,
+        help="Parallel render processes (default: 4)",
+    )
+    render_parser.add_argument(
+        "--force", action="store_true",
+        help="Re-render every page, ignoring the previous render state",
+    )
+    render_parser.set_defaults(func=cmd_render_static)
+
+    export_images_parser = subparsers.add_parser(
+        "export-images", help="Stream all images into a tar/zip bundle",
+    )
+    export_images_parser.add_argument(
+        "--output", default="data/images.tar",
+        help="Archive path, or - for stdout (default: data/images.tar)",
+    )
+    export_images_parser.add_argument(
+        "--format", choices=ARCHIVE_FORMATS, default=None,
+        help="Archive format (default: inferred from --output)",
+    )
+    export_images_parser.add_argument(
+        "--workers", type=_positive_int, default=4,
+        help="Parallel hashing workers (default: 4)",
+    )
+    export_images_parser.set_defaults(func=cmd_export_images)
+
+    import_images_parser = subparsers.add_parser(
+        "import-images", help="Verify and extract an image bundle",
+    )
+    import_images_parser.add_argument(
+        "archive", help="Archive made by export-images, or - for stdin (tar only)",
+    )
+    import_images_parser.add_argument(
+        "--format", choices=ARCHIVE_FORMATS, default=None,
+        help="Archive format (default: inferred from the file name)",
+    )
+    import_images_parser.add_argument(
+        "--workers", type=_positive_int, default=4,
+        help="Parallel verification workers (default: 4)",
+    )
+    import_images_parser.set_defaults(func=cmd_import_images)
+
     browse_parser = subparsers.add_parser(
         "browse", help="Browse Pokemon interactively",
     )
@@ -248,6 +791,113 @@ def main() -> None:
     )
     chat_parser.set_defaults(func=cmd_chat)
 
+    snapshot_parser = subparsers.add_parser(
+        "snapshot", help="Build the binary snapshot used for fast lookups",
+    )
+    snapshot_parser.add_argument("action", choices=["build"])
+    snapshot_parser.add_argument(
+        "--output", default=None,
+        help="Output file path (default: data/pokemon.snap)",
+    )
+    snapshot_parser.set_defaults(func=cmd_snapshot)
+
+    replay_parser = subparsers.add_parser(
+        "replay", help="Re-run a recorded battle and print every turn",
+    )
+    replay_parser.add_argument(
+        "record", help="Replay code from a battle_end event or the server log",
+    )
+    replay_parser.add_argument("--json", action="store_true", help="Print events as JSON")
+    replay_parser.set_defaults(func=cmd_replay)
+
+    matchups_parser = subparsers.add_parser(
+        "build-matchups",
+        help="Precompute 1v1 damage and win probability for every pair of Pokemon",
+    )
+    matchups_parser.add_argument(
+        "--output", default=None,
+        help="Output file path (default: data/matchups.bin)",
+    )
+    matchups_parser.add_argument(
+        "--force", action="store_true",
+        help="Recompute every pair instead of only changed Pokemon",
+    )
+    matchups_parser.set_defaults(func=cmd_build_matchups)
+
+    profile_parser = subparsers.add_parser(
+        "db-profile",
+        help="Show slowest SQL statements recorded with POKEMON_DB_PROFILE=1",
+    )
+    profile_parser.add_argument(
+        "--sort", default="total", choices=["total", "count", "max", "avg"],
+    )
+    profile_parser.add_argument("--limit", type=int, default=20)
+    profile_parser.add_argument(
+        "--plans", action="store_true",
+        help="Include captured EXPLAIN QUERY PLAN output",
+    )
+    profile_parser.add_argument(
+        "--reset", action="store_true",
+        help="Delete recorded profile data",
+    )
+    profile_parser.set_defaults(func=cmd_db_profile)
+
+    simulate_parser = subparsers.add_parser(
+        "simulate", help="Run headless battles between two teams and report win rates",
+    )
+    simulate_parser.add_argument(
+        "--team1", type=_parse_team, required=True, help="Comma-separated Pokemon IDs",
+    )
+    simulate_parser.add_argument(
+        "--team2", type=_parse_team, required=True, help="Comma-separated Pokemon IDs",
+    )
+    simulate_parser.add_argument("-n", "--battles", type=int, default=10000)
+    simulate_parser.add_argument(
+        "--policy1", default="first", choices=["first", "best", "random"],
+        help="Switch policy for team 1 after a faint (default: first, like auto_switch)",
+    )
+    simulate_parser.add_argument(
+        "--policy2", default="first", choices=["first", "best", "random"],
+    )
+    simulate_parser.add_argument(
+        "--workers", type=_positive_int, default=None,
+        help="Worker processes (default: CPU count)",
+    )
+    simulate_parser.add_argument("--seed", type=int, default=None)
+    simulate_parser.add_argument(
+        "--engine", default="turn", choices=["turn", "batch"],
+        help="batch: NumPy engine, auto-switch only (needs the numpy extra)",
+    )
+    simulate_parser.add_argument(
+        "--rules", default=None, choices=["无限制", "标准", "严格"],
+        help="Reject teams that break a room rules preset",
+    )
+    simulate_parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    simulate_parser.set_defaults(func=cmd_simulate)
+
+    suggest_parser = subparsers.add_parser(
+        "suggest-team", help="Search for strong teams that satisfy a room rules preset",
+    )
+    suggest_parser.add_argument(
+        "--rules", default="标准", choices=["无限制", "标准", "严格"],
+    )
+    suggest_parser.add_argument("--size", type=int, default=6)
+    suggest_parser.add_argument("--count", type=int, default=3, help="Teams to show")
+    suggest_parser.add_argument(
+        "--budget", type=float, default=2.0, help="Time budget in seconds",
+    )
+    suggest_parser.add_argument(
+        "--workers", type=_positive_int, default=None,
+        help="Worker processes (default: CPU count)",
+    )
+    suggest_parser.add_argument("--seed", type=int, default=None)
+    suggest_parser.add_argument(
+        "--restarts", type=int, default=None,
+        help="Fixed number of searches per worker, for reproducible results",
+    )
+    suggest_parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    suggest_parser.set_defaults(func=cmd_suggest_team)
+
     args = parser.parse_args()
     args.func(args)
 
@@ -6,6 +6,7 @@ from tqdm import tqdm
 from src.api.client import RateLimitedClient
 from src.api.endpoints import ability_url
 from src.config import Config
+from src.db.repository import rebuild_pokemon_full, touch_pokemon
 
 
 def _get_pending_ability_ids(conn: sqlite3.Connection) -> list[int]:
@@ -41,15 +42,26 @@ async def _scrape_abilities(config: Config, conn: sqlite3.Connection) -> None:
             try:
                 data = await client.get_json(url)
                 flavor_text = _extract_flavor_text_zh(data)
-                conn.execute(
-                    "UPDATE pokemon_abilities SET flavor_text_zh = ? WHERE ability_id = ?",
-                    (flavor_text, aid),
-                )
+                changed = conn.execute(
+                    "UPDATE pokemon_abilities SET flavor_text_zh = ? "
+                    "WHERE ability_id = ? AND flavor_text_zh IS NOT ?",
+                    (flavor_text, aid, flavor_text),
+                ).rowcount
+                if changed:
+                    # Ability text is part of every exported record.
+                    touch_pokemon(conn, [
+                        row[0] for row in conn.execute(
+                            "SELECT DISTINCT pokemon_id FROM pokemon_abilities WHERE ability_id = ?",
+                            (aid,),
+                        )
+                    ])
                 conn.commit()
                 progress.set_postfix(id=aid)
             except Exception as exc:
                 tqdm.write(f"Failed ability {aid}: {exc}")
 
+    rebuild_pokemon_full(conn)
+
     total = conn.execute(
         "SELECT COUNT(DISTINCT ability_id) AS c FROM pokemon_abilities WHERE flavor_text_zh != ''"
     ).fetchone()["c"]
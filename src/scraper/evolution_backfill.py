@@ -15,6 +15,11 @@ from src.api.client import RateLimitedClient
 from src.api.endpoints import species_url
 from src.api.parsers import extract_species_id
 from src.config import Config
+from src.db.repository import (
+    rebuild_evolution_closure,
+    rebuild_pokemon_full,
+    touch_pokemon,
+)
 
 CSV_URL = (
     "https://raw.githubusercontent.com/PokeAPI/pokeapi/"
@@ -22,6 +27,27 @@ CSV_URL = (
 )
 
 
+# Only rows whose values change are touched, so unchanged pokemon keep
+# their row_version and stay out of --since-last exports.
+_UPDATE_SPECIES = """
+    UPDATE pokemon
+    SET is_legendary = ?1,
+        is_mythical = ?2,
+        evolves_from_species_id = ?3
+    WHERE id = ?4
+      AND (is_legendary IS NOT ?1
+           OR is_mythical IS NOT ?2
+           OR evolves_from_species_id IS NOT ?3)
+"""
+
+
+def _evolution_fields(conn: sqlite3.Connection) -> dict[int, tuple]:
+    return {
+        row[0]: (row[1], row[2])
+        for row in conn.execute("SELECT id, evolution_stage, is_fully_evolved FROM pokemon")
+    }
+
+
 async def backfill_species_fields(
     config: Config,
     conn: sqlite3.Connection,
@@ -49,16 +75,12 @@ async def backfill_species_fields(
                     data.get("evolves_from_species"),
                 )
 
-                conn.execute(
-                    """
-                    UPDATE pokemon
-                    SET is_legendary = ?,
-                        is_mythical = ?,
-                        evolves_from_species_id = ?
-                    WHERE id = ?
-                    """,
+                result = conn.execute(
+                    _UPDATE_SPECIES,
                     (is_legendary, is_mythical, evolves_from, pid),
                 )
+                if result.rowcount > 0:
+                    touch_pokemon(conn, [pid])
                 conn.commit()
             except Exception as exc:
                 print(f"  Error backfilling #{pid}: {exc}")
@@ -78,7 +100,7 @@ def backfill_from_csv(conn: sqlite3.Connection) -> None:
     resp.raise_for_status()
 
     reader = csv.DictReader(io.StringIO(resp.text))
-    updated = 0
+    updated: list[int] = []
     for row in reader:
         species_id = int(row["id"])
         is_legendary = int(row["is_legendary"])
@@ -90,26 +112,22 @@ def backfill_from_csv(conn: sqlite3.Connection) -> None:
         )
 
         result = conn.execute(
-            """
-            UPDATE pokemon
-            SET is_legendary = ?,
-                is_mythical = ?,
-                evolves_from_species_id = ?
-            WHERE id = ?
-            """,
+            _UPDATE_SPECIES,
             (is_legendary, is_mythical, evolves_from, species_id),
         )
         if result.rowcount > 0:
-            updated += 1
+            updated.append(species_id)
 
+    touch_pokemon(conn, updated)
     conn.commit()
-    print(f"CSV backfill complete: {updated} pokemon updated.")
+    print(f"CSV backfill complete: {len(updated)} pokemon updated.")
     compute_evolution_fields(conn)
 
 
 def compute_evolution_fields(conn: sqlite3.Connection) -> None:
     """Compute evolution_stage and is_fully_evolved from evolves_from_species_id."""
     print("Computing evolution stages...")
+    before = _evolution_fields(conn)
 
     # Each UPDATE below is visible to subsequent queries within the same
     # SQLite transaction (SQLite reads see uncommitted writes from the
@@ -164,7 +182,11 @@ def compute_evolution_fields(conn: sqlite3.Connection) -> None:
         """
     )
 
+    after = _evolution_fields(conn)
+    touch_pokemon(conn, [pid for pid, fields in after.items() if before.get(pid) != fields])
     conn.commit()
+    rebuild_evolution_closure(conn)
+    rebuild_pokemon_full(conn)
     print("Evolution fields computed.")
 
     stats = conn.execute(
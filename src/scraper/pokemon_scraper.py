@@ -15,16 +15,25 @@ from src.api.parsers import (
     parse_type,
 )
 from src.config import Config
+from src.db.connection import checkpoint_wal
 from src.db.repository import (
-    mark_data_scraped,
     mark_images_downloaded,
-    upsert_pokemon,
+    mark_many_data_scraped,
+    rebuild_evolution_closure,
+    rebuild_pokemon_full,
+    upsert_many_pokemon,
     upsert_type,
 )
+from src.export.images import build_image_manifest
 from src.models import Pokemon, PokemonAbility, PokemonType
 from src.scraper.image_downloader import download_pokemon_images
 from src.scraper.progress import get_pending_image_ids, get_pending_pokemon_ids
 
+# Scraped records are written in batches of this size; each flush is one
+# transaction followed by a WAL checkpoint so readers cannot pin an
+# ever-growing WAL.
+_FLUSH_EVERY = 50
+
 
 class PokemonScraper:
     def __init__(self, config: Config, conn: sqlite3.Connection) -> None:
@@ -118,6 +127,14 @@ class PokemonScraper:
             print(f"  Error scraping Pokemon #{pokemon_id}: {exc}")
             return None
 
+    def _flush(self, batch: list[Pokemon]) -> None:
+        if not batch:
+            return
+        upsert_many_pokemon(self._conn, batch)
+        mark_many_data_scraped(self._conn, [p.id for p in batch])
+        checkpoint_wal(self._conn)
+        batch.clear()
+
     async def scrape_data(
         self,
         start: int,
@@ -131,18 +148,27 @@ class PokemonScraper:
         print(f"Scraping data for {len(pending)} Pokemon "
               f"({start}-{end}, {end - start + 1 - len(pending)} cached)...")
 
+        batch: list[Pokemon] = []
         async with RateLimitedClient(self._config) as client:
             progress = tqdm(pending, desc="Fetching data", unit="pokemon")
-            for pokemon_id in progress:
-                if self._interrupted:
-                    print("\nInterrupted. Progress saved.")
-                    break
-
-                progress.set_postfix(id=pokemon_id)
-                pokemon = await self._scrape_single(client, pokemon_id)
-                if pokemon:
-                    upsert_pokemon(self._conn, pokemon)
-                    mark_data_scraped(self._conn, pokemon_id)
+            try:
+                for pokemon_id in progress:
+                    if self._interrupted:
+                        print("\nInterrupted. Progress saved.")
+                        break
+
+                    progress.set_postfix(id=pokemon_id)
+                    pokemon = await self._scrape_single(client, pokemon_id)
+                    if pokemon:
+                        batch.append(pokemon)
+                    if len(batch) >= _FLUSH_EVERY:
+                        self._flush(batch)
+            finally:
+                self._flush(batch)
+
+        rebuild_pokemon_full(self._conn)
+        rebuild_evolution_closure(self._conn)
+        checkpoint_wal(self._conn, "TRUNCATE")
 
     async def download_images(
         self,
@@ -156,6 +182,7 @@ class PokemonScraper:
 
         print(f"Downloading images for {len(pending)} Pokemon...")
 
+        downloaded = 0
         async with RateLimitedClient(self._config) as client:
             progress = tqdm(pending, desc="Downloading images", unit="pokemon")
             for pokemon_id in progress:
@@ -169,6 +196,11 @@ class PokemonScraper:
                 )
                 if success:
                     mark_images_downloaded(self._conn, pokemon_id)
+                    downloaded += 1
+
+        if downloaded:
+            # Keep the manifest current; only the new files are hashed.
+            build_image_manifest(self._config.images_dir)
 
     async def run(
         self,
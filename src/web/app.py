@@ -1,11 +1,19 @@
 import os
+import socket
 from pathlib import Path
 
 from flask import Flask, g, send_from_directory
 from flask_socketio import SocketIO
 
 from src.config import Config
-from src.db.connection import create_connection, ensure_evolution_data
+from src.db.connection import (
+    create_connection,
+    create_read_connection,
+    ensure_evolution_closure,
+    ensure_evolution_data,
+    ensure_pokemon_full,
+)
+from src.db.executor import DBExecutor
 from src.web.filters import register_filters
 from src.web.routes import bp
 from src.web.battle_routes import battle_bp
@@ -25,16 +33,27 @@ def create_app() -> Flask:
     )
     app.config["DB_PATH"] = config.db_path
     app.config["DATA_DIR"] = config.data_dir
+    app.config["MATCHUPS_PATH"] = config.matchups_path
     app.config["SECRET_KEY"] = os.environ.get(
         "SECRET_KEY", os.urandom(32).hex()
     )
 
-    if config.db_path.exists():
-        startup_conn = create_connection(config.db_path)
-        try:
-            ensure_evolution_data(startup_conn)
-        finally:
-            startup_conn.close()
+    # Request handlers open read-only connections, so the schema and
+    # derived tables must be in place before the first request.
+    # create_connection() would create an empty database instead.
+    if not config.db_path.exists():
+        raise FileNotFoundError(
+            f"No database at {config.db_path}. Run 'pokemon-scraper scrape' first."
+        )
+    startup_conn = create_connection(config.db_path)
+    try:
+        ensure_evolution_data(startup_conn)
+        ensure_pokemon_full(startup_conn)
+        ensure_evolution_closure(startup_conn)
+    finally:
+        startup_conn.close()
+
+    app.extensions["db_executor"] = DBExecutor(config.db_path)
 
     register_filters(app)
     app.register_blueprint(bp)
@@ -45,10 +64,35 @@ def create_app() -> Flask:
         allowed_origins = "*"
     else:
         allowed_origins = [o.strip() for o in origins.split(",") if o.strip()]
-    socketio.init_app(app, cors_allowed_origins=allowed_origins)
 
-    from src.web.socket_events import register_events
-    register_events(socketio)
+    # POKEMON_ROOM_BACKEND=sqlite lets several worker processes (behind a
+    # proxy with sticky sessions) host rooms together through data/rooms.db.
+    backend = os.environ.get("POKEMON_ROOM_BACKEND", "memory")
+    if backend not in ("memory", "sqlite"):
+        raise ValueError(f"Unknown POKEMON_ROOM_BACKEND: {backend}")
+    queue = None
+    manager_options = {}
+    if backend == "sqlite":
+        from src.web.message_queue import LocalMessageQueue, SQLiteClientManager
+        queue = LocalMessageQueue(config.rooms_db_path)
+        manager_options["client_manager"] = SQLiteClientManager(queue)
+    socketio.init_app(app, cors_allowed_origins=allowed_origins, **manager_options)
+
+    from src.web.socket_events import configure_rooms, register_events
+    register_events(socketio, app.extensions["db_executor"])
+    if queue is not None:
+        from src.battle.room_store import SQLiteRoomDirectory
+        worker_id = os.environ.get("POKEMON_WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+        configure_rooms(
+            socketio, app, SQLiteRoomDirectory(config.rooms_db_path), worker_id, queue,
+        )
+
+    # Behind N reverse proxies, take client addresses (used for the per-IP
+    # socket event limits) from X-Forwarded-For.
+    proxies = int(os.environ.get("POKEMON_PROXIES", "0"))
+    if proxies:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies)
 
     @app.teardown_appcontext
     def close_db(_exc: BaseException | None) -> None:
@@ -68,11 +112,11 @@ def create_app() -> Flask:
 def _inject_db() -> None:
     if "db" not in g:
         from flask import current_app
-        g.db = create_connection(current_app.config["DB_PATH"])
+        g.db = create_read_connection(current_app.config["DB_PATH"])
 
 
 @battle_bp.before_request
 def _inject_db_battle() -> None:
     if "db" not in g:
         from flask import current_app
-        g.db = create_connection(current_app.config["DB_PATH"])
+        g.db = create_read_connection(current_app.config["DB_PATH"])
@@ -1,13 +1,22 @@
 import sqlite3
+import threading
+import time
 
-from flask import Blueprint, render_template, jsonify, request
+from flask import Blueprint, abort, current_app, render_template, jsonify, request
 
+from src.battle.matchups import open_matchups
+from src.battle.rules import parse_rules_from_data
+from src.battle.team_builder import suggest_teams
 from src.db.queries import (
+    fetch_battle_stats,
+    fetch_pokemon_by_ids,
     fetch_pokemon_page,
     search_pokemon,
-    get_total_count,
+    get_total_count_cached,
     filter_pokemon,
     fetch_all_types,
+    make_cursor,
+    parse_cursor,
 )
 
 battle_bp = Blueprint(
@@ -44,8 +53,7 @@ def api_pokemon():
     type_name = request.args.get("type", "").strip() or None
     gen = request.args.get("gen", type=int)
     sort_by = request.args.get("sort", "id").strip()
-    page = request.args.get("page", 1, type=int)
-    per_page = 24
+    per_page = min(max(1, request.args.get("limit", 24, type=int)), 100)
 
     if q:
         results = search_pokemon(conn, q)
@@ -53,27 +61,43 @@ def api_pokemon():
         return jsonify({"pokemon": pokemon_list, "total": len(pokemon_list)})
 
     has_filters = type_name is not None or gen is not None or sort_by != "id"
-    if has_filters:
-        results = filter_pokemon(
-            conn,
-            type_name=type_name,
-            gen=gen,
-            sort_by=sort_by,
-            limit=200,
-        )
-        pokemon_list = [dict(row) for row in results]
-        return jsonify({"pokemon": pokemon_list, "total": len(pokemon_list)})
 
-    total = get_total_count(conn)
-    offset = (max(1, page) - 1) * per_page
-    results = fetch_pokemon_page(conn, offset=offset, limit=per_page)
-    pokemon_list = [dict(row) for row in results]
-    return jsonify({
-        "pokemon": pokemon_list,
-        "total": total,
-        "page": page,
+    if "page" in request.args and not has_filters:
+        page = request.args.get("page", 1, type=int)
+        total = get_total_count_cached(conn, str(current_app.config["DB_PATH"]))
+        offset = (max(1, page) - 1) * per_page
+        results = fetch_pokemon_page(conn, offset=offset, limit=per_page)
+        pokemon_list = [dict(row) for row in results]
+        return jsonify({
+            "pokemon": pokemon_list,
+            "total": total,
+            "page": page,
+            "per_page": per_page,
+        })
+
+    results = filter_pokemon(
+        conn,
+        type_name=type_name,
+        gen=gen,
+        sort_by=sort_by,
+        limit=per_page + 1,
+        after=parse_cursor(request.args.get("cursor")),
+    )
+    rows = results[:per_page]
+    next_cursor = None
+    if len(results) > per_page:
+        next_cursor = make_cursor(rows[-1], sort_by)
+
+    response = {
+        "pokemon": [dict(row) for row in rows],
         "per_page": per_page,
-    })
+        "next_cursor": next_cursor,
+    }
+    if not has_filters:
+        response["total"] = get_total_count_cached(
+            conn, str(current_app.config["DB_PATH"]),
+        )
+    return jsonify(response)
 
 
 @battle_bp.route("/api/types")
@@ -81,3 +105,140 @@ def api_types():
     conn = _get_db()
     rows = fetch_all_types(conn)
     return jsonify({"types": [dict(row) for row in rows]})
+
+
+def _get_matchups():
+    table = open_matchups(current_app.config["MATCHUPS_PATH"])
+    if table is None:
+        abort(503, description="对战数据未生成，请先运行 build-matchups")
+    return table
+
+
+@battle_bp.route("/api/matchup")
+def api_matchup():
+    attacker = request.args.get("attacker", type=int)
+    defender = request.args.get("defender", type=int)
+    if attacker is None or defender is None:
+        abort(400)
+    record = _get_matchups().lookup(attacker, defender)
+    if record is None:
+        abort(404)
+    return jsonify(record)
+
+
+@battle_bp.route("/api/counters/<int:pokemon_id>")
+def api_counters(pokemon_id: int):
+    limit = min(max(1, request.args.get("limit", 10, type=int)), 50)
+    counters = _get_matchups().counters(pokemon_id, limit)
+    names = {
+        stats.pokemon_id: stats
+        for stats in fetch_battle_stats(_get_db(), [c["attacker_id"] for c in counters])
+    }
+    for record in counters:
+        stats = names.get(record["attacker_id"])
+        record["name_zh"] = stats.name_zh if stats else ""
+        record["name_en"] = stats.name_en if stats else ""
+    return jsonify({"pokemon_id": pokemon_id, "counters": counters})
+
+
+_SUGGEST_BUDGET = 1.5
+# Suggestions are reused per (rules, size, count) for this long; a
+# search is CPU-bound and runs in the web process next to the battles.
+_SUGGEST_TTL = 600.0
+_SUGGEST_CACHE_SIZE = 64
+# A client may trigger a new search at most this often.
+_SUGGEST_INTERVAL = 10.0
+_suggest_cache: dict[tuple, tuple[float, dict]] = {}
+_suggest_clients: dict[str, float] = {}
+# Guards _suggest_cache and _suggest_clients.
+_suggest_state_lock = threading.Lock()
+# Only one search runs at a time.
+_suggest_lock = threading.Lock()
+
+
+def _cached_suggestion(key: tuple, now: float) -> dict | None:
+    with _suggest_state_lock:
+        cached = _suggest_cache.get(key)
+    if cached is not None and now - cached[0] < _SUGGEST_TTL:
+        return cached[1]
+    return None
+
+
+def _suggest_throttled(client: str, now: float) -> bool:
+    """True if `client` started a search within _SUGGEST_INTERVAL;
+    otherwise records this one. Call only once the search will run."""
+    with _suggest_state_lock:
+        for key in [k for k, t in _suggest_clients.items() if now - t >= _SUGGEST_INTERVAL]:
+            del _suggest_clients[key]
+        if client in _suggest_clients:
+            return True
+        _suggest_clients[client] = now
+        return False
+
+
+@battle_bp.route("/api/suggest-team")
+def api_suggest_team():
+    """Suggest teams for a room's rules: ?preset=标准, or the custom rule
+    fields max_legendary / max_stat_total / fully_evolved_only.
+
+    Results are cached; new searches are limited per client and run one
+    at a time (429 otherwise)."""
+    rules = parse_rules_from_data({
+        "preset": request.args.get("preset"),
+        "max_legendary": request.args.get("max_legendary"),
+        "max_stat_total": request.args.get("max_stat_total"),
+        "fully_evolved_only": request.args.get("fully_evolved_only") in ("1", "true"),
+    })
+    size = request.args.get("size", 6, type=int)
+    count = min(max(1, request.args.get("count", 3, type=int)), 5)
+    matchups_path = current_app.config["MATCHUPS_PATH"]
+    # A rebuilt matchup table changes the scores, so it is part of the key.
+    matchups_mtime = matchups_path.stat().st_mtime if matchups_path.exists() else None
+    key = (rules, size, count, matchups_mtime)
+    now = time.monotonic()
+    cached = _cached_suggestion(key, now)
+    if cached is not None:
+        return jsonify(cached)
+
+    # A request turned away because another search is running does not
+    # count against the client's interval.
+    if not _suggest_lock.acquire(blocking=False):
+        return jsonify({"error": "正在计算其他推荐，请稍后再试"}), 429
+    try:
+        # The search that held the lock may have been for the same key.
+        cached = _cached_suggestion(key, time.monotonic())
+        if cached is not None:
+            return jsonify(cached)
+        if _suggest_throttled(request.remote_addr or "", now):
+            return jsonify({"error": "推荐队伍请求过于频繁，请稍后再试"}), 429
+        response = _compute_suggestion(rules, size, count, matchups_path)
+        with _suggest_state_lock:
+            if len(_suggest_cache) >= _SUGGEST_CACHE_SIZE:
+                del _suggest_cache[min(_suggest_cache, key=lambda k: _suggest_cache[k][0])]
+            _suggest_cache[key] = (time.monotonic(), response)
+    finally:
+        _suggest_lock.release()
+    return jsonify(response)
+
+
+def _compute_suggestion(rules, size: int, count: int, matchups_path) -> dict:
+    conn = _get_db()
+    try:
+        result = suggest_teams(
+            conn,
+            rules,
+            size=size,
+            count=count,
+            budget=_SUGGEST_BUDGET,
+            workers=1,
+            matchups_path=matchups_path,
+        )
+    except ValueError as e:
+        abort(400, description=str(e))
+
+    response = result.to_dict()
+    for team in response["teams"]:
+        team["pokemon"] = [
+            dict(row) for row in fetch_pokemon_by_ids(conn, team["pokemon_ids"])
+        ]
+    return response
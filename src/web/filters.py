@@ -58,9 +58,14 @@ def pokemon_id_str(pid: int) -> str:
     return f"#{pid:04d}"
 
 
+FILTERS = {
+    "type_color": type_color,
+    "type_badge": type_badge,
+    "stat_percent": stat_percent,
+    "stat_color": stat_color,
+    "pokemon_id_str": pokemon_id_str,
+}
+
+
 def register_filters(app: object) -> None:
-    app.jinja_env.filters["type_color"] = type_color
-    app.jinja_env.filters["type_badge"] = type_badge
-    app.jinja_env.filters["stat_percent"] = stat_percent
-    app.jinja_env.filters["stat_color"] = stat_color
-    app.jinja_env.filters["pokemon_id_str"] = pokemon_id_str
+    app.jinja_env.filters.update(FILTERS)
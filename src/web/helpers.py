@@ -30,3 +30,13 @@ class Pagination:
         start = max(1, self.page - 2)
         end = min(self.total_pages, self.page + 2)
         return list(range(start, end + 1))
+
+
+@dataclass(frozen=True)
+class CursorPagination:
+    per_page: int
+    total: int
+    first_id: int | None
+    last_id: int | None
+    has_prev: bool
+    has_next: bool
@@ -0,0 +1,128 @@
+"""Local message queue for running the battle server as several processes.
+
+A stand-in for Redis/Kafka when every worker runs on one host: messages
+are rows in a SQLite table (data/rooms.db), published with an INSERT and
+received by polling for ids above the last one seen. Publishing only
+puts the message on an in-memory queue; a writer thread INSERTs them in
+order, so callers (handlers, scheduler callbacks) never wait on the
+file lock. Two things use it:
+
+- SQLiteClientManager, a python-socketio PubSubManager, so an emit to a
+  room or sid reaches clients connected to any worker;
+- the room router in src.web.socket_events, which forwards a player's
+  events to the worker that owns the player's room.
+
+Old messages are deleted after `retention` seconds.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any
+
+from socketio import PubSubManager
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_channel ON messages(channel, id);
+"""
+
+
+class LocalMessageQueue:
+    def __init__(self, path: Path, poll: float = 0.02, retention: float = 60.0) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._path = path
+        self._poll = poll
+        self._retention = retention
+        self._conn = self._connect()
+        self._conn.executescript(_SCHEMA)
+        self._next_cleanup = 0.0
+        self._outbox: queue.SimpleQueue[tuple[str, str]] = queue.SimpleQueue()
+        threading.Thread(target=self._write_forever, daemon=True).start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self._path, timeout=5.0, isolation_level=None, check_same_thread=False,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def publish(self, channel: str, message: dict[str, Any]) -> None:
+        """Queue `message` for `channel`; it is written in publish order."""
+        self._outbox.put((channel, json.dumps(message, ensure_ascii=False)))
+
+    def _write_forever(self) -> None:
+        while True:
+            batch = [self._outbox.get()]
+            while True:
+                try:
+                    batch.append(self._outbox.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except sqlite3.Error:
+                logger.exception("Dropped %d queued messages", len(batch))
+
+    def _write(self, batch: list[tuple[str, str]]) -> None:
+        now = time.time()
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany(
+                "INSERT INTO messages (channel, payload, created) VALUES (?, ?, ?)",
+                [(channel, payload, now) for channel, payload in batch],
+            )
+            if now >= self._next_cleanup:
+                self._conn.execute(
+                    "DELETE FROM messages WHERE created < ?", (now - self._retention,),
+                )
+                self._next_cleanup = now + self._retention / 4
+
+    def listen(
+        self,
+        channel: str,
+        sleep: Callable[[float], Any] = time.sleep,
+    ) -> Iterator[dict[str, Any]]:
+        """Yield messages published on `channel` from now on, forever."""
+        conn = self._connect()
+        (last,) = conn.execute("SELECT COALESCE(MAX(id), 0) FROM messages").fetchone()
+        while True:
+            rows = conn.execute(
+                "SELECT id, payload FROM messages WHERE channel = ? AND id > ? ORDER BY id",
+                (channel, last),
+            ).fetchall()
+            for last, payload in rows:
+                yield json.loads(payload)
+            if not rows:
+                sleep(self._poll)
+
+
+class SQLiteClientManager(PubSubManager):
+    """Socket.IO client manager that shares emits through a LocalMessageQueue."""
+
+    name = "sqlite"
+
+    def __init__(self, queue: LocalMessageQueue, channel: str = "socketio", **kwargs: Any) -> None:
+        super().__init__(channel=channel, **kwargs)
+        self.queue = queue
+
+    def _publish(self, data: dict[str, Any]) -> None:
+        self.queue.publish(self.channel, data)
+
+    def _listen(self) -> Iterator[dict[str, Any]]:
+        yield from self.queue.listen(self.channel, self.server.sleep)
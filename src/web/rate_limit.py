@@ -0,0 +1,132 @@
+"""Token-bucket rate limits for Socket.IO events.
+
+Every connected client (sid) has one entry holding a bucket per event
+it has sent, so dropping a client on disconnect is a single dict pop.
+An event is accepted if the client's bucket for it, the bucket shared
+by the client's IP address and the server-wide bucket all have a token
+left. A bucket of size `burst` refills at `rate` tokens per second, so
+short bursts pass while the sustained rate stays bounded.
+
+Rejections are counted per event and per limit ("ip", "global") for
+stats().
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Policy:
+    rate: float
+    burst: float
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, policy: Policy, now: float) -> None:
+        self.tokens = policy.burst
+        self.updated = now
+
+    def ready(self, policy: Policy, now: float) -> bool:
+        """Refill for the time passed; True if a token is available."""
+        self.tokens = min(policy.burst, self.tokens + (now - self.updated) * policy.rate)
+        self.updated = now
+        return self.tokens >= 1.0
+
+
+class _Client:
+    __slots__ = ("ip", "buckets", "rejected")
+
+    def __init__(self, ip: str) -> None:
+        self.ip = ip
+        self.buckets: dict[str, _Bucket] = {}
+        self.rejected = 0
+
+
+class _Address:
+    __slots__ = ("bucket", "clients")
+
+    def __init__(self, bucket: _Bucket) -> None:
+        self.bucket = bucket
+        self.clients = 0
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        policies: dict[str, Policy],
+        default: Policy,
+        per_ip: Policy | None = None,
+        total: Policy | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._policies = policies
+        self._default = default
+        self._per_ip = per_ip
+        self._total = total
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._clients: dict[str, _Client] = {}
+        self._addresses: dict[str, _Address] = {}
+        self._global = _Bucket(total, clock()) if total else None
+        self._rejected: Counter[str] = Counter()
+
+    def allow(self, sid: str, event: str, ip: str = "") -> bool:
+        """Take a token for `event` from `sid`; False if it is over a limit."""
+        now = self._clock()
+        with self._lock:
+            client = self._clients.get(sid)
+            if client is None:
+                client = self._clients[sid] = _Client(ip)
+                if self._per_ip is not None:
+                    address = self._addresses.get(ip)
+                    if address is None:
+                        address = self._addresses[ip] = _Address(_Bucket(self._per_ip, now))
+                    address.clients += 1
+
+            policy = self._policies.get(event, self._default)
+            bucket = client.buckets.get(event)
+            if bucket is None:
+                bucket = client.buckets[event] = _Bucket(policy, now)
+
+            # Check every limit before spending, so a refused event costs nothing.
+            checks = [(bucket, policy, event)]
+            if self._per_ip is not None:
+                checks.append((self._addresses[client.ip].bucket, self._per_ip, "ip"))
+            if self._global is not None:
+                checks.append((self._global, self._total, "global"))
+            for limit, limit_policy, reason in checks:
+                if not limit.ready(limit_policy, now):
+                    client.rejected += 1
+                    self._rejected[reason] += 1
+                    return False
+            for limit, _policy, _reason in checks:
+                limit.tokens -= 1.0
+            return True
+
+    def forget(self, sid: str) -> int:
+        """Drop a disconnected client; returns how many events it had rejected."""
+        with self._lock:
+            client = self._clients.pop(sid, None)
+            if client is None:
+                return 0
+            address = self._addresses.get(client.ip)
+            if address is not None:
+                address.clients -= 1
+                if address.clients == 0:
+                    del self._addresses[client.ip]
+            return client.rejected
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "clients": len(self._clients),
+                "addresses": len(self._addresses),
+                "rejected": dict(self._rejected),
+            }
@@ -1,16 +1,17 @@
 import sqlite3
 
-from flask import Blueprint, render_template, request, abort
+from flask import Blueprint, abort, current_app, render_template, request
 
 from src.db.queries import (
-    get_total_count,
+    get_total_count_cached,
     fetch_pokemon_page,
     search_pokemon,
     fetch_pokemon_detail,
     filter_pokemon,
     fetch_all_types,
+    fetch_evolution_chain,
 )
-from src.web.helpers import Pagination
+from src.web.helpers import CursorPagination, Pagination
 
 bp = Blueprint("main", __name__)
 
@@ -23,12 +24,40 @@ def _get_db() -> sqlite3.Connection:
 @bp.route("/")
 def index():
     conn = _get_db()
-    page = request.args.get("page", 1, type=int)
-    page = max(1, page)
     per_page = 24
-    total = get_total_count(conn)
-    pagination = Pagination(page=page, per_page=per_page, total=total)
-    pokemon_list = fetch_pokemon_page(conn, offset=pagination.offset, limit=per_page)
+    total = get_total_count_cached(conn, str(current_app.config["DB_PATH"]))
+
+    if "page" in request.args:
+        page = max(1, request.args.get("page", 1, type=int))
+        pagination = Pagination(page=page, per_page=per_page, total=total)
+        pokemon_list = fetch_pokemon_page(
+            conn, offset=pagination.offset, limit=per_page,
+        )
+    else:
+        after_id = request.args.get("after", None, type=int)
+        before_id = request.args.get("before", None, type=int)
+        rows = fetch_pokemon_page(
+            conn,
+            limit=per_page + 1,
+            after_id=after_id if before_id is None else None,
+            before_id=before_id,
+        )
+        has_more = len(rows) > per_page
+        if before_id is not None:
+            pokemon_list = rows[-per_page:]
+            has_prev, has_next = has_more, True
+        else:
+            pokemon_list = rows[:per_page]
+            has_prev, has_next = bool(after_id), has_more
+        pagination = CursorPagination(
+            per_page=per_page,
+            total=total,
+            first_id=pokemon_list[0]["id"] if pokemon_list else None,
+            last_id=pokemon_list[-1]["id"] if pokemon_list else None,
+            has_prev=has_prev,
+            has_next=has_next,
+        )
+
     return render_template(
         "index.html",
         pokemon_list=pokemon_list,
@@ -47,6 +76,7 @@ def detail(id_or_name: str):
         "detail.html",
         p=pokemon,
         abilities=abilities,
+        evolution_chain=fetch_evolution_chain(conn, pokemon["id"]),
         title=f"{pokemon['name_zh_hans']} - Pokemon 图鉴",
     )
 
@@ -1,38 +1,88 @@
 from __future__ import annotations
 
 import logging
+import secrets
+import sqlite3
 import threading
 import time
 
-from flask import current_app, request
-from flask_socketio import SocketIO, emit, join_room, leave_room
+from concurrent.futures import Future
+
+from flask import Flask, current_app, request
+from flask_socketio import SocketIO
 
 from src.battle.models import BattleConfig
 from src.battle.rules import parse_rules_from_data, validate_team
-from src.battle.state import Room, create_team
+from src.battle.state import Player, Room, create_team
 from src.battle.engine import TurnBattleEngine
+from src.battle.replay import record_battle
 from src.battle.room_manager import RoomManager
-from src.db.connection import create_connection
+from src.battle.scheduler import TimerScheduler
+from src.db.executor import DBExecutor
 from src.db.queries import fetch_battle_stats, fetch_team_validation_data
+from src.web.message_queue import LocalMessageQueue
+from src.web.rate_limit import Policy, RateLimiter
 
 logger = logging.getLogger(__name__)
 
 room_manager = RoomManager()
-_battle_engines: dict[str, TurnBattleEngine] = {}
-_switch_events: dict[str, threading.Event] = {}
-_rate_limits: dict[str, float] = {}
-
-
-def _is_rate_limited(sid: str, event: str, interval: float = 1.0) -> bool:
-    key = f"{sid}:{event}"
-    now = time.monotonic()
-    if now - _rate_limits.get(key, 0) < interval:
-        return True
-    _rate_limits[key] = now
-    return False
-
-
-def register_events(socketio: SocketIO) -> None:
+_battles: dict[str, BattleRun] = {}
+# Rooms with a room_update delta waiting to go out.
+_pending_updates: set[str] = set()
+_pending_lock = threading.Lock()
+# Changes made within this window are sent as a single delta.
+_UPDATE_WINDOW = 0.1
+# Fires every room's turn and switch timers; set up by register_events().
+_scheduler: TimerScheduler | None = None
+# Carries events to the worker that owns a room; see configure_rooms().
+_queue: LocalMessageQueue | None = None
+
+
+# Events per second and burst size, per client.
+_EVENT_POLICIES = {
+    "set_nickname": Policy(rate=0.5, burst=2),
+    "create_room": Policy(rate=0.2, burst=1),
+    "join_room": Policy(rate=0.5, burst=2),
+    "set_team": Policy(rate=1.0, burst=3),
+    "toggle_ready": Policy(rate=1.0, burst=3),
+    # Generous: a dropped leave leaves the player stuck on the room page.
+    "leave_room": Policy(rate=2.0, burst=5),
+    "room_sync": Policy(rate=1.0, burst=2),
+    "send_chat": Policy(rate=1.0, burst=5),
+    "select_pokemon": Policy(rate=1.0, burst=2),
+    "resume": Policy(rate=1.0, burst=2),
+}
+# Limits are applied by the worker the client is connected to, before
+# an event is handled or forwarded.
+rate_limiter = RateLimiter(
+    _EVENT_POLICIES,
+    default=Policy(rate=1.0, burst=2),
+    per_ip=Policy(rate=20.0, burst=40),
+    total=Policy(rate=2000.0, burst=4000),
+)
+
+
+def _db_executor() -> DBExecutor:
+    return current_app.extensions["db_executor"]
+
+
+def _log_stats(db_executor: DBExecutor) -> None:
+    logger.info(
+        "DB executor: %s; socket rate limits: %s",
+        db_executor.stats(), rate_limiter.stats(),
+    )
+    _scheduler.call_later(_STATS_INTERVAL, _log_stats, db_executor)
+
+
+# Seconds between server stats log lines.
+_STATS_INTERVAL = 60.0
+
+
+def register_events(socketio: SocketIO, db_executor: DBExecutor | None = None) -> None:
+    global _scheduler
+    _scheduler = TimerScheduler(socketio.start_background_task, socketio.sleep)
+    if db_executor is not None:
+        _scheduler.call_later(_STATS_INTERVAL, _log_stats, db_executor)
 
     @socketio.on("connect")
     def on_connect():
@@ -41,237 +91,423 @@ def register_events(socketio: SocketIO) -> None:
     @socketio.on("disconnect")
     def on_disconnect():
         sid = request.sid
-        room_before = room_manager.get_room_by_sid(sid)
-        code_before = room_before.code if room_before else None
-
-        room, empty = room_manager.leave_room(sid)
-
-        if code_before:
-            engine = _battle_engines.pop(code_before, None)
-            if engine:
-                engine.finished = True
-            switch_evt = _switch_events.pop(code_before, None)
-            if switch_evt:
-                switch_evt.set()
-
-        if room and not empty:
-            socketio.emit("room_update", room.to_dict(), room=room.code)
-        room_manager.remove_sid(sid)
-        for key in [k for k in _rate_limits if k.startswith(f"{sid}:")]:
-            del _rate_limits[key]
-
-    @socketio.on("set_nickname")
-    def on_set_nickname(data):
-        sid = request.sid
-        if _is_rate_limited(sid, "set_nickname", 2.0):
-            return
-        nickname = str(data.get("nickname", "")).strip()[:20]
-        if not nickname:
-            emit("error", {"message": "昵称不能为空"})
-            return
-        room_manager.set_nickname(sid, nickname)
-        emit("nickname_set", {"success": True, "nickname": nickname})
+        rejected = rate_limiter.forget(sid)
+        if rejected:
+            logger.info("Client %s had %d events rate limited", sid, rejected)
+        if _route(socketio, "disconnect", sid, None):
+            # The owner cleans up the room; only this worker's records remain.
+            room_manager.forget_nickname(sid)
 
-    @socketio.on("create_room")
-    def on_create_room(data=None):
-        sid = request.sid
-        if _is_rate_limited(sid, "create_room", 5.0):
-            return
-        rules_data = {}
-        if isinstance(data, dict):
-            rules_data = data.get("rules", {})
-        rules = parse_rules_from_data(rules_data)
-        room = room_manager.create_room(sid, rules=rules)
-        if room is None:
-            emit("error", {"message": "无法创建房间，请先设置昵称"})
-            return
-        join_room(room.code)
-        emit("room_created", {"room_code": room.code})
-        emit("room_update", room.to_dict(), room=room.code)
+    for event in _HANDLERS:
+        if event != "disconnect":
+            socketio.on_event(event, _entry_point(socketio, event))
 
-    @socketio.on("join_room")
-    def on_join_room(data):
-        sid = request.sid
-        if _is_rate_limited(sid, "join_room", 2.0):
-            return
-        code = str(data.get("room_code", "")).strip().upper()
-        room, error = room_manager.join_room(sid, code)
-        if room is None:
-            emit("room_joined", {"success": False, "error": error})
-            return
-        join_room(room.code)
-        emit("room_joined", {"success": True})
-        socketio.emit("room_update", room.to_dict(), room=room.code)
 
-    @socketio.on("set_team")
-    def on_set_team(data):
-        sid = request.sid
-        if _is_rate_limited(sid, "set_team", 1.0):
-            return
-        room = room_manager.get_room_by_sid(sid)
-        if room is None:
-            emit("error", {"message": "你不在任何房间中"})
-            return
+def _entry_point(socketio: SocketIO, event: str):
+    def handler(data=None):
+        if rate_limiter.allow(request.sid, event, request.remote_addr or ""):
+            _route(socketio, event, request.sid, data)
+    return handler
 
-        raw_ids = data.get("pokemon_ids", [])
-        if not isinstance(raw_ids, list):
-            emit("error", {"message": "无效的队伍数据"})
-            return
 
-        config = BattleConfig()
+def configure_rooms(
+    socketio: SocketIO,
+    app: Flask,
+    directory,
+    worker_id: str,
+    queue: LocalMessageQueue,
+) -> None:
+    """Host rooms as one of several workers sharing `directory` and `queue`.
+
+    Rooms live on the worker that created them. Events from a player in
+    a room owned by another worker are forwarded to it over the queue
+    (channel "worker:<id>") and handled there; its emits reach the
+    player through the Socket.IO client manager.
+    """
+    global room_manager, _queue
+    directory.release_worker(worker_id)
+    directory.heartbeat(worker_id)
+    room_manager = RoomManager(directory, worker_id)
+    _queue = queue
+    socketio.start_background_task(_serve_forwarded, socketio, app, queue, worker_id)
+    socketio.start_background_task(_keep_alive, socketio, directory, worker_id)
+
+
+# A worker that has not beaten for _WORKER_TIMEOUT seconds is taken to
+# have crashed and its rooms are released by the others.
+_HEARTBEAT_INTERVAL = 10.0
+_WORKER_TIMEOUT = 60.0
+
+
+def _keep_alive(socketio: SocketIO, directory, worker_id: str) -> None:
+    while True:
+        socketio.sleep(_HEARTBEAT_INTERVAL)
+        try:
+            directory.heartbeat(worker_id)
+            released = directory.sweep(_WORKER_TIMEOUT)
+        except sqlite3.Error:
+            logger.exception("Room directory heartbeat failed")
+            continue
+        if released:
+            logger.info("Released %d rooms of unresponsive workers", released)
+
+
+def _route(socketio: SocketIO, event: str, sid: str, data) -> bool:
+    """Handle `event` here, or forward it to the worker owning the room.
+    Returns True if it was forwarded."""
+    owner = None
+    if _queue is not None:
+        if event == "join_room":
+            owner = room_manager.owner_of(_room_code(data))
+        elif event == "resume":
+            owner = room_manager.owner_of(_session_room(data))
+        elif event in _ROOM_EVENTS:
+            owner = room_manager.owner_for_sid(sid)
+    if owner is None:
+        _HANDLERS[event](socketio, sid, data)
+        return False
+    _queue.publish(f"worker:{owner}", {
+        "event": event,
+        "sid": sid,
+        "data": data,
+        "nickname": room_manager.get_nickname(sid),
+    })
+    return True
+
+
+def _serve_forwarded(
+    socketio: SocketIO,
+    app: Flask,
+    queue: LocalMessageQueue,
+    worker_id: str,
+) -> None:
+    for message in queue.listen(f"worker:{worker_id}", socketio.sleep):
+        sid = message["sid"]
+        if message.get("nickname"):
+            room_manager.set_nickname(sid, message["nickname"])
         try:
-            pokemon_ids = [int(pid) for pid in raw_ids[:config.team_max]]
-        except (ValueError, TypeError):
-            emit("error", {"message": "无效的宝可梦 ID"})
+            with app.app_context():
+                _HANDLERS[message["event"]](socketio, sid, message["data"])
+        except Exception:
+            logger.exception("Forwarded %s from %s failed", message["event"], sid)
+        # Players connected elsewhere are only tracked here while in a room.
+        if room_manager.get_room_by_sid(sid) is None:
+            room_manager.forget_nickname(sid)
+
+
+def _room_code(data) -> str:
+    if not isinstance(data, dict):
+        return ""
+    return str(data.get("room_code", "")).strip().upper()
+
+
+def _session_room(data) -> str:
+    """Room code from a resume request; session tokens are "<code>.<secret>"."""
+    if not isinstance(data, dict):
+        return ""
+    return str(data.get("session", "")).partition(".")[0]
+
+
+def _leave_battle(socketio: SocketIO, sid: str) -> tuple[Room | None, bool]:
+    r = room_manager.get_room_by_sid(sid)
+    code_before = r.code if r else None
+
+    room, empty = room_manager.leave_room(sid)
+    if code_before:
+        socketio.server.leave_room(sid, code_before, namespace="/")
+        battle = _battles.get(code_before)
+        if battle:
+            battle.stop()
+    if room and not empty:
+        _publish_room(socketio, room)
+    return room, empty
+
+
+def _publish_room(socketio: SocketIO, room: Room) -> None:
+    """Broadcast the room's changes as a versioned delta, shortly, so a
+    burst of ready/team changes goes out as one room_update."""
+    with _pending_lock:
+        if room.code in _pending_updates:
             return
+        _pending_updates.add(room.code)
+    _scheduler.call_later(_UPDATE_WINDOW, _flush_room, socketio, room)
 
-        if any(pid <= 0 or pid > 1025 for pid in pokemon_ids):
-            emit("error", {"message": "无效的宝可梦 ID"})
-            return
 
-        if len(pokemon_ids) < config.team_min:
-            emit("error", {"message": f"至少选择 {config.team_min} 只宝可梦"})
-            return
+def _flush_room(socketio: SocketIO, room: Room) -> None:
+    with _pending_lock:
+        _pending_updates.discard(room.code)
+    changes = room.take_changes()
+    if changes is not None:
+        socketio.emit("room_update", changes, room=room.code)
 
-        # Validate against room rules
-        db_path = current_app.config["DB_PATH"]
-        conn = create_connection(db_path)
-        try:
-            team_data = fetch_team_validation_data(conn, pokemon_ids)
-        finally:
-            conn.close()
 
-        if len(team_data) != len(pokemon_ids):
-            emit("error", {"message": "部分宝可梦 ID 无效"})
-            return
+def _on_disconnect(socketio: SocketIO, sid: str, _data) -> None:
+    room = room_manager.get_room_by_sid(sid)
+    battle = _battles.get(room.code) if room else None
+    if battle is not None and battle.seated(sid):
+        # Paused on the scheduler, where the battle's timers are changed;
+        # the player may resume within the grace period.
+        _scheduler.call_soon(battle.hold_seat, sid)
+        return
+    _drop_player(socketio, sid)
 
-        errors = validate_team(room.rules, team_data)
-        if errors:
-            emit("team_invalid", {"errors": errors})
-            return
 
-        player = room.get_player(sid)
-        if player is None:
-            return
-        player.team_ids = pokemon_ids
-        player.ready = False
-        socketio.emit("room_update", room.to_dict(), room=room.code)
+def _drop_player(socketio: SocketIO, sid: str) -> None:
+    _leave_battle(socketio, sid)
+    room_manager.remove_sid(sid)
 
-    @socketio.on("toggle_ready")
-    def on_toggle_ready(_data=None):
-        sid = request.sid
-        if _is_rate_limited(sid, "toggle_ready", 1.0):
-            return
-        room = room_manager.get_room_by_sid(sid)
-        if room is None:
-            return
 
-        player = room.get_player(sid)
-        if player is None:
-            return
-        if not player.team_ids:
-            emit("error", {"message": "请先选择宝可梦队伍"})
-            return
+def _on_set_nickname(socketio: SocketIO, sid: str, data) -> None:
+    nickname = str(data.get("nickname", "")).strip()[:20]
+    if not nickname:
+        socketio.emit("error", {"message": "昵称不能为空"}, to=sid)
+        return
+    room_manager.set_nickname(sid, nickname)
+    socketio.emit("nickname_set", {"success": True, "nickname": nickname}, to=sid)
+
+
+def _on_create_room(socketio: SocketIO, sid: str, data) -> None:
+    rules_data = {}
+    if isinstance(data, dict):
+        rules_data = data.get("rules", {})
+    rules = parse_rules_from_data(rules_data)
+    room = room_manager.create_room(sid, rules=rules)
+    if room is None:
+        socketio.emit("error", {"message": "无法创建房间，请先设置昵称"}, to=sid)
+        return
+    socketio.server.enter_room(sid, room.code, namespace="/")
+    socketio.emit("room_created", {"room_code": room.code}, to=sid)
+    socketio.emit("room_state", room.snapshot(), to=sid)
 
-        player.ready = not player.ready
-        socketio.emit("room_update", room.to_dict(), room=room.code)
 
-        if room.all_ready:
-            _start_battle(socketio, room)
+def _on_join_room(socketio: SocketIO, sid: str, data) -> None:
+    room, error = room_manager.join_room(sid, _room_code(data))
+    if room is None:
+        socketio.emit("room_joined", {"success": False, "error": error}, to=sid)
+        return
+    socketio.server.enter_room(sid, room.code, namespace="/")
+    socketio.emit("room_joined", {"success": True}, to=sid)
+    socketio.emit("room_state", room.snapshot(), to=sid)
+    _publish_room(socketio, room)
 
-    @socketio.on("leave_room")
-    def on_leave_room(_data=None):
-        sid = request.sid
-        r = room_manager.get_room_by_sid(sid)
-        code_before = r.code if r else None
-
-        room, empty = room_manager.leave_room(sid)
-        if code_before:
-            leave_room(code_before)
-            engine = _battle_engines.pop(code_before, None)
-            if engine:
-                engine.finished = True
-            switch_evt = _switch_events.pop(code_before, None)
-            if switch_evt:
-                switch_evt.set()
-        if room and not empty:
-            socketio.emit("room_update", room.to_dict(), room=room.code)
-        emit("left_room", {"success": True})
-
-    @socketio.on("send_chat")
-    def on_send_chat(data):
-        sid = request.sid
-        if not isinstance(data, dict):
-            return
-        room = room_manager.get_room_by_sid(sid)
-        if room is None:
-            return
-        if _is_rate_limited(sid, "send_chat", 1.0):
-            return
-        nickname = room_manager.get_nickname(sid) or "???"
-        message = str(data.get("message", "")).strip()[:100]
-        if not message:
-            return
-        socketio.emit("chat_message", {
-            "nickname": nickname,
-            "message": message,
-        }, room=room.code)
 
-    @socketio.on("select_pokemon")
-    def on_select_pokemon(data):
-        sid = request.sid
-        if _is_rate_limited(sid, "select_pokemon", 1.0):
-            return
-        room = room_manager.get_room_by_sid(sid)
-        if room is None:
-            return
+def _on_set_team(socketio: SocketIO, sid: str, data) -> None:
+    room = room_manager.get_room_by_sid(sid)
+    if room is None:
+        socketio.emit("error", {"message": "你不在任何房间中"}, to=sid)
+        return
 
-        engine = _battle_engines.get(room.code)
-        if engine is None or engine.state != "waiting_switch":
-            return
+    raw_ids = data.get("pokemon_ids", [])
+    if not isinstance(raw_ids, list):
+        socketio.emit("error", {"message": "无效的队伍数据"}, to=sid)
+        return
 
-        player = room.get_player(sid)
-        if player is None:
-            return
+    config = BattleConfig()
+    try:
+        pokemon_ids = [int(pid) for pid in raw_ids[:config.team_max]]
+    except (ValueError, TypeError):
+        socketio.emit("error", {"message": "无效的宝可梦 ID"}, to=sid)
+        return
 
-        team_num = room.players.index(player) + 1
-        if engine.waiting_switch_team != team_num:
-            return
+    if any(pid <= 0 or pid > 1025 for pid in pokemon_ids):
+        socketio.emit("error", {"message": "无效的宝可梦 ID"}, to=sid)
+        return
 
-        index = data.get("pokemon_index")
-        if not isinstance(index, int):
-            return
+    if len(pokemon_ids) < config.team_min:
+        socketio.emit("error", {"message": f"至少选择 {config.team_min} 只宝可梦"}, to=sid)
+        return
 
-        new_active = engine.switch_pokemon(team_num, index)
-        if new_active is None:
-            emit("error", {"message": "无法选择该宝可梦"})
-            return
+    # Validate against room rules off the handler thread; the result is
+    # applied on the scheduler, where the room's other steps run.
+    future = _db_executor().submit(fetch_team_validation_data, pokemon_ids)
+    future.add_done_callback(
+        lambda f: _scheduler.call_soon(_apply_team, socketio, sid, room, pokemon_ids, f)
+    )
 
-        socketio.emit("pokemon_switched", {
-            "team": team_num,
-            "pokemon": new_active.to_dict(),
-        }, room=room.code)
 
-        switch_evt = _switch_events.get(room.code)
-        if switch_evt:
-            switch_evt.set()
+def _on_toggle_ready(socketio: SocketIO, sid: str, _data) -> None:
+    room = room_manager.get_room_by_sid(sid)
+    if room is None:
+        return
+
+    player = room.get_player(sid)
+    if player is None:
+        return
+    if not player.team_ids:
+        socketio.emit("error", {"message": "请先选择宝可梦队伍"}, to=sid)
+        return
+
+    player.ready = not player.ready
+    _publish_room(socketio, room)
+
+    if room.all_ready:
+        _start_battle(socketio, room)
+
+
+def _on_room_sync(socketio: SocketIO, sid: str, _data) -> None:
+    """A client missed a room_update version; send it the full state."""
+    room = room_manager.get_room_by_sid(sid)
+    if room is not None:
+        socketio.emit("room_state", room.snapshot(), to=sid)
+
+
+def _on_leave_room(socketio: SocketIO, sid: str, _data) -> None:
+    _leave_battle(socketio, sid)
+    socketio.emit("left_room", {"success": True}, to=sid)
+
+
+def _on_send_chat(socketio: SocketIO, sid: str, data) -> None:
+    if not isinstance(data, dict):
+        return
+    room = room_manager.get_room_by_sid(sid)
+    if room is None:
+        return
+    nickname = room_manager.get_nickname(sid) or "???"
+    message = str(data.get("message", "")).strip()[:100]
+    if not message:
+        return
+    socketio.emit("chat_message", {
+        "nickname": nickname,
+        "message": message,
+    }, room=room.code)
+
+
+def _on_select_pokemon(socketio: SocketIO, sid: str, data) -> None:
+    room = room_manager.get_room_by_sid(sid)
+    if room is None:
+        return
+
+    battle = _battles.get(room.code)
+    if battle is None or battle.engine.state != "waiting_switch":
+        return
+
+    player = room.get_player(sid)
+    if player is None:
+        return
+
+    team_num = room.players.index(player) + 1
+    if battle.engine.waiting_switch_team != team_num:
+        return
+
+    index = data.get("pokemon_index")
+    if not isinstance(index, int):
+        return
+
+    _scheduler.call_soon(battle.choose, sid, team_num, index)
+
+
+def _on_resume(socketio: SocketIO, sid: str, data) -> None:
+    session = str(data.get("session", "")) if isinstance(data, dict) else ""
+    battle = _battles.get(_session_room(data))
+    team = battle.sessions.get(session) if battle is not None else None
+    if team is None or len(battle.room.players) < team \
+            or room_manager.get_room_by_sid(sid) is not None:
+        socketio.emit("resume_failed", {}, to=sid)
+        return
+    # Move the membership here rather than on the scheduler, which must
+    # not wait on the room directory. A late disconnect of the old sid
+    # then finds no room and does nothing.
+    old_sid = battle.room.players[team - 1].sid
+    room_manager.rebind(old_sid, sid)
+    _scheduler.call_soon(battle.resume, team, old_sid, sid, bool(data.get("full")))
+
+
+def _undo_resume(socketio: SocketIO, sid: str, old_sid: str, released: bool) -> None:
+    """Give the membership _on_resume moved to `sid` back to the seat; if
+    the seat was let go meanwhile, that drop may have missed it."""
+    room_manager.move_member(sid, old_sid)
+    if released:
+        _drop_player(socketio, old_sid)
+
+
+_HANDLERS = {
+    "disconnect": _on_disconnect,
+    "resume": _on_resume,
+    "set_nickname": _on_set_nickname,
+    "create_room": _on_create_room,
+    "join_room": _on_join_room,
+    "set_team": _on_set_team,
+    "toggle_ready": _on_toggle_ready,
+    "room_sync": _on_room_sync,
+    "leave_room": _on_leave_room,
+    "send_chat": _on_send_chat,
+    "select_pokemon": _on_select_pokemon,
+}
+
+# Events that act on the sender's current room.
+_ROOM_EVENTS = {
+    "disconnect", "set_team", "toggle_ready", "room_sync", "leave_room", "send_chat",
+    "select_pokemon",
+}
+
+
+def _apply_team(
+    socketio: SocketIO,
+    sid: str,
+    room: Room,
+    pokemon_ids: list[int],
+    future: Future,
+) -> None:
+    try:
+        team_data = future.result()
+    except Exception:
+        logger.exception("Team validation query failed for %s", sid)
+        socketio.emit("error", {"message": "队伍校验失败，请重试"}, room=sid)
+        return
+
+    if len(team_data) != len(pokemon_ids):
+        socketio.emit("error", {"message": "部分宝可梦 ID 无效"}, room=sid)
+        return
+
+    errors = validate_team(room.rules, team_data)
+    if errors:
+        socketio.emit("team_invalid", {"errors": errors}, room=sid)
+        return
+
+    player = room.get_player(sid)
+    if player is None:
+        return
+    player.team_ids = pokemon_ids
+    player.ready = False
+    _publish_room(socketio, room)
+
+
+def _fetch_both_teams(
+    conn: sqlite3.Connection,
+    team1_ids: list[int],
+    team2_ids: list[int],
+) -> tuple[list, list]:
+    return fetch_battle_stats(conn, team1_ids), fetch_battle_stats(conn, team2_ids)
 
 
 def _start_battle(socketio: SocketIO, room: Room) -> None:
-    config = BattleConfig()
     room.status = "battling"
+    p1 = room.players[0]
+    p2 = room.players[1]
 
-    db_path = current_app.config["DB_PATH"]
-    conn = create_connection(db_path)
+    future = _db_executor().submit(_fetch_both_teams, p1.team_ids, p2.team_ids)
+    future.add_done_callback(
+        lambda f: _scheduler.call_soon(_launch_battle, socketio, room, p1, p2, f)
+    )
 
+
+def _launch_battle(
+    socketio: SocketIO,
+    room: Room,
+    p1: Player,
+    p2: Player,
+    future: Future,
+) -> None:
+    config = BattleConfig()
     try:
-        p1 = room.players[0]
-        p2 = room.players[1]
+        stats1, stats2 = future.result()
+    except Exception:
+        logger.exception("Battle stats query failed for room %s", room.code)
+        stats1, stats2 = [], []
 
-        stats1 = fetch_battle_stats(conn, p1.team_ids)
-        stats2 = fetch_battle_stats(conn, p2.team_ids)
-    finally:
-        conn.close()
+    # A player may have left while the query was queued.
+    if room.status != "battling" or room.players[:2] != [p1, p2]:
+        return
 
     if not stats1 or not stats2:
         room.status = "waiting"
@@ -280,100 +516,267 @@ def _start_battle(socketio: SocketIO, room: Room) -> None:
         socketio.emit(
             "error", {"message": "队伍数据无效，请重新选择"}, room=room.code,
         )
-        socketio.emit("room_update", room.to_dict(), room=room.code)
+        _publish_room(socketio, room)
         return
 
     team1 = create_team(stats1, 1)
     team2 = create_team(stats2, 2)
 
     engine = TurnBattleEngine(team1, team2, config)
-    _battle_engines[room.code] = engine
-
-    socketio.emit("battle_start", {
-        "your_team_num": 1,
-        "your_team": engine.get_team_summary(1),
-        "enemy_active": engine.get_active(2).to_dict(),
-        "enemy_team_count": len(team2),
-        "player1": p1.nickname,
-        "player2": p2.nickname,
-    }, room=p1.sid)
-
-    socketio.emit("battle_start", {
-        "your_team_num": 2,
-        "your_team": engine.get_team_summary(2),
-        "enemy_active": engine.get_active(1).to_dict(),
-        "enemy_team_count": len(team1),
-        "player1": p1.nickname,
-        "player2": p2.nickname,
-    }, room=p2.sid)
-
-    socketio.start_background_task(_run_turn_loop, socketio, room, engine, config)
-
-
-def _run_turn_loop(
-    socketio: SocketIO,
-    room: Room,
-    engine: TurnBattleEngine,
-    config: BattleConfig,
-) -> None:
-    try:
-        socketio.sleep(1.5)
+    battle = BattleRun(socketio, room, engine, config)
+    _battles[room.code] = battle
+
+    for team, player in ((1, p1), (2, p2)):
+        socketio.emit("battle_start", battle.start_payload(team), room=player.sid)
+
+    battle.start()
+
+
+class BattleRun:
+    """One room's battle as a chain of scheduler callbacks.
+
+    Each step (turn, forced switch, switch timeout, player switch) runs
+    on the shared scheduler and queues the next one, so a running battle
+    holds a pending timer rather than a parked thread.
+    """
+
+    def __init__(
+        self,
+        socketio: SocketIO,
+        room: Room,
+        engine: TurnBattleEngine,
+        config: BattleConfig,
+    ) -> None:
+        self.socketio = socketio
+        self.room = room
+        self.engine = engine
+        self.config = config
+        self._timer = None
+        # The step the timer will run, kept so a paused battle can re-arm it.
+        self._pending: tuple = ()
+        self._paused_left = 0.0
+        self._ended = False
+        # Resume tokens per team: "<room code>.<secret>", so any worker
+        # can route a resume to the room's owner.
+        self.sessions = {
+            f"{room.code}.{secrets.token_urlsafe(12)}": team for team in (1, 2)
+        }
+        # Seats of disconnected players: team -> (old sid, grace timer).
+        self._held: dict[int, tuple[str, object]] = {}
+        # Sids dropped from the room by _release().
+        self._released: set[str] = set()
+
+    def start(self) -> None:
+        self._after(1.5, self._turn)
+
+    def start_payload(self, team: int) -> dict:
+        engine, players = self.engine, self.room.players
+        enemy = 2 if team == 1 else 1
+        session = next(token for token, t in self.sessions.items() if t == team)
+        return {
+            "your_team_num": team,
+            "your_team": [p.to_brief() for p in engine.get_team(team)],
+            "enemy_active": engine.get_active(enemy).to_dict(),
+            "enemy_team_count": len(engine.get_team(enemy)),
+            "player1": players[0].nickname,
+            "player2": players[1].nickname,
+            "session": session,
+        }
+
+    def snapshot(self, team: int) -> dict:
+        """Compact battle state for a resuming player."""
+        engine = self.engine
+        data = {
+            "turn": engine.turn,
+            "your_team_num": team,
+            "active": [engine.active1.index, engine.active2.index],
+            "hp": [
+                [p.current_hp for p in engine.team1],
+                [p.current_hp for p in engine.team2],
+            ],
+            "enemy_active": engine.get_active(2 if team == 1 else 1).to_dict(),
+            "waiting_switch": engine.waiting_switch_team,
+        }
+        return data
+
+    def seated(self, sid: str) -> bool:
+        """Whether `sid` plays in this battle and it is still running."""
+        return not self._ended and self.room.get_player(sid) is not None
+
+    def hold_seat(self, sid: str) -> None:
+        """Keep a disconnected player's seat for config.reconnect_grace,
+        pausing the battle until they resume."""
+        player = self.room.get_player(sid)
+        if self._ended or player is None:
+            # The battle ended (or the player resumed) since the disconnect.
+            self._release(sid)
+            return
+        team = self.room.players.index(player) + 1
+        if self._timer is not None:
+            self._paused_left = max(0.0, self._timer.deadline - time.monotonic())
+            self._timer.cancel()
+            self._timer = None
+        self._held[team] = (sid, _scheduler.call_later(
+            self.config.reconnect_grace, self._guarded, self._grace_expired, team,
+        ))
+
+    def resume(self, team: int, old_sid: str, sid: str, full: bool) -> None:
+        """Seat a reconnected player under their new sid and send the state.
+
+        _on_resume has already moved the seat's membership to `sid`.
+        """
+        if self._ended or len(self.room.players) < team:
+            self.socketio.emit("resume_failed", {}, to=sid)
+            self.socketio.start_background_task(
+                _undo_resume, self.socketio, sid, old_sid, old_sid in self._released,
+            )
+            return
+        # The old connection may not have timed out yet; its late
+        # disconnect then finds no seat and does nothing.
+        held = self._held.pop(team, None)
+        if held is not None:
+            held[1].cancel()
+        player = self.room.players[team - 1]
+        self.socketio.server.leave_room(player.sid, self.room.code, namespace="/")
+        player.sid = sid
+        self.socketio.server.enter_room(sid, self.room.code, namespace="/")
+        data = self.snapshot(team)
+        if full:
+            data.update(self.start_payload(team))
+        self.socketio.emit("battle_resumed", data, to=sid)
+
+        # battle_resumed hides the switch panel; prompt again if this
+        # team still owes a choice, even while the other seat is held.
+        prompted = None
+        if self._pending and self._pending[0] == self._switch_timeout \
+                and self.engine.waiting_switch_team == team:
+            self._request_switch(team)
+            prompted = team
+        if self._held or self._timer is not None or not self._pending:
+            return
+        # Nobody is away any more: pick the battle up where it paused.
+        step, args = self._pending
+        delay = self._paused_left
+        if step == self._switch_timeout:
+            waiting = self.engine.waiting_switch_team
+            if waiting != prompted:
+                self._request_switch(waiting)
+            delay = self.config.switch_timeout
+        self._after(delay, step, *args)
+
+    def _request_switch(self, team: int) -> None:
+        self.socketio.emit("request_switch", {
+            "reason": "fainted",
+            "remaining": [p.to_dict() for p in self.engine.get_alive(team)],
+        }, to=self.room.players[team - 1].sid)
+
+    def _grace_expired(self, team: int) -> None:
+        sid, _ = self._held.pop(team)
+        self._release(sid)
+
+    def _release(self, sid: str) -> None:
+        """Drop `sid` from its room off the scheduler, as that writes to
+        the room directory."""
+        self._released.add(sid)
+        self.socketio.start_background_task(_drop_player, self.socketio, sid)
+
+    def stop(self) -> None:
+        """A player left: end the battle on the scheduler."""
+        if self._timer is not None:
+            self._timer.cancel()
+        _scheduler.call_soon(self._guarded, self._abort)
+
+    def choose(self, sid: str, team: int, index: int) -> None:
+        """Player-picked replacement after a faint."""
+        self._guarded(self._choose, sid, team, index)
+
+    def _after(self, delay: float, step, *args) -> None:
+        self._pending = (step, args)
+        if self._held:
+            # Paused while a player is away; resume() arms the step.
+            self._timer = None
+            self._paused_left = delay
+            return
+        self._timer = _scheduler.call_later(delay, self._guarded, step, *args)
 
-        while not engine.finished:
-            events = engine.execute_turn()
-            room.turn = engine.turn
+    def _guarded(self, step, *args) -> None:
+        if self._ended:
+            return
+        try:
+            step(*args)
+        except Exception:
+            logger.exception("Battle crashed for room %s", self.room.code)
+            self.socketio.emit("error", {"message": "对战发生错误"}, room=self.room.code)
+            self._close()
+
+    def _emit_switch(self, team: int, new_active) -> None:
+        if new_active:
+            self.socketio.emit("pokemon_switched", {
+                "team": team,
+                "pokemon": new_active.to_dict(),
+            }, room=self.room.code)
+
+    def _turn(self) -> None:
+        engine, room = self.engine, self.room
+        if engine.finished:
+            self._end()
+            return
 
-            event_dicts = [e.to_dict() for e in events]
-            socketio.emit("turn_result", {
-                "turn": engine.turn,
-                "events": event_dicts,
-            }, room=room.code)
+        events = engine.execute_turn()
+        room.turn = engine.turn
+        self.socketio.emit("turn_result", {
+            "turn": engine.turn,
+            "events": [e.to_dict() for e in events],
+        }, room=room.code)
 
-            if engine.state == "waiting_switch":
-                fainted_team = engine.waiting_switch_team
-                fainted_player = room.players[fainted_team - 1]
-                remaining = [
-                    p.to_dict() for p in engine.get_alive(fainted_team)
-                ]
-
-                if len(remaining) == 1:
-                    socketio.sleep(2)
-                    if engine.state == "waiting_switch":
-                        new_active = engine.switch_pokemon(
-                            fainted_team, remaining[0]["index"]
-                        )
-                        if new_active:
-                            socketio.emit("pokemon_switched", {
-                                "team": fainted_team,
-                                "pokemon": new_active.to_dict(),
-                            }, room=room.code)
-                else:
-                    socketio.emit("request_switch", {
-                        "reason": "fainted",
-                        "remaining": remaining,
-                    }, room=fainted_player.sid)
-
-                    switch_evt = threading.Event()
-                    _switch_events[room.code] = switch_evt
-
-                    switch_evt.wait(timeout=config.switch_timeout)
-                    _switch_events.pop(room.code, None)
-
-                    if engine.state == "waiting_switch":
-                        new_active = engine.auto_switch(fainted_team)
-                        if new_active:
-                            socketio.emit("pokemon_switched", {
-                                "team": fainted_team,
-                                "pokemon": new_active.to_dict(),
-                            }, room=room.code)
-
-                if engine.finished:
-                    break
-
-                socketio.sleep(1.5)
-            else:
-                socketio.sleep(config.turn_delay)
+        if engine.state != "waiting_switch":
+            self._after(self.config.turn_delay, self._turn)
+            return
+
+        fainted_team = engine.waiting_switch_team
+        remaining = [p.to_dict() for p in engine.get_alive(fainted_team)]
+        if len(remaining) == 1:
+            self._after(2, self._forced_switch, fainted_team, remaining[0]["index"])
+            return
 
+        self._request_switch(fainted_team)
+        self._after(self.config.switch_timeout, self._switch_timeout, fainted_team)
+
+    def _forced_switch(self, team: int, index: int) -> None:
+        if self.engine.state == "waiting_switch":
+            self._emit_switch(team, self.engine.switch_pokemon(team, index))
+        self._next_turn()
+
+    def _switch_timeout(self, team: int) -> None:
+        if self.engine.state == "waiting_switch":
+            self._emit_switch(team, self.engine.auto_switch(team))
+        self._next_turn()
+
+    def _choose(self, sid: str, team: int, index: int) -> None:
+        engine = self.engine
+        if engine.state != "waiting_switch" or engine.waiting_switch_team != team:
+            return
+        new_active = engine.switch_pokemon(team, index)
+        if new_active is None:
+            self.socketio.emit("error", {"message": "无法选择该宝可梦"}, room=sid)
+            return
+        self._emit_switch(team, new_active)
+        if self._timer is not None:
+            self._timer.cancel()
+        self._next_turn()
+
+    def _next_turn(self) -> None:
+        if self.engine.finished:
+            self._end()
+        else:
+            self._after(1.5, self._turn)
+
+    def _abort(self) -> None:
+        self.engine.finished = True
+        self._end()
+
+    def _end(self) -> None:
+        engine, room = self.engine, self.room
         winner_team = engine.winner_team
         winner_name = ""
         if winner_team == 1 and len(room.players) > 0:
@@ -381,15 +784,28 @@ def _run_turn_loop(
         elif winner_team == 2 and len(room.players) > 1:
             winner_name = room.players[1].nickname
 
-        socketio.emit("battle_end", {
-            "winner_name": winner_name,
-            "winner_team": winner_team,
-            "total_turns": engine.turn,
-        }, room=room.code)
-    except Exception:
-        logger.exception("Battle loop crashed for room %s", room.code)
-        socketio.emit("error", {"message": "对战发生错误"}, room=room.code)
-    finally:
-        room.status = "finished"
-        _battle_engines.pop(room.code, None)
-        _switch_events.pop(room.code, None)
+        replay = record_battle(engine).to_text()
+        logger.info("Battle in room %s finished, replay %s", room.code, replay)
+
+        try:
+            self.socketio.emit("battle_end", {
+                "winner_name": winner_name,
+                "winner_team": winner_team,
+                "total_turns": engine.turn,
+                "replay": replay,
+            }, room=room.code)
+        finally:
+            self._close()
+
+    def _close(self) -> None:
+        self._ended = True
+        if self._timer is not None:
+            self._timer.cancel()
+        self.room.status = "finished"
+        if _battles.get(self.room.code) is self:
+            del _battles[self.room.code]
+        # Nobody can resume a finished battle; let absent players go.
+        for sid, timer in self._held.values():
+            timer.cancel()
+            self._release(sid)
+        self._held.clear()
@@ -0,0 +1,201 @@
+"""Render the public Pokedex pages to static HTML.
+
+Pages are written as directory indexes so existing links keep working on
+any static file server:
+
+    index.html, page/{n}/index.html          list pages
+    pokemon/{id}/index.html                  detail pages
+    filter/index.html                        filter landing page
+    filter/type/{type}/index.html            per-type landing pages
+    filter/gen/{gen}/index.html              per-generation landing pages
+
+Templates and Jinja filters are the same ones Flask uses; `static_site`
+is set so links point at the static layout and the server-only search
+and battle entries are hidden. Each page's template context is hashed,
+and .render-state.json keeps the hashes, so a re-run only re-renders
+pages whose rows (or the templates) changed.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Iterator
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from src.db.queries import (
+    fetch_all_types,
+    fetch_evolution_chain,
+    fetch_pokemon_detail,
+    fetch_pokemon_page,
+    filter_pokemon,
+    get_total_count,
+)
+from src.web.filters import FILTERS
+from src.web.helpers import Pagination
+
+TEMPLATE_DIR = Path(__file__).parent / "templates"
+STATE_NAME = ".render-state.json"
+
+_PER_PAGE = 24
+_FILTER_LIMIT = 200
+
+_env: Environment | None = None
+
+
+def _create_env() -> Environment:
+    env = Environment(
+        loader=FileSystemLoader(str(TEMPLATE_DIR)),
+        autoescape=select_autoescape(["html", "htm", "xml"]),
+    )
+    env.filters.update(FILTERS)
+    env.globals["static_site"] = True
+    return env
+
+
+def _init_worker() -> None:
+    global _env
+    _env = _create_env()
+
+
+def _render_page(output_dir: Path, task: tuple[str, str, dict]) -> str:
+    template, path, context = task
+    env = _env or _create_env()
+    html = env.get_template(template).render(**context)
+    target = output_dir / path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(html, encoding="utf-8")
+    return path
+
+
+def _rows(rows: list[sqlite3.Row]) -> list[dict]:
+    return [dict(row) for row in rows]
+
+
+def _pages(conn: sqlite3.Connection) -> Iterator[tuple[str, str, dict]]:
+    """Yield (template, output path, context) for every static page."""
+    total = get_total_count(conn)
+    all_types = _rows(fetch_all_types(conn))
+
+    page = 1
+    after_id = None
+    while True:
+        rows = fetch_pokemon_page(conn, limit=_PER_PAGE, after_id=after_id)
+        context = {
+            "pokemon_list": _rows(rows),
+            "pagination": Pagination(page=page, per_page=_PER_PAGE, total=total),
+            "title": "Pokemon 图鉴",
+        }
+        if page == 1:
+            yield "index.html", "index.html", context
+        yield "index.html", f"page/{page}/index.html", context
+        if len(rows) < _PER_PAGE:
+            break
+        after_id = rows[-1]["id"]
+        page += 1
+
+    landings: list[tuple[str, dict[str, Any]]] = [("filter/index.html", {})]
+    landings += [
+        (f"filter/type/{t['name_en']}/index.html", {"type_name": t["name_en"]})
+        for t in all_types
+    ]
+    generations = [
+        row[0]
+        for row in conn.execute(
+            "SELECT DISTINCT generation FROM pokemon_full ORDER BY generation"
+        )
+    ]
+    landings += [(f"filter/gen/{g}/index.html", {"gen": g}) for g in generations]
+
+    for path, criteria in landings:
+        results = filter_pokemon(conn, limit=_FILTER_LIMIT, **criteria)
+        yield "index.html", path, {
+            "pokemon_list": _rows(results),
+            "pagination": None,
+            "title": "筛选结果",
+            "all_types": all_types,
+            "generations": generations,
+            "filter_type": criteria.get("type_name", ""),
+            "filter_gen": criteria.get("gen", ""),
+            "filter_sort": "id",
+            "filter_min_total": "",
+        }
+
+    for (pid,) in conn.execute("SELECT id FROM pokemon_full ORDER BY id").fetchall():
+        pokemon, abilities = fetch_pokemon_detail(conn, str(pid))
+        yield "detail.html", f"pokemon/{pid}/index.html", {
+            "p": dict(pokemon),
+            "abilities": abilities,
+            "evolution_chain": _rows(fetch_evolution_chain(conn, pid)),
+            "title": f"{pokemon['name_zh_hans']} - Pokemon 图鉴",
+        }
+
+
+def _templates_digest() -> str:
+    digest = hashlib.sha256()
+    for path in sorted(TEMPLATE_DIR.rglob("*.html")):
+        digest.update(path.relative_to(TEMPLATE_DIR).as_posix().encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _context_digest(template: str, context: dict) -> str:
+    encoded = json.dumps(
+        [template, context],
+        sort_keys=True,
+        ensure_ascii=False,
+        default=dataclasses.asdict,
+    )
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def render_static_site(
+    conn: sqlite3.Connection,
+    output_dir: Path,
+    *,
+    max_workers: int = 4,
+    force: bool = False,
+) -> dict[str, int]:
+    """Render all pages into `output_dir`. Returns rendered/unchanged/removed counts."""
+    state_path = output_dir / STATE_NAME
+    templates = _templates_digest()
+    previous: dict[str, str] = {}
+    if state_path.exists() and not force:
+        state = json.loads(state_path.read_text(encoding="utf-8"))
+        if state.get("templates") == templates:
+            previous = state["pages"]
+
+    hashes: dict[str, str] = {}
+    tasks: list[tuple[str, str, dict]] = []
+    for template, path, context in _pages(conn):
+        digest = _context_digest(template, context)
+        hashes[path] = digest
+        if previous.get(path) != digest or not (output_dir / path).exists():
+            tasks.append((template, path, context))
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if max_workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as pool:
+            list(pool.map(_render_page, [output_dir] * len(tasks), tasks, chunksize=16))
+    else:
+        for task in tasks:
+            _render_page(output_dir, task)
+
+    removed = [path for path in previous if path not in hashes]
+    for path in removed:
+        (output_dir / path).unlink(missing_ok=True)
+
+    state_path.write_text(
+        json.dumps({"templates": templates, "pages": hashes}),
+        encoding="utf-8",
+    )
+    return {
+        "rendered": len(tasks),
+        "unchanged": len(hashes) - len(tasks),
+        "removed": len(removed),
+    }